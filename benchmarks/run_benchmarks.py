@@ -0,0 +1,426 @@
+"""
+Offline benchmark suite for the pipeline: transcription real-time factor,
+summarization wall time, embedding throughput, retrieval latency and peak
+memory, on synthetic inputs from 5 minutes to 3 hours.
+
+    python benchmarks/run_benchmarks.py --output downloads/benchmarks/base.json
+    python benchmarks/run_benchmarks.py --compare downloads/benchmarks/base.json
+
+Every (case, duration) pair runs in a fresh process so its peak RSS is its
+own. LLM calls go to a local fake OpenAI-compatible server with a fixed
+latency; cases whose dependencies (Whisper, sentence-transformers) are not
+installed are reported as skipped. Timings are the median of --repeats runs,
+except cold-start metrics (model load, first paint), which only the first run
+of a process measures: later runs reuse the process-wide model registry.
+"""
+import argparse
+import ast
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(ROOT, "src"))
+sys.path.append(os.path.join(ROOT, "tests"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from synthetic import HashingEncoder, synthetic_audio, synthetic_queries, synthetic_summary, synthetic_transcript
+
+DEFAULT_DURATIONS = (300, 3600, 10800)  # 5 min, 1 h, 3 h
+QUICK_DURATIONS = (300,)
+DEFAULT_TOLERANCE = 0.15
+SEED = 0
+
+# Metrics where a larger value is an improvement; every other timing or
+# memory metric is better when smaller
+HIGHER_IS_BETTER = {"texts_per_second"}
+# Only the first run in a process pays these; repeats would report warm ~0 values
+COLD_METRICS = {"load_seconds", "first_paint_seconds"}
+COMPARED_SUFFIXES = ("_seconds", "_ms", "_mb", "_per_second", "rtf")
+# Absolute changes below these are noise, whatever their relative size
+NOISE_FLOORS = {"_ms": 1.0, "_seconds": 0.01, "_mb": 5.0}
+APP_PATH = os.path.join(ROOT, "src", "app.py")
+# Packages that take seconds to import; the app must not load them before
+# its first paint
+HEAVY_MODULES = ("torch", "whisper", "sentence_transformers", "transformers", "openai", "pytubefix")
+
+
+class SkipBenchmark(Exception):
+    pass
+
+
+def _percentile_ms(samples: List[float], q: float) -> float:
+    return float(np.percentile(np.asarray(samples) * 1000, q))
+
+
+def app_imports(path: str = APP_PATH) -> List[str]:
+    """Modules app.py imports at the top level, i.e. before anything renders"""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return modules
+
+
+def import_profile(modules: List[str]) -> Dict:
+    """Import `modules` in a fresh interpreter: wall time and which heavy packages got loaded"""
+    code = (
+        "import importlib, json, sys, time\n"
+        f"sys.path.insert(0, {os.path.join(ROOT, 'src')!r})\n"
+        "started = time.perf_counter()\n"
+        f"for name in {modules!r}: importlib.import_module(name)\n"
+        "seconds = time.perf_counter() - started\n"
+        f"print(json.dumps({{'seconds': seconds, 'heavy': [m for m in {list(HEAVY_MODULES)!r} if m in sys.modules]}}))\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def bench_startup(seconds: float, config: Dict) -> Dict:
+    """
+    Import time of the app's top-level dependencies (Streamlit itself
+    excluded) and, when Streamlit is installed, time to the first full
+    render of the app script in a headless session.
+    """
+    profile = import_profile([m for m in app_imports() if m.split(".")[0] != "streamlit"])
+    result = {'import_seconds': profile['seconds'], 'heavy_modules_loaded': len(profile['heavy'])}
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return result
+    started = time.perf_counter()
+    AppTest.from_file(APP_PATH, default_timeout=60).run()
+    result['first_paint_seconds'] = time.perf_counter() - started
+    return result
+
+
+def bench_transcribe(seconds: float, config: Dict) -> Dict:
+    try:
+        import whisper  # noqa: F401
+    except ImportError as e:
+        raise SkipBenchmark(f"whisper not installed ({e})")
+    from transcription import get_whisper_model, transcribe_pcm_stream
+
+    audio = synthetic_audio(seconds, SEED)
+    started = time.perf_counter()
+    get_whisper_model(config['whisper_model'])
+    load_seconds = time.perf_counter() - started
+
+    # One-second blocks, as decode_audio_stream delivers them
+    blocks = (audio[i:i + 16000] for i in range(0, len(audio), 16000))
+    started = time.perf_counter()
+    segments = list(transcribe_pcm_stream(
+        blocks, config['whisper_model'], language="en", workers=config['whisper_workers']
+    ))
+    wall_seconds = time.perf_counter() - started
+    return {
+        'load_seconds': load_seconds,
+        'wall_seconds': wall_seconds,
+        'rtf': wall_seconds / seconds,
+        'segments': len(segments)
+    }
+
+
+def bench_summarize(seconds: float, config: Dict) -> Dict:
+    from fake_openai_server import FakeOpenAIServer
+    from llm_client import create_groq_client
+    from summarization import YouTubeSummarizer
+
+    # The fake server's latency stands in for the API; the client-side rate
+    # limit would otherwise dominate every measurement
+    os.environ['LLM_REQUESTS_PER_MINUTE'] = "0"
+    transcription = synthetic_transcript(seconds, SEED)
+
+    summarizer = YouTubeSummarizer(sectioning="fixed")
+    summarizer.groq_client = None
+    started = time.perf_counter()
+    summarizer.generate_summary(transcription)
+    extractive_seconds = time.perf_counter() - started
+
+    reply = "[0:00:00] Section title\n- First key point\n- Second key point"
+    with FakeOpenAIServer(latency=config['llm_latency'], reply=reply) as server:
+        summarizer = YouTubeSummarizer(sectioning="fixed")
+        summarizer.groq_client = create_groq_client("benchmark", server.base_url)
+        started = time.perf_counter()
+        summary = summarizer.generate_summary(transcription)
+        llm_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        summarizer.generate_hierarchical_summary(summary)
+        overview_seconds = time.perf_counter() - started
+        requests = len(server.requests)
+
+    return {
+        'extractive_wall_seconds': extractive_seconds,
+        'llm_wall_seconds': llm_seconds,
+        'overview_wall_seconds': overview_seconds,
+        'sections': len(summary['sections']),
+        'llm_requests': requests
+    }
+
+
+def bench_embed(seconds: float, config: Dict) -> Dict:
+    try:
+        import sentence_transformers  # noqa: F401
+    except ImportError as e:
+        raise SkipBenchmark(f"sentence-transformers not installed ({e})")
+    from embeddings import EmbeddingCache
+    from vector_index import build_segment_windows
+
+    texts = [w['text'] for w in build_segment_windows(synthetic_transcript(seconds, SEED)['segments'])]
+    embeddings = EmbeddingCache(path=None)
+    started = time.perf_counter()
+    embeddings.encoder.encode(["warm up"], normalize_embeddings=True)
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    embeddings.encode(texts)
+    wall_seconds = time.perf_counter() - started
+    return {
+        'load_seconds': load_seconds,
+        'wall_seconds': wall_seconds,
+        'texts_per_second': len(texts) / wall_seconds,
+        'texts': len(texts)
+    }
+
+
+def bench_retrieve(seconds: float, config: Dict) -> Dict:
+    from assistant import VideoAssistant
+    from embeddings import EmbeddingCache
+
+    transcription = synthetic_transcript(seconds, SEED)
+    summary = synthetic_summary(transcription, f"bench{int(seconds)}")
+    bot = VideoAssistant(embedding_cache=EmbeddingCache(path=None, encoder=HashingEncoder()))
+
+    started = time.perf_counter()
+    bot.load_summary(summary, transcription=transcription)
+    build_seconds = time.perf_counter() - started
+
+    latencies = []
+    for query in synthetic_queries(config['queries'], SEED):
+        started = time.perf_counter()
+        bot._context_items(query)
+        latencies.append(time.perf_counter() - started)
+    return {
+        'index_build_seconds': build_seconds,
+        'p50_ms': _percentile_ms(latencies, 50),
+        'p99_ms': _percentile_ms(latencies, 99),
+        'windows': len(bot.segment_index['windows'])
+    }
+
+
+CASES: Dict[str, Callable[[float, Dict], Dict]] = {
+    'startup': bench_startup,
+    'transcribe': bench_transcribe,
+    'summarize': bench_summarize,
+    'embed': bench_embed,
+    'retrieve': bench_retrieve,
+}
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def aggregate_runs(runs: List[Dict]) -> Dict:
+    """Median of each metric over `runs`; cold-start metrics from the first run only"""
+    return {
+        key: runs[0][key] if key in COLD_METRICS else statistics.median(run[key] for run in runs)
+        for key in runs[0]
+    }
+
+
+def _run_case(name: str, seconds: float, config: Dict, repeats: int) -> Dict:
+    """Run one case `repeats` times in this process and aggregate the runs"""
+    try:
+        runs = [CASES[name](seconds, config) for _ in range(repeats)]
+    except SkipBenchmark as e:
+        return {'skipped': str(e)}
+    result = aggregate_runs(runs)
+    result['peak_rss_mb'] = _peak_rss_mb()
+    return result
+
+
+def _child(connection, name: str, seconds: float, config: Dict, repeats: int):
+    try:
+        connection.send(_run_case(name, seconds, config, repeats))
+    except Exception as e:
+        connection.send({'error': repr(e)})
+    finally:
+        connection.close()
+
+
+def _run_isolated(name: str, seconds: float, config: Dict, repeats: int) -> Dict:
+    context = multiprocessing.get_context("spawn")
+    parent, child = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(child, name, seconds, config, repeats))
+    process.start()
+    child.close()
+    try:
+        result = parent.recv()
+    except EOFError:
+        result = {'error': f"benchmark process died (exit code {process.exitcode})"}
+    process.join()
+    return result
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def run_suite(
+    cases: List[str],
+    durations: List[float],
+    repeats: int = 3,
+    llm_latency: float = 0.2,
+    queries: int = 200,
+    whisper_model: str = "tiny",
+    whisper_workers: int = 1,
+    audio_seconds: Optional[List[float]] = None
+) -> Dict:
+    """
+    Run `cases` at every duration (transcription at `audio_seconds`, startup
+    once) and return the report
+    """
+    config = {
+        'llm_latency': llm_latency,
+        'queries': queries,
+        'whisper_model': whisper_model,
+        'whisper_workers': whisper_workers
+    }
+    results = {}
+    for name in cases:
+        results[name] = {}
+        if name == 'startup':
+            sizes = [0]
+        elif name == 'transcribe':
+            sizes = audio_seconds or durations[:1]
+        else:
+            sizes = durations
+        for seconds in sizes:
+            label = "app" if name == 'startup' else f"{int(seconds)}s"
+            print(f"{name} {label}...", flush=True)
+            results[name][label] = _run_isolated(name, seconds, config, repeats)
+    return {
+        'environment': environment(),
+        'config': {**config, 'repeats': repeats, 'seed': SEED},
+        'results': results
+    }
+
+
+def _compared(metric: str) -> bool:
+    return metric.endswith(COMPARED_SUFFIXES)
+
+
+def compare(baseline: Dict, current: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Metrics that got worse than the baseline by more than `tolerance` (relative)"""
+    regressions = []
+    for name, sizes in current['results'].items():
+        for label, metrics in sizes.items():
+            before = baseline.get('results', {}).get(name, {}).get(label, {})
+            for metric, value in metrics.items():
+                old = before.get(metric)
+                if not _compared(metric) or not isinstance(value, (int, float)) \
+                        or not isinstance(old, (int, float)) or old <= 0:
+                    continue
+                floor = next((v for suffix, v in NOISE_FLOORS.items() if metric.endswith(suffix)), 0.0)
+                change = (value - old) / old
+                worse = -change if metric in HIGHER_IS_BETTER else change
+                if worse > tolerance and abs(value - old) >= floor:
+                    regressions.append(f"{name} {label} {metric}: {old:.4g} -> {value:.4g} ({change:+.0%})")
+    return regressions
+
+
+def _print_report(report: Dict):
+    for name, sizes in report['results'].items():
+        for label, metrics in sizes.items():
+            if 'skipped' in metrics or 'error' in metrics:
+                print(f"{name:>10} {label:>7}  {metrics.get('skipped') or metrics.get('error')}")
+                continue
+            values = ", ".join(
+                f"{key}={value:.4g}" if isinstance(value, float) else f"{key}={value}"
+                for key, value in metrics.items()
+            )
+            print(f"{name:>10} {label:>7}  {values}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmarks")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--durations", nargs="+", type=float, default=None,
+                        help="transcript lengths in seconds (default 5 min, 1 h, 3 h)")
+    parser.add_argument("--quick", action="store_true", help="only the 5 minute inputs, one repeat")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.2,
+                        help="seconds the fake LLM server waits before each reply")
+    parser.add_argument("--queries", type=int, default=200, help="retrieval queries per input")
+    parser.add_argument("--whisper-model", default="tiny")
+    parser.add_argument("--whisper-workers", type=int, default=1)
+    parser.add_argument("--audio-seconds", nargs="+", type=float, default=None,
+                        help="synthetic audio lengths for transcription (default the shortest duration)")
+    parser.add_argument("-o", "--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="relative slowdown allowed before a metric counts as a regression")
+    args = parser.parse_args(argv)
+
+    durations = args.durations or list(QUICK_DURATIONS if args.quick else DEFAULT_DURATIONS)
+    report = run_suite(
+        args.cases,
+        durations,
+        repeats=1 if args.quick else args.repeats,
+        llm_latency=args.llm_latency,
+        queries=args.queries,
+        whisper_model=args.whisper_model,
+        whisper_workers=args.whisper_workers,
+        audio_seconds=args.audio_seconds
+    )
+    _print_report(report)
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Deterministic synthetic inputs for the benchmarks: transcripts, audio and
+queries of any length, generated from a seed so every run sees the same data.
+"""
+import hashlib
+from typing import Dict, List
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# Each topic draws most of its words from its own vocabulary, so topic-aware
+# code (sectioning, TextRank, retrieval) has real structure to find
+TOPICS = [
+    "attention transformer query key value head softmax layer token embedding",
+    "gradient descent learning rate momentum optimizer loss batch convergence step",
+    "database index query table join transaction lock replica shard partition",
+    "audio waveform sample frequency spectrum filter silence speech decoder codec",
+    "binary search sorted array pivot recursion logarithmic complexity heap tree",
+    "kitchen recipe flour butter oven dough bake sugar temperature minutes",
+    "network packet latency bandwidth router socket protocol handshake timeout retry",
+    "galaxy star planet orbit telescope gravity light spectrum distance mass",
+]
+FILLER = "the a and so we this that is of to in it you here now then what how really just".split()
+
+
+def synthetic_transcript(
+    seconds: float,
+    seed: int = 0,
+    segment_seconds: float = 5.0,
+    topic_seconds: float = 240.0,
+    words_per_second: float = 2.5
+) -> Dict:
+    """transcribe_audio-style result with word timestamps, topics changing every `topic_seconds`"""
+    rng = np.random.default_rng(seed)
+    vocabularies = [topic.split() for topic in TOPICS]
+    segments = []
+    start = 0.0
+    while start < seconds:
+        end = min(start + segment_seconds * rng.uniform(0.6, 1.4), seconds)
+        vocabulary = vocabularies[int(start // topic_seconds) % len(vocabularies)]
+        count = max(1, int((end - start) * words_per_second))
+        words = [
+            vocabulary[rng.integers(len(vocabulary))] if rng.random() < 0.45 else FILLER[rng.integers(len(FILLER))]
+            for _ in range(count)
+        ]
+        step = (end - start) / count
+        segments.append({
+            "text": " ".join(words),
+            "start": round(start, 3),
+            "end": round(end, 3),
+            "words": [
+                {"word": word, "start": round(start + i * step, 3), "end": round(start + (i + 1) * step, 3)}
+                for i, word in enumerate(words)
+            ]
+        })
+        start = end
+    return {
+        "text": " ".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": "en"
+    }
+
+
+def synthetic_summary(transcription: Dict, video_id: str, section_seconds: float = 180.0) -> Dict:
+    """Summary document with one section per `section_seconds` of the transcript"""
+    sections = []
+    for segment in transcription["segments"]:
+        if not sections or segment["start"] >= sections[-1]["start"] + section_seconds:
+            sections.append({"start": segment["start"], "end": segment["end"], "words": []})
+        sections[-1]["end"] = segment["end"]
+        sections[-1]["words"].extend(segment["text"].split()[:4])
+    return {
+        "metadata": {"video_id": video_id, "duration": transcription["segments"][-1]["end"]},
+        "sections": [
+            {"start": s["start"], "end": s["end"], "summary": " ".join(s["words"][:40])}
+            for s in sections
+        ]
+    }
+
+
+def synthetic_queries(count: int, seed: int = 0) -> List[str]:
+    rng = np.random.default_rng(seed + 1)
+    queries = []
+    for _ in range(count):
+        vocabulary = TOPICS[rng.integers(len(TOPICS))].split()
+        terms = [vocabulary[i] for i in rng.choice(len(vocabulary), size=3, replace=False)]
+        queries.append(f"what does the video say about {' '.join(terms)}?")
+    return queries
+
+
+def synthetic_audio(seconds: float, seed: int = 0, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Speech-like float32 audio: voiced bursts (a few harmonics of a drifting
+    pitch, amplitude-modulated at syllable rate) separated by short pauses,
+    over a low noise floor, so silence-aware chunking behaves as on speech.
+    """
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    audio = (rng.standard_normal(total) * 0.002).astype(np.float32)
+    position = 0
+    while position < total:
+        length = min(int(rng.uniform(1.0, 4.0) * sample_rate), total - position)
+        t = np.arange(length, dtype=np.float32) / sample_rate
+        pitch = rng.uniform(100, 220) * (1 + 0.05 * np.sin(2 * np.pi * 0.5 * t))
+        phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+        voiced = sum(np.sin(k * phase) / k for k in (1, 2, 3, 4))
+        envelope = 0.5 * (1 - np.cos(2 * np.pi * rng.uniform(3, 5) * t))
+        audio[position:position + length] += (0.1 * voiced * envelope).astype(np.float32)
+        position += length + int(rng.uniform(0.2, 0.8) * sample_rate)
+    return audio
+
+
+class HashingEncoder:
+    """
+    SentenceTransformer stand-in: hashed bag of words, L2-normalized. Used
+    for retrieval benchmarks so their timings do not depend on which (if
+    any) embedding model is installed.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def encode(self, texts, normalize_embeddings=True):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                digest = hashlib.md5(word.encode("utf-8")).digest()
+                vectors[row, int.from_bytes(digest[:4], "little") % self.dim] += 1.0
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+        return vectors
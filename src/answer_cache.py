@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    Reuses answers to near-identical questions about the same video.
+
+    Entries are keyed by video id and a `context_key` describing the
+    conversation so far (empty for a fresh conversation); a lookup hits when
+    the query embedding's cosine similarity to a stored question reaches
+    `threshold`. Entries expire after `ttl_seconds`, each video keeps at most
+    `max_entries_per_video` (least recently used dropped first) and at most
+    `max_videos` videos are kept.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        ttl_seconds: float = 24 * 3600,
+        max_entries_per_video: int = 256,
+        max_videos: int = 512
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_video = max_entries_per_video
+        self.max_videos = max_videos
+        self.hits = 0
+        self.misses = 0
+        self._videos: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live_entries(self, video_id: str, now: float) -> List[Dict]:
+        entries = [e for e in self._videos.get(video_id, []) if now - e['created'] < self.ttl_seconds]
+        if video_id in self._videos:
+            self._videos[video_id] = entries
+        return entries
+
+    def lookup(self, video_id: str, query_vector: np.ndarray, context_key: str = "") -> Optional[str]:
+        with self._lock:
+            now = time.time()
+            entries = [e for e in self._live_entries(video_id, now) if e['context_key'] == context_key]
+            if entries:
+                similarities = np.stack([e['vector'] for e in entries]) @ query_vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    entries[best]['last_used'] = now
+                    self._videos.move_to_end(video_id)
+                    self.hits += 1
+                    return entries[best]['answer']
+            self.misses += 1
+            return None
+
+    def store(self, video_id: str, query_vector: np.ndarray, context_key: str, answer: str):
+        with self._lock:
+            now = time.time()
+            entries = self._live_entries(video_id, now)
+            entries.append({
+                'vector': np.asarray(query_vector, dtype=np.float32),
+                'context_key': context_key,
+                'answer': answer,
+                'created': now,
+                'last_used': now
+            })
+            if len(entries) > self.max_entries_per_video:
+                entries.sort(key=lambda e: e['last_used'])
+                del entries[:len(entries) - self.max_entries_per_video]
+            self._videos[video_id] = entries
+            self._videos.move_to_end(video_id)
+            while len(self._videos) > self.max_videos:
+                self._videos.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': sum(len(e) for e in self._videos.values())
+            }
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """Process-wide answer cache shared by every assistant"""
+    global _answer_cache
+    with _answer_cache_lock:
+        if _answer_cache is None:
+            _answer_cache = SemanticAnswerCache(
+                threshold=float(os.getenv('ANSWER_CACHE_THRESHOLD', '0.92')),
+                ttl_seconds=float(os.getenv('ANSWER_CACHE_TTL', str(24 * 3600)))
+            )
+        return _answer_cache
@@ -1,11 +1,37 @@
 import os
-import json
+import threading
+import time
 import streamlit as st
 from datetime import timedelta
-from youtube_fetcher import download_video_audio, get_video_metadata
-from transcription import transcribe_audio
-from summarization import YouTubeSummarizer
+# Streamlit re-runs this script on every interaction and nothing renders until
+# its imports finish: keep them light. torch/whisper, sentence-transformers
+# and openai are imported by these modules on first use, and pytubefix
+# (youtube_fetcher) only once a video is submitted.
+from transcription import transcribe_audio_stream, transcribe_pcm_stream, warm_up_whisper
+from audio_stream import DEFAULT_DOWNLOADS_MAX_BYTES, decode_audio_stream, enforce_disk_quota, spill_file
+from summarization import YouTubeSummarizer, is_degraded
 from assistant import VideoAssistant
+from pipeline_cache import PipelineCache, DEFAULT_MAX_BYTES
+from transcript_store import get_transcript, put_transcript
+from library_index import LibraryIndex, create_youtube_timestamp_link
+from jobs import JobQueue, WorkerPool, pipeline_params
+from metrics import configure_json_logging, start_metrics_server
+
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "small")
+WHISPER_WORKERS = int(os.getenv("WHISPER_WORKERS", "1"))
+# Run the pipeline in background worker processes instead of the script run
+BACKGROUND_JOBS = os.getenv("BACKGROUND_JOBS", "0") == "1"
+# Decode audio while it downloads; SPILL_AUDIO also keeps a copy in the cache
+STREAM_AUDIO = os.getenv("STREAM_AUDIO", "1") == "1"
+SPILL_AUDIO = os.getenv("SPILL_AUDIO", "1") == "1"
+# Use the video's captions instead of Whisper: "any", "manual" or "off"
+CAPTION_POLICY = os.getenv("CAPTION_POLICY", "any")
+# Prometheus /metrics port (0 disables) and JSON-lines stage logs on stderr
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_JSON_LOGS = os.getenv("METRICS_JSON_LOGS", "0") == "1"
+DOWNLOADS_MAX_BYTES = int(os.getenv("DOWNLOADS_MAX_BYTES", str(DEFAULT_DOWNLOADS_MAX_BYTES)))
+# Seconds before cached video metadata (title, views) is fetched again
+METADATA_TTL = float(os.getenv("METADATA_TTL", str(24 * 3600)))
 
 # Configure page
 st.set_page_config(
@@ -50,42 +76,67 @@ def format_timestamp(seconds: float) -> str:
     """Convert seconds to HH:MM:SS format"""
     return str(timedelta(seconds=int(seconds))).split(".")[0]
 
-def create_youtube_timestamp_link(video_id: str, seconds: int) -> str:
-    """Create YouTube link with timestamp"""
-    return f"https://youtu.be/{video_id}?t={int(seconds)}"
-
 def display_summary(summary: dict, video_id: str):
     """Render summary in Streamlit with formatted sections"""
     st.subheader("📝 Video Summary")
     st.caption(f"Duration: {format_timestamp(summary['metadata']['duration'])} | "
                f"Sections: {len(summary['sections'])}")
     
-    for section in summary['sections']:
+    overview = summary.get('overview')
+    if overview and len(summary['sections']) > 1:
         with st.container():
-            # Create clickable timestamp
-            timestamp_link = create_youtube_timestamp_link(
-                video_id,
-                section['start']
-            )
-            
-            st.markdown(f"""
-            ### <a href="{timestamp_link}" class="timestamp-link" target="_blank">
-            🕒 {format_timestamp(section['start'])} - {section.get('title', 'Section')}
-            </a>
-            """, unsafe_allow_html=True)
-            
-            col1, col2 = st.columns([1, 4])
-            with col1:
-                st.metric("Duration", format_timestamp(section['end'] - section['start']))
-            
-            with col2:
-                clean_summary = "\n".join(
-                    line for line in section['summary'].split('\n')
-                    if not line.lower().startswith("here is the summary")
-                )
-                st.markdown(clean_summary)
-        
+            st.markdown("#### 🧭 Overview")
+            st.markdown(overview['summary'])
+        if summary.get('chapters'):
+            with st.expander(f"📚 Chapters ({len(summary['chapters'])})"):
+                for chapter in summary['chapters']:
+                    link = create_youtube_timestamp_link(video_id, chapter['start'])
+                    st.markdown(f"**[{format_timestamp(chapter['start'])}]({link})**")
+                    st.markdown(chapter['summary'])
         st.divider()
+    
+    for section in summary['sections']:
+        display_section(section, video_id)
+
+def display_section(section: dict, video_id: str):
+    """Render a single summary section"""
+    with st.container():
+        # Create clickable timestamp
+        timestamp_link = create_youtube_timestamp_link(
+            video_id,
+            section['start']
+        )
+        
+        st.markdown(f"""
+        ### <a href="{timestamp_link}" class="timestamp-link" target="_blank">
+        🕒 {format_timestamp(section['start'])} - {section.get('title', 'Section')}
+        </a>
+        """, unsafe_allow_html=True)
+        
+        col1, col2 = st.columns([1, 4])
+        with col1:
+            st.metric("Duration", format_timestamp(section['end'] - section['start']))
+        
+        with col2:
+            clean_summary = "\n".join(
+                line for line in section['summary'].split('\n')
+                if not line.lower().startswith("here is the summary")
+            )
+            st.markdown(clean_summary)
+    
+    st.divider()
+
+def moment_search(assistant: VideoAssistant):
+    """Find the exact moments a word or phrase is said in the video"""
+    phrase = st.text_input("🎯 Jump to where something is said", placeholder="e.g. positional encoding",
+                           key="moment_query")
+    if not phrase:
+        return
+    moments = assistant.find_moments(phrase)
+    if not moments:
+        st.caption("Not found in the transcript")
+    for moment in moments:
+        st.markdown(f"[{format_timestamp(moment['start'])}]({moment['link']}) — {moment['text'][:160]}")
 
 def chat_interface(assistant: VideoAssistant):
     """Display chat interface"""
@@ -109,24 +160,226 @@ def chat_interface(assistant: VideoAssistant):
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # Get assistant response
-        with st.spinner("Thinking..."):
-            response = assistant.generate_response(prompt)
-        
-        # Display assistant response
+        # Stream assistant response as it is generated
         with st.chat_message("assistant"):
-            st.markdown(response)
+            response = st.write_stream(assistant.generate_response_stream(prompt))
+            stats = assistant.last_response_stats
+            if stats:
+                st.caption(f"⚡ first token {stats['time_to_first_token']:.2f}s · "
+                           f"{stats['tokens_per_second']:.0f} tokens/s")
+            exact = [c for c in assistant.last_citations if c['exact']]
+            if exact and assistant.video_id:
+                st.caption("🎯 Jump to: " + " · ".join(
+                    f"[{format_timestamp(c['start'])}]({create_youtube_timestamp_link(assistant.video_id, c['start'])})"
+                    for c in sorted(exact, key=lambda c: c['start'])
+                ))
         
         # Add assistant response to chat history
         st.session_state.messages.append({"role": "assistant", "content": response})
 
-def extract_video_id(url: str) -> str:
-    """Extract video ID from URL"""
-    if "youtu.be/" in url:
-        return url.split("youtu.be/")[1].split("?")[0]
-    elif "v=" in url:
-        return url.split("v=")[1].split("&")[0]
-    return url
+@st.cache_resource
+def warm_up_models() -> threading.Thread:
+    """
+    Load the Whisper model once per process, in the background so the page
+    renders meanwhile; a video submitted early waits on the same load.
+    """
+    thread = threading.Thread(
+        target=warm_up_whisper, args=([WHISPER_MODEL_SIZE],), name="whisper-warm-up", daemon=True
+    )
+    thread.start()
+    return thread
+
+@st.cache_resource
+def get_summarizer() -> YouTubeSummarizer:
+    """Summarizer (LLM client and rate limiter) shared by every session in the process"""
+    return YouTubeSummarizer()
+
+@st.cache_resource
+def start_instrumentation():
+    """Metrics endpoint and JSON logs, set up once per process"""
+    if METRICS_JSON_LOGS:
+        configure_json_logging()
+    return start_metrics_server(METRICS_PORT) if METRICS_PORT else None
+
+@st.cache_resource
+def get_pipeline_cache() -> PipelineCache:
+    """Stage cache shared by every session in the process"""
+    return PipelineCache(
+        max_bytes=int(os.getenv("PIPELINE_CACHE_MAX_BYTES", str(DEFAULT_MAX_BYTES)))
+    )
+
+@st.cache_resource
+def get_library() -> LibraryIndex:
+    """Cross-video index shared by every session in the process"""
+    return LibraryIndex()
+
+@st.cache_resource
+def get_worker_pool() -> WorkerPool:
+    """Stage worker processes, started once per server"""
+    return WorkerPool(
+        cache_max_bytes=int(os.getenv("PIPELINE_CACHE_MAX_BYTES", str(DEFAULT_MAX_BYTES)))
+    ).start()
+
+def get_job_queue() -> JobQueue:
+    return get_worker_pool().queue
+
+def get_assistant() -> VideoAssistant:
+    """This session's assistant, created on first use rather than on first paint"""
+    if "assistant" not in st.session_state:
+        st.session_state.assistant = VideoAssistant(cache=get_pipeline_cache())
+    return st.session_state.assistant
+
+def activate_summary(summary: dict, transcription: dict = None):
+    """Show a finished summary in this session and add it to the library"""
+    st.session_state.summary = summary
+    get_assistant().load_summary(summary, transcription=transcription)
+    
+    library = get_library()
+    if summary['metadata']['video_id'] not in library:
+        library.add(summary['metadata']['video_id'], *get_assistant().library_entries())
+        # Retraining the IVF lists takes a while on a large library; keep it off this script run
+        library.maybe_build(background=True)
+
+def poll_job():
+    """Show progress of this session's background job; rerun until it finishes"""
+    job_id = st.session_state.get("job_id")
+    if not job_id:
+        return
+    job = get_job_queue().get(job_id)
+    
+    if job['status'] == 'failed':
+        st.error(f"Processing failed: {job['error']}")
+        st.session_state.job_id = None
+    elif job['status'] == 'done':
+        st.session_state.job_id = None
+        cache = get_pipeline_cache()
+        summary = cache.get(job['video_id'], "summary", job['params']['summary'])
+        if not summary:
+            st.error("Summary missing from cache")
+            return
+        activate_summary(summary, get_transcript(cache, job['video_id'], job['params']['transcript']))
+        st.rerun()
+    else:
+        step = f"{job['stage'].capitalize()} ({job['status']})"
+        st.progress(job['progress'], text=f"{step} {job['message']}")
+        time.sleep(1)
+        st.rerun()
+
+def library_search():
+    """Sidebar search across every processed video"""
+    library = get_library()
+    with st.sidebar:
+        st.subheader("🔎 Search your library")
+        st.caption(f"{len(library.videos)} videos indexed")
+        query = st.text_input("Search all processed videos", key="library_query")
+        if not query:
+            return
+        for hit in library.search(get_assistant().embeddings.encode_query(query), k=8):
+            st.markdown(
+                f"[{hit['video_id']} @ {format_timestamp(hit['start'])}]({hit['link']}) "
+                f"— {hit['text'][:160]}"
+            )
+
+def run_pipeline(
+    youtube_url: str,
+    video_id: str,
+    cache: PipelineCache,
+    summarizer: YouTubeSummarizer,
+    transcript_params: dict,
+    summary_params: dict
+):
+    """
+    Download, transcribe and summarize, resuming from the last cached stage.
+    Returns (summary, transcription), or (None, None) on failure.
+    """
+    from youtube_fetcher import download_video_audio, fetch_captions, open_audio_stream
+    
+    transcription = get_transcript(cache, video_id, transcript_params)
+    segments = []
+    transcript_info = {}
+    
+    if transcription:
+        st.write("⚡ Loaded transcript from cache")
+        segment_source = iter(transcription["segments"])
+    elif CAPTION_POLICY != "off" and (transcription := fetch_captions(youtube_url, policy=CAPTION_POLICY)):
+        st.write(f"📝 Using the video's captions ({transcription['source']}) instead of Whisper")
+        transcription = put_transcript(cache, video_id, transcript_params, transcription)
+        segment_source = iter(transcription["segments"])
+    else:
+        # Step 2: Download audio, or stream it straight into the transcriber
+        audio_path = cache.get_file(video_id, "audio")
+        byte_stream = open_audio_stream(youtube_url) if STREAM_AUDIO and not audio_path else None
+        if byte_stream:
+            st.write("📡 Streaming audio...")
+        elif not audio_path:
+            st.write("⬇️ Downloading audio...")
+            downloaded = download_video_audio(youtube_url)
+            if not downloaded:
+                st.error("Failed to download audio")
+                return None, None
+            audio_path = cache.put_file(video_id, "audio", None, downloaded)
+        
+        transcribe_args = dict(
+            model_size=WHISPER_MODEL_SIZE,
+            timestamp_resolution="word",
+            workers=WHISPER_WORKERS,
+            info=transcript_info
+        )
+        
+        def streamed_segments():
+            with spill_file() as spill_path:
+                pcm = decode_audio_stream(byte_stream, spill_path=spill_path if SPILL_AUDIO else None)
+                yield from transcribe_pcm_stream(pcm, **transcribe_args)
+                if SPILL_AUDIO:
+                    # Keep the audio so re-runs (e.g. another model size) skip the download
+                    cache.put_file(video_id, "audio", None, spill_path)
+        
+        def collect_segments():
+            source = streamed_segments() if byte_stream else transcribe_audio_stream(audio_path, **transcribe_args)
+            for segment in source:
+                segments.append(segment)
+                yield segment
+        
+        segment_source = collect_segments()
+    
+    # Step 3 + 4: Transcribe and summarize each section as it completes
+    st.write("🎤 Transcribing audio and 🧠 summarizing sections as they complete...")
+    section_summaries = []
+    slots = {}
+    
+    def show_draft(draft):
+        # Extractive draft shown right away, replaced once the LLM summary lands
+        slots[draft['start']] = st.empty()
+        with slots[draft['start']].container():
+            display_section(draft, video_id)
+            st.caption("Draft summary, refining...")
+    
+    for section_summary in summarizer.generate_summary_stream(segment_source, on_draft=show_draft):
+        section_summaries.append(section_summary)
+        slot = slots.pop(section_summary['start'], None) or st.empty()
+        with slot.container():
+            display_section(section_summary, video_id)
+    
+    if not transcription:
+        if not segments:
+            st.error("Transcription produced no segments")
+            return None, None
+        # Kept (for the assistant) in columnar form rather than as per-word dicts
+        transcription = put_transcript(cache, video_id, transcript_params, {
+            "segments": segments,
+            "language": transcript_info.get("language", "en")
+        })
+    
+    summary = summarizer.build_summary(section_summaries, transcription["language"])
+    summary['metadata']['video_id'] = video_id
+    
+    st.write("📚 Merging sections into chapters and an overview...")
+    summary = summarizer.generate_hierarchical_summary(summary, cache=cache)
+    cache.put(video_id, "summary", summary_params, summary)
+    # Unkeyed copy is what VideoAssistant.load_summary(video_id=...) reads
+    cache.put(video_id, "summary", None, summary)
+    enforce_disk_quota(cache, max_bytes=DOWNLOADS_MAX_BYTES)
+    return summary, transcription
 
 def main():
     st.title("🎥 YouTube AI Assistant")
@@ -138,13 +391,15 @@ def main():
     4. Interactive Q&A about the video
     """)
     
+    start_instrumentation()
+    if not BACKGROUND_JOBS:
+        warm_up_models()
+    
     # Initialize session state
     if "processing_stage" not in st.session_state:
         st.session_state.processing_stage = None
     if "summary" not in st.session_state:
         st.session_state.summary = None
-    if "assistant" not in st.session_state:
-        st.session_state.assistant = VideoAssistant()
     
     # Input section
     with st.form("youtube_form"):
@@ -156,13 +411,19 @@ def main():
     
     if submitted and youtube_url:
         try:
+            from youtube_fetcher import extract_video_id, get_video_metadata
             video_id = extract_video_id(youtube_url)
             
             # Processing pipeline
             with st.status("Processing video...", expanded=True) as status:
                 # Step 1: Fetch metadata
                 st.write("🔍 Fetching video metadata...")
-                metadata = get_video_metadata(youtube_url)
+                cache = get_pipeline_cache()
+                metadata = cache.get_or_compute(
+                    video_id, "metadata", None,
+                    lambda: get_video_metadata(youtube_url),
+                    max_age=METADATA_TTL
+                )
                 
                 if not metadata:
                     st.error("Couldn't fetch video metadata")
@@ -178,56 +439,56 @@ def main():
                     st.caption(f"👤 {metadata['author']} | ⏱️ {format_timestamp(metadata['length'])} | "
                               f"👀 {metadata['views']:,} views")
                 
-                # Step 2: Download audio
-                st.write("⬇️ Downloading audio...")
-                audio_path = download_video_audio(youtube_url)
-                if not audio_path:
-                    st.error("Failed to download audio")
-                    return
+                summarizer = get_summarizer()
+                params = pipeline_params(WHISPER_MODEL_SIZE, summarizer, CAPTION_POLICY)
+                transcript_params, summary_params = params["transcript"], params["summary"]
+                summary = cache.get(video_id, "summary", summary_params)
+                if summary and is_degraded(summary):
+                    # Some sections fell back to extractive summaries; try the LLM again
+                    summary = None
+                transcription = None
                 
-                # Step 3: Transcribe
-                st.write("🎤 Transcribing audio...")
-                transcription = transcribe_audio(
-                    audio_path,
-                    model_size="small",
-                    timestamp_resolution="word"
-                )
+                if summary:
+                    st.write("⚡ Loaded summary from cache")
+                    # Memory-mapped; gives the assistant word-level search
+                    transcription = get_transcript(cache, video_id, transcript_params)
+                elif BACKGROUND_JOBS:
+                    st.session_state.job_id = get_job_queue().submit(
+                        video_id, youtube_url, {**params, "length": metadata['length']}
+                    )
+                    status.update(label="Queued for processing", state="running", expanded=False)
+                else:
+                    summary, transcription = run_pipeline(
+                        youtube_url, video_id, cache, summarizer,
+                        transcript_params, summary_params
+                    )
+                    if not summary:
+                        return
                 
-                if "error" in transcription:
-                    st.error(f"Transcription failed: {transcription['error']}")
-                    return
-                
-                # Step 4: Summarize
-                st.write("🧠 Generating summary...")
-                summarizer = YouTubeSummarizer()
-                summary = summarizer.generate_summary(transcription)
-                summary['metadata']['video_id'] = video_id
-                
-                # Save summary
-                os.makedirs("downloads", exist_ok=True)
-                with open("downloads/latest_summary.json", "w") as f:
-                    json.dump(summary, f)
-                
-                # Update session state
-                st.session_state.summary = summary
-                st.session_state.assistant.load_summary()
-                
-                status.update(label="Processing complete!", state="complete", expanded=False)
+                if summary:
+                    activate_summary(summary, transcription)
+                    status.update(label="Processing complete!", state="complete", expanded=False)
             
             # Display results
-            st.success("✅ Video processed successfully!")
+            if summary:
+                st.success("✅ Video processed successfully!")
             
         except Exception as e:
             st.error(f"An error occurred: {str(e)}")
             st.stop()
     
+    library_search()
+    
     # Display summary if available
     if st.session_state.summary:
         display_summary(
             st.session_state.summary,
             st.session_state.summary['metadata']['video_id']
         )
-        chat_interface(st.session_state.assistant)
+        moment_search(get_assistant())
+        chat_interface(get_assistant())
+    
+    poll_job()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
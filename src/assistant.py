@@ -1,36 +1,139 @@
-import json
+import hashlib
 import os
-from typing import List, Dict
-from openai import OpenAI
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, List, Dict, Optional, Tuple
 from dotenv import load_dotenv
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from datetime import timedelta
+from pipeline_cache import PipelineCache
+from embeddings import EMBEDDING_MODEL, EmbeddingCache, get_embedding_cache
+from vector_index import SEGMENT_WINDOW_SECONDS, VectorIndex, build_segment_windows, top_k_indices
+from lexical_index import BM25Index, reciprocal_rank_fusion
+from phrase_index import PhraseIndex
+from library_index import create_youtube_timestamp_link
+from llm_client import call_with_retry, create_groq_client
+from prompt_budget import PromptBuilder
+from answer_cache import SemanticAnswerCache, get_answer_cache
+from metrics import log_event, registry, timed
 
 load_dotenv()
+MAX_LOADED_VIDEOS = int(os.getenv('MAX_LOADED_VIDEOS', '16'))
+QUANTIZE_SEGMENT_INDEX = os.getenv('QUANTIZE_SEGMENT_INDEX', '0') == '1'
+
+# video_id -> {'summary', 'section_embeddings', 'segment_index', 'phrase_index'}, shared by every
+# assistant in the process so a video is only embedded once
+_loaded_videos: "OrderedDict[str, Dict]" = OrderedDict()
+_loaded_videos_lock = threading.Lock()
+
+
+def _get_loaded_video(video_id: str) -> Optional[Dict]:
+    with _loaded_videos_lock:
+        entry = _loaded_videos.get(video_id)
+        if entry is not None:
+            _loaded_videos.move_to_end(video_id)
+        return entry
+
+
+def _register_loaded_video(video_id: str, entry: Dict):
+    with _loaded_videos_lock:
+        _loaded_videos[video_id] = entry
+        _loaded_videos.move_to_end(video_id)
+        while len(_loaded_videos) > MAX_LOADED_VIDEOS:
+            _loaded_videos.popitem(last=False)
+
 
 class VideoAssistant:
-    def __init__(self, top_k=3):
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.groq_client = OpenAI(
-            api_key=os.getenv('GROQ_API_KEY'),
-            base_url="https://api.groq.com/openai/v1"
-        ) if os.getenv('GROQ_API_KEY') else None
+    def __init__(
+        self,
+        top_k=3,
+        top_k_segments=5,
+        cache: Optional[PipelineCache] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        prompt_builder: Optional[PromptBuilder] = None,
+        max_history_turns: int = 20,
+        answer_cache: Optional[SemanticAnswerCache] = None
+    ):
+        # Encoder and embeddings are shared by every assistant in the process
+        self.embeddings = embedding_cache or get_embedding_cache(EMBEDDING_MODEL)
+        self.cache = cache
+        self.answer_cache = answer_cache or get_answer_cache()
+        self.groq_client = create_groq_client(os.getenv('GROQ_API_KEY'))
         self.summary = None
+        self.video_id = None
         self.section_embeddings = None
-        self.summary_path = "downloads/latest_summary.json"
+        self.segment_index = None
+        self.phrase_index = None
         self.conversation_history = []
+        self.history_summary = ""
+        self.max_history_turns = max_history_turns
+        self.prompt_builder = prompt_builder or PromptBuilder(
+            max_context_tokens=int(os.getenv('CHAT_CONTEXT_TOKENS', '1800')),
+            max_history_tokens=int(os.getenv('CHAT_HISTORY_TOKENS', '800'))
+        )
         self.top_k = top_k
+        self.top_k_segments = top_k_segments
+        self.last_response_stats = None
+        self.last_citations = []
         
-    def load_summary(self):
-        """Load the latest summary and prepare embeddings"""
-        if not os.path.exists(self.summary_path):
-            raise FileNotFoundError("No summary file found")
+    def load_summary(
+        self,
+        summary: Optional[Dict] = None,
+        video_id: Optional[str] = None,
+        transcription: Optional[Dict] = None
+    ):
+        """
+        Point the assistant at a video and prepare its embeddings.
+
+        Pass the summary itself, or the id of a video that is already loaded
+        in this process or stored in the pipeline cache; one of the two is
+        required. Passing the transcription (or
+        having its index in the pipeline cache) enables segment-level retrieval;
+        the transcription also enables word-level phrase search and citations.
+        """
+        if summary is not None:
+            video_id = summary.get('metadata', {}).get('video_id')
+        elif not video_id:
+            raise ValueError("No video to load: pass a summary or a video_id")
+        
+        entry = _get_loaded_video(video_id) if video_id else None
+        if entry is not None and (summary is None or entry['summary'] == summary) \
+                and (transcription is None or entry['phrase_index'] is not None):
+            self._activate(video_id, entry)
+            return
         
-        with open(self.summary_path, 'r') as f:
-            self.summary = json.load(f)
+        if summary is None:
+            summary = self._read_summary(video_id)
         
+        self.summary = summary
         self._prepare_embeddings()
+        entry = {
+            'summary': self.summary,
+            'section_embeddings': self.section_embeddings,
+            'segment_index': self._prepare_segment_index(video_id, transcription),
+            'phrase_index': PhraseIndex.from_transcription(transcription) if transcription else None
+        }
+        if video_id:
+            _register_loaded_video(video_id, entry)
+        self._activate(video_id, entry)
+    
+    def _read_summary(self, video_id: str) -> Dict:
+        summary = self.cache.get(video_id, "summary") if self.cache else None
+        if summary is None:
+            raise FileNotFoundError(f"No summary found for video {video_id}")
+        return summary
+    
+    def _activate(self, video_id: Optional[str], entry: Dict):
+        if video_id != self.video_id:
+            # Conversation history belongs to the previous video
+            self.conversation_history = []
+            self.history_summary = ""
+        self.video_id = video_id
+        self.summary = entry['summary']
+        self.section_embeddings = entry['section_embeddings']
+        self.segment_index = entry['segment_index']
+        self.phrase_index = entry['phrase_index']
     
     def _prepare_embeddings(self):
         """Prepare embeddings for each section"""
@@ -46,63 +149,293 @@ class VideoAssistant:
         texts = [s['text'] for s in sections]
         self.section_embeddings = {
             'texts': texts,
-            'embeddings': self.model.encode(texts, normalize_embeddings=True),
+            'embeddings': self.embeddings.encode(texts),
             'sections': sections
         }
     
-    def _find_relevant_sections(self, query: str) -> List[Dict]:
-        """Find top_k most relevant sections using cosine similarity"""
+    def _prepare_segment_index(self, video_id: Optional[str], transcription: Optional[Dict]) -> Optional[Dict]:
+        """
+        Build (or load from the pipeline cache) the retrieval index over
+        transcript windows. Cached vectors are memory-mapped, not re-encoded.
+        """
+        params = {
+            'model': self.embeddings.model_name,
+            'window_seconds': SEGMENT_WINDOW_SECONDS,
+            'quantize': QUANTIZE_SEGMENT_INDEX
+        }
+        windows = build_segment_windows(transcription['segments']) if transcription else None
+        
+        if self.cache and video_id:
+            stored_windows = self.cache.get(video_id, "segment_windows", params)
+            if stored_windows and (windows is None or stored_windows == windows):
+                arrays = {
+                    name: self.cache.get_array(video_id, f"segment_index_{name}", params, mmap_mode='r')
+                    for name in (('codes', 'scales') if QUANTIZE_SEGMENT_INDEX else ('vectors',))
+                }
+                if all(a is not None for a in arrays.values()):
+                    return {
+                        'windows': stored_windows,
+                        'index': VectorIndex.from_arrays(arrays),
+                        'bm25': self._prepare_bm25(video_id, stored_windows)
+                    }
+        
+        if not windows:
+            return None
+        
+        index = VectorIndex.build(
+            self.embeddings.encode([w['text'] for w in windows]),
+            quantize=QUANTIZE_SEGMENT_INDEX
+        )
+        if self.cache and video_id:
+            for name, array in index.arrays().items():
+                self.cache.put_array(video_id, f"segment_index_{name}", params, array)
+            self.cache.put(video_id, "segment_windows", params, windows)
+        return {'windows': windows, 'index': index, 'bm25': self._prepare_bm25(video_id, windows)}
+    
+    def _prepare_bm25(self, video_id: Optional[str], windows: List[Dict]) -> BM25Index:
+        """
+        Lexical index over the same windows, stored alongside the vectors and
+        keyed by the window texts, so a re-transcribed video gets new postings
+        """
+        texts = hashlib.sha256("\0".join(w['text'] for w in windows).encode("utf-8")).hexdigest()
+        params = {'window_seconds': SEGMENT_WINDOW_SECONDS, 'texts': texts}
+        if self.cache and video_id:
+            stored = self.cache.get(video_id, "segment_bm25", params)
+            if stored:
+                return BM25Index.from_dict(stored)
+        
+        bm25 = BM25Index()
+        for window in windows:
+            bm25.add(window['text'])
+        if self.cache and video_id:
+            self.cache.put(video_id, "segment_bm25", params, bm25.to_dict())
+        return bm25
+    
+    def _ensure_loaded(self):
         if not self.section_embeddings:
-            self.load_summary()
+            self.load_summary(video_id=self.video_id)
+    
+    def _find_relevant_sections(self, query: str, query_embedding: Optional[np.ndarray] = None) -> List[Dict]:
+        """Find top_k most relevant sections using cosine similarity"""
+        self._ensure_loaded()
         
-        query_embedding = self.model.encode(query, normalize_embeddings=True)
+        if query_embedding is None:
+            query_embedding = self.embeddings.encode_query(query)
         similarities = np.dot(self.section_embeddings['embeddings'], query_embedding)
-        top_indices = np.argsort(similarities)[-self.top_k:][::-1]
+        top_indices = top_k_indices(similarities, self.top_k)
         
         return [self.section_embeddings['sections'][i] for i in top_indices]
     
+    def _find_relevant_segments(self, query: str, query_embedding: Optional[np.ndarray] = None) -> List[Dict]:
+        """
+        Find the transcript windows most relevant to the query, best first,
+        fusing dense (cosine) and lexical (BM25) rankings with reciprocal rank
+        fusion so exact names, identifiers and numbers are not missed.
+        """
+        self._ensure_loaded()
+        if not self.segment_index:
+            return []
+        
+        if query_embedding is None:
+            query_embedding = self.embeddings.encode_query(query)
+        candidates = self.top_k_segments * 4
+        dense_ids, _ = self.segment_index['index'].search(query_embedding, candidates)
+        lexical_ids, _ = self.segment_index['bm25'].search(query, candidates)
+        fused = reciprocal_rank_fusion([dense_ids, lexical_ids])[:self.top_k_segments]
+        return [self.segment_index['windows'][i] for i in fused]
+    
+    def library_entries(self) -> Tuple[np.ndarray, List[Dict]]:
+        """Vectors and records of the loaded video for LibraryIndex.add"""
+        self._ensure_loaded()
+        vectors = [self.section_embeddings['embeddings']]
+        records = [
+            {'start': s['start'], 'end': s['end'], 'text': s['text'], 'kind': 'section'}
+            for s in self.section_embeddings['sections']
+        ]
+        if self.segment_index:
+            vectors.append(self.segment_index['index'].dense())
+            records.extend(
+                {'start': w['start'], 'end': w['end'], 'text': w['text'], 'kind': 'segment'}
+                for w in self.segment_index['windows']
+            )
+        return np.vstack(vectors), records
+    
     def _build_context(self, sections: List[Dict]) -> str:
         return "\n\n".join(
             f"[From {format_timestamp(s['start'])} to {format_timestamp(s['end'])}]: {s['text']}"
             for s in sections
         )
     
-    def generate_response(self, query: str) -> str:
-        """Generate response using RAG + conversation history"""
-        try:
-            relevant_sections = self._find_relevant_sections(query)
-            context = self._build_context(relevant_sections)
-
-            self.conversation_history.append({"role": "user", "content": query})
-            
-            system_prompt = (
-                "You are a highly knowledgeable AI assistant helping users understand a YouTube video."
-                " Use the provided sections and conversation history to answer clearly, cite timestamps if useful."
-                " If you don't have enough info, say you don't know."
-            )
-            
-            messages = [{"role": "system", "content": system_prompt}]
-            messages.extend(self.conversation_history[-6:])  # Keep conversation history
-            messages.append({
-                "role": "user",
-                "content": f"Video Context:\n{context}\n\nAnswer based on the context: {query}"
+    def find_moments(self, phrase: str, limit: int = 20) -> List[Dict]:
+        """
+        Exact moments where `phrase` is spoken in the loaded video, in order:
+        'start'/'end' of the words, the surrounding transcript 'text' and a
+        'link' that jumps to that second.
+        """
+        if self.phrase_index is None:
+            return []
+        windows = self.segment_index['windows'] if self.segment_index else []
+        window_starts = [w['segment_range'][0] for w in windows]
+        moments = []
+        for match in self.phrase_index.search(phrase, limit=limit):
+            window = int(np.searchsorted(window_starts, match['segment'], side='right')) - 1
+            moments.append({
+                **match,
+                'text': windows[window]['text'] if window >= 0 else "",
+                'link': create_youtube_timestamp_link(self.video_id, match['start']) if self.video_id else None
             })
+        return moments
+    
+    def _context_item(self, label: str, span: Dict, query: str) -> Tuple[str, Dict]:
+        """Prompt line for a retrieved section or excerpt, and its citation"""
+        moment = self.phrase_index.locate(query, span['start'], span['end']) if self.phrase_index else None
+        spoken = f", spoken at {format_timestamp(moment)}" if moment is not None else ""
+        item = f"[{label} {format_timestamp(span['start'])} to {format_timestamp(span['end'])}{spoken}]: {span['text']}"
+        citation = {'start': span['start'] if moment is None else moment, 'end': span['end'], 'exact': moment is not None}
+        return item, citation
+    
+    def _context_items(self, query: str) -> List[str]:
+        """
+        Section summaries and transcript excerpts, interleaved best first.
+        Where the question's words are spoken inside one, the exact second is
+        given to the model and kept in `last_citations`.
+        """
+        query_embedding = self.embeddings.encode_query(query)
+        sections = [
+            self._context_item("From", s, query)
+            for s in self._find_relevant_sections(query, query_embedding)
+        ]
+        excerpts = [
+            self._context_item("Transcript", s, query)
+            for s in self._find_relevant_segments(query, query_embedding)
+        ]
+        pairs = []
+        for i in range(max(len(sections), len(excerpts))):
+            pairs.extend(group[i] for group in (sections, excerpts) if i < len(group))
+        self.last_citations = [citation for _, citation in pairs]
+        return [item for item, _ in pairs]
+
+    def _build_messages(self, query: str) -> List[Dict]:
+        system_prompt = (
+            "You are a highly knowledgeable AI assistant helping users understand a YouTube video."
+            " Use the provided sections and conversation history to answer clearly, cite timestamps if useful."
+            " If you don't have enough info, say you don't know."
+        )
+        
+        messages = self.prompt_builder.build(
+            system_prompt,
+            self.conversation_history,
+            self._context_items(query),
+            query,
+            self.history_summary
+        )
+        self._remember_turn("user", query)
+        return messages
+
+    def _history_key(self) -> str:
+        """Identifies the conversation so far; empty for a fresh conversation"""
+        if not self.conversation_history and not self.history_summary:
+            return ""
+        digest = hashlib.sha1(self.history_summary.encode("utf-8"))
+        for turn in self.conversation_history:
+            digest.update(f"\0{turn['role']}\0{turn['content']}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _remember_turn(self, role: str, content: str):
+        """Append to history, folding the oldest turns into a digest past the limit"""
+        self.conversation_history.append({"role": role, "content": content})
+        overflow = len(self.conversation_history) - self.max_history_turns
+        if overflow > 0:
+            dropped = self.conversation_history[:overflow]
+            self.conversation_history = self.conversation_history[overflow:]
+            self.history_summary = self.prompt_builder.merge_summary(self.history_summary, dropped)
+
+    def generate_response_stream(self, query: str) -> Iterator[str]:
+        """
+        Generate response using RAG + conversation history, yielding text as
+        the model streams it. Timing for the finished response is left in
+        `last_response_stats` (time to first token, tokens/sec).
+        Near-duplicate questions are answered from the semantic answer cache.
+        """
+        # Reset first so an error or missing key never shows the previous answer's stats
+        self.last_response_stats = None
+        self.last_citations = []
+        try:
+            started = time.perf_counter()
+            with timed("chat_embed"):
+                query_embedding = self.embeddings.encode_query(query)
+            context_key = self._history_key()
+            if self.video_id:
+                cached = self.answer_cache.lookup(self.video_id, query_embedding, context_key)
+                if cached is not None:
+                    registry.inc("chat_responses_total", help="Chat answers", cached="true")
+                    self._remember_turn("user", query)
+                    self._remember_turn("assistant", cached)
+                    elapsed = time.perf_counter() - started
+                    self.last_response_stats = {
+                        'time_to_first_token': elapsed,
+                        'total_time': elapsed,
+                        'tokens': 0,
+                        'tokens_per_second': 0.0,
+                        'cached': True
+                    }
+                    yield cached
+                    return
+
+            with timed("chat_retrieve"):
+                messages = self._build_messages(query)
 
             if not self.groq_client:
-                return "No Groq API Key found."
+                yield "No Groq API Key found."
+                return
 
-            response = self.groq_client.chat.completions.create(
+            # Retries only cover opening the stream, before any text is shown
+            llm_started = time.perf_counter()
+            stream = call_with_retry(lambda: self.groq_client.chat.completions.create(
                 model="llama3-70b-8192",
                 messages=messages,
                 temperature=0.2,
-                max_tokens=1200
-            )
-            assistant_reply = response.choices[0].message.content
-            self.conversation_history.append({"role": "assistant", "content": assistant_reply})
-            return assistant_reply
+                max_tokens=1200,
+                stream=True
+            ))
+            parts = []
+            first_token_at = None
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                parts.append(delta)
+                yield delta
+
+            finished = time.perf_counter()
+            assistant_reply = "".join(parts)
+            self._remember_turn("assistant", assistant_reply)
+            if self.video_id and assistant_reply:
+                self.answer_cache.store(self.video_id, query_embedding, context_key, assistant_reply)
+            generating = finished - (first_token_at or finished)
+            registry.inc("chat_responses_total", help="Chat answers", cached="false")
+            registry.observe("stage_seconds", (first_token_at or finished) - llm_started, stage="chat_llm_first_token")
+            registry.observe("stage_seconds", finished - llm_started, stage="chat_llm")
+            log_event("chat", seconds=round(finished - started, 4), tokens=len(parts),
+                      first_token_seconds=round((first_token_at or finished) - started, 4))
+            self.last_response_stats = {
+                'time_to_first_token': (first_token_at or finished) - started,
+                'total_time': finished - started,
+                'tokens': len(parts),  # one streamed chunk is roughly one token
+                'tokens_per_second': len(parts) / generating if generating > 0 else 0.0,
+                'cached': False
+            }
 
         except Exception as e:
-            return f"Error generating response: {str(e)}"
+            yield f"Error generating response: {str(e)}"
+
+    def generate_response(self, query: str) -> str:
+        """Generate response using RAG + conversation history"""
+        return "".join(self.generate_response_stream(query))
 
 def format_timestamp(seconds: float) -> str:
     """Format seconds into HH:MM:SS"""
@@ -0,0 +1,172 @@
+from typing import Dict, Iterable, Iterator, List, Tuple
+import numpy as np
+
+SAMPLE_RATE = 16000  # Whisper always works on 16 kHz mono audio
+
+
+def _frame_energy(audio: np.ndarray, frame_size: int) -> np.ndarray:
+    """RMS energy of consecutive non-overlapping frames"""
+    n_frames = len(audio) // frame_size
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[:n_frames * frame_size].reshape(n_frames, frame_size)
+    return np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+
+
+def find_split_points(
+    audio: np.ndarray,
+    chunk_seconds: float = 300.0,
+    search_seconds: float = 30.0,
+    frame_seconds: float = 0.1,
+    sample_rate: int = SAMPLE_RATE
+) -> List[int]:
+    """
+    Pick chunk boundaries (in samples) at the quietest frame near every
+    multiple of `chunk_seconds`, so chunks break in pauses rather than words.
+    """
+    frame_size = max(1, int(frame_seconds * sample_rate))
+    energy = _frame_energy(audio, frame_size)
+    chunk_frames = int(chunk_seconds / frame_seconds)
+    search_frames = int(search_seconds / frame_seconds)
+
+    splits = []
+    last = 0
+    target = chunk_frames
+    while target < len(energy) - search_frames:
+        lo = max(last + 1, target - search_frames)
+        hi = min(len(energy), target + search_frames)
+        quietest = lo + int(np.argmin(energy[lo:hi]))
+        splits.append(quietest * frame_size)
+        last = quietest
+        target = quietest + chunk_frames
+    return splits
+
+
+def split_audio(
+    audio: np.ndarray,
+    chunk_seconds: float = 300.0,
+    overlap_seconds: float = 1.0,
+    sample_rate: int = SAMPLE_RATE
+) -> List[Dict]:
+    """
+    Split audio into chunks at silence boundaries.
+
+    Each chunk is padded by `overlap_seconds` on both sides so words sitting on
+    a boundary are heard in full; `core_start`/`core_end` (seconds, global)
+    mark the region the chunk is responsible for when stitching.
+    """
+    total = len(audio)
+    bounds = [0] + find_split_points(audio, chunk_seconds, sample_rate=sample_rate) + [total]
+    pad = int(overlap_seconds * sample_rate)
+
+    chunks = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        padded_start = max(0, start - pad)
+        padded_end = min(total, end + pad)
+        chunks.append({
+            "audio": audio[padded_start:padded_end],
+            "offset": padded_start / sample_rate,
+            "core_start": start / sample_rate,
+            "core_end": end / sample_rate,
+        })
+    return chunks
+
+
+def iter_split_audio(
+    blocks: Iterable[np.ndarray],
+    chunk_seconds: float = 300.0,
+    overlap_seconds: float = 1.0,
+    search_seconds: float = 30.0,
+    frame_seconds: float = 0.1,
+    sample_rate: int = SAMPLE_RATE
+) -> Iterator[Dict]:
+    """
+    Streaming split_audio over blocks of decoded samples: yields the same
+    chunks, each as soon as enough audio has arrived to place its end
+    boundary, while holding only about one chunk of audio in memory.
+    """
+    frame_size = max(1, int(frame_seconds * sample_rate))
+    chunk_frames = int(chunk_seconds / frame_seconds)
+    search_frames = int(search_seconds / frame_seconds)
+    pad = int(overlap_seconds * sample_rate)
+
+    buffer = np.zeros(0, dtype=np.float32)
+    base = 0  # global sample index of buffer[0], always a whole frame
+    incoming: List[np.ndarray] = []
+    seen = 0
+    start = 0  # global sample where the current chunk's core starts
+    last = 0
+    target = chunk_frames
+
+    def chunk(end: int) -> Dict:
+        padded_start = max(0, start - pad)
+        padded_end = min(seen, end + pad)
+        return {
+            "audio": buffer[padded_start - base:padded_end - base],
+            "offset": padded_start / sample_rate,
+            "core_start": start / sample_rate,
+            "core_end": end / sample_rate,
+        }
+
+    def splits(final: bool) -> Iterator[Dict]:
+        nonlocal buffer, base, start, last, target
+        while target < seen // frame_size - search_frames:
+            hi = target + search_frames
+            if not final and hi * frame_size + pad > seen:
+                break
+            if incoming:
+                buffer = np.concatenate([buffer] + incoming)
+                incoming.clear()
+            lo = max(last + 1, target - search_frames)
+            energy = _frame_energy(buffer[lo * frame_size - base:hi * frame_size - base], frame_size)
+            quietest = lo + int(np.argmin(energy))
+            split = quietest * frame_size
+            yield chunk(split)
+            start, last, target = split, quietest, quietest + chunk_frames
+            # Keep only what the next chunk (with its leading overlap) needs
+            new_base = max(0, start - pad) // frame_size * frame_size
+            buffer = buffer[new_base - base:]
+            base = new_base
+
+    for block in blocks:
+        incoming.append(np.asarray(block, dtype=np.float32))
+        seen += len(block)
+        yield from splits(final=False)
+    yield from splits(final=True)
+    if seen > start:
+        buffer = np.concatenate([buffer] + incoming)
+        yield chunk(seen)
+
+
+def _shift_segment(segment: Dict, offset: float) -> Dict:
+    shifted = dict(segment)
+    shifted["start"] = segment["start"] + offset
+    shifted["end"] = segment["end"] + offset
+    if "words" in segment:
+        shifted["words"] = [
+            {**w, "start": w["start"] + offset, "end": w["end"] + offset}
+            for w in segment["words"]
+        ]
+    return shifted
+
+
+def stitch_chunk_segments(chunk: Dict, segments: List[Dict]) -> List[Dict]:
+    """
+    Move one chunk's segments onto the global timeline and drop those that
+    belong to a neighbouring chunk's overlap (midpoint outside the core).
+    """
+    stitched = []
+    for segment in segments:
+        shifted = _shift_segment(segment, chunk["offset"])
+        midpoint = (shifted["start"] + shifted["end"]) / 2
+        if chunk["core_start"] <= midpoint < chunk["core_end"]:
+            stitched.append(shifted)
+    return stitched
+
+
+def stitch_segments(chunk_results: List[Tuple[Dict, List[Dict]]]) -> List[Dict]:
+    """Stitch (chunk, segments) pairs, in chunk order, into one timeline"""
+    segments = []
+    for chunk, chunk_segments in chunk_results:
+        segments.extend(stitch_chunk_segments(chunk, chunk_segments))
+    return segments
@@ -0,0 +1,151 @@
+import os
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+import numpy as np
+from audio_chunks import SAMPLE_RATE
+
+DEFAULT_SPILL_DIR = os.path.join("downloads", "tmp")
+DEFAULT_DOWNLOADS_MAX_BYTES = 10 * 1024 ** 3  # 10 GB
+CHUNK_BYTES = 256 * 1024
+
+
+def iter_url_chunks(url: str, chunk_size: int = CHUNK_BYTES, timeout: float = 30.0) -> Iterator[bytes]:
+    """Bytes of an HTTP(S) resource, `chunk_size` at a time"""
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        while True:
+            chunk = response.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def decode_audio_stream(
+    chunks: Iterable[bytes],
+    sample_rate: int = SAMPLE_RATE,
+    block_seconds: float = 1.0,
+    spill_path: Optional[str] = None
+) -> Iterator[np.ndarray]:
+    """
+    Decode and resample an encoded audio byte stream with ffmpeg as it
+    arrives, yielding float32 mono blocks of about `block_seconds` (the
+    format whisper.load_audio produces). When `spill_path` is given the raw
+    bytes are also written there, e.g. to cache the audio for later runs.
+    """
+    process = subprocess.Popen(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+         "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "pipe:1"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    feed_error = []
+
+    def feed():
+        # Runs beside the reader so ffmpeg never blocks on a full pipe
+        spill = open(spill_path, "wb") if spill_path else None
+        try:
+            for chunk in chunks:
+                if spill:
+                    spill.write(chunk)
+                process.stdin.write(chunk)
+        except BrokenPipeError:
+            pass  # ffmpeg exited; its own error is reported below
+        except Exception as e:
+            feed_error.append(e)
+        finally:
+            if spill:
+                spill.close()
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    block_bytes = int(block_seconds * sample_rate) * 2
+    finished = False
+    try:
+        leftover = b""
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            data = leftover + data
+            usable = len(data) - len(data) % 2
+            leftover = data[usable:]
+            if usable:
+                yield np.frombuffer(data[:usable], np.int16).astype(np.float32) / 32768.0
+        process.wait()
+        feeder.join()
+        if feed_error:
+            raise feed_error[0]
+        if process.returncode != 0:
+            raise RuntimeError(f"Failed to decode audio: {process.stderr.read().decode(errors='replace').strip()}")
+        finished = True
+    finally:
+        if not finished:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+@contextmanager
+def spill_file(directory: str = DEFAULT_SPILL_DIR, suffix: str = ".audio") -> Iterator[str]:
+    """
+    Temporary path for spilled audio. The file is removed on exit unless it
+    was moved away first (e.g. into the PipelineCache with put_file).
+    """
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=directory, suffix=suffix)
+    os.close(fd)
+    try:
+        yield path
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def downloads_size(root: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except FileNotFoundError:
+                pass
+    return total
+
+
+def enforce_disk_quota(
+    cache,
+    root: str = "downloads",
+    max_bytes: int = DEFAULT_DOWNLOADS_MAX_BYTES,
+    spill_dir: str = DEFAULT_SPILL_DIR,
+    stale_seconds: float = 24 * 3600
+) -> int:
+    """
+    Keep everything under `root` within `max_bytes`: spill files left behind
+    by crashed runs are removed, then least recently used PipelineCache
+    entries are evicted. Indexes and databases are never touched. Returns
+    the number of files removed.
+    """
+    removed = 0
+    if os.path.isdir(spill_dir):
+        cutoff = time.time() - stale_seconds
+        for name in os.listdir(spill_dir):
+            path = os.path.join(spill_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+
+    overage = downloads_size(root) - max_bytes
+    if overage > 0:
+        removed += cache.evict(max_bytes=max(0, cache.size() - overage))
+    return removed
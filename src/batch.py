@@ -0,0 +1,183 @@
+"""
+Headless batch processing of URL lists and playlists, e.g. for backfills:
+
+    python src/batch.py urls.txt "https://www.youtube.com/playlist?list=..." \
+        --output-dir downloads/summaries --transcribe-workers 2
+
+Videos go through the background job pipeline, so the download of one
+video overlaps the transcription of another. One summary JSON is written per
+video and a throughput report is printed at the end.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+from captions import CAPTION_POLICIES
+from jobs import DEFAULT_QUEUE_PATH, STAGES, WorkerPool, pipeline_params
+from pipeline_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, PipelineCache
+from summarization import YouTubeSummarizer, is_degraded
+from youtube_fetcher import extract_video_id, get_playlist_urls
+
+DEFAULT_OUTPUT_DIR = os.path.join("downloads", "summaries")
+
+
+def read_sources(sources: List[str]) -> List[str]:
+    """
+    Expand files (one URL per line, # comments) and playlist URLs into video
+    URLs, dropping repeats of the same video.
+    """
+    urls = []
+    for source in sources:
+        if os.path.isfile(source):
+            with open(source, "r", encoding="utf-8") as f:
+                urls.extend(read_sources([
+                    line.strip() for line in f
+                    if line.strip() and not line.lstrip().startswith("#")
+                ]))
+        elif "list=" in source and "v=" not in source:
+            urls.extend(get_playlist_urls(source))
+        else:
+            urls.append(source)
+
+    seen = set()
+    unique = []
+    for url in urls:
+        video_id = extract_video_id(url)
+        if video_id not in seen:
+            seen.add(video_id)
+            unique.append(url)
+    return unique
+
+
+def _write_summary(output_dir: str, video_id: str, summary: Dict) -> str:
+    path = os.path.join(output_dir, f"{video_id}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def run_batch(
+    urls: List[str],
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    model_size: str = "small",
+    caption_policy: str = "any",
+    concurrency: Optional[Dict[str, int]] = None,
+    queue_path: str = DEFAULT_QUEUE_PATH,
+    cache_root: str = DEFAULT_CACHE_DIR,
+    cache_max_bytes: int = DEFAULT_MAX_BYTES,
+    handlers: Optional[Dict[str, Callable]] = None,
+    poll_interval: float = 1.0
+) -> Dict:
+    """
+    Process `urls` through the stage workers and write their summaries to
+    `output_dir`. Videos whose summary is already cached are written without
+    being queued. Returns the throughput report.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    params = pipeline_params(model_size, YouTubeSummarizer(), caption_policy)
+    cache = PipelineCache(cache_root, cache_max_bytes)
+    report = {'processed': [], 'cached': [], 'failed': []}
+    started = time.time()
+
+    with WorkerPool(queue_path, cache_root, cache_max_bytes, concurrency, handlers, poll_interval) as pool:
+        pending = {}
+        for url in urls:
+            video_id = extract_video_id(url)
+            summary = cache.get(video_id, "summary", params['summary'])
+            if summary and not is_degraded(summary):
+                _write_summary(output_dir, video_id, summary)
+                report['cached'].append(video_id)
+                continue
+            pending[pool.queue.submit(video_id, url, params)] = video_id
+        print(f"{len(pending)} videos queued, {len(report['cached'])} already summarized")
+
+        last_state = {}
+        while pending:
+            for job_id, video_id in list(pending.items()):
+                job = pool.queue.get(job_id)
+                state = (job['stage'], job['status'])
+                if last_state.get(job_id) != state:
+                    last_state[job_id] = state
+                    print(f"[{time.time() - started:7.1f}s] {video_id}: {job['stage']} {job['status']}")
+
+                if job['status'] == 'done':
+                    del pending[job_id]
+                    summary = cache.get(video_id, "summary", params['summary'])
+                    if summary:
+                        _write_summary(output_dir, video_id, summary)
+                        report['processed'].append({
+                            'video_id': video_id,
+                            'audio_seconds': summary['metadata']['duration']
+                        })
+                    else:
+                        report['failed'].append({'video_id': video_id, 'error': "summary missing from cache"})
+                elif job['status'] == 'failed':
+                    del pending[job_id]
+                    report['failed'].append({'video_id': video_id, 'error': job['error']})
+            if pending:
+                time.sleep(poll_interval)
+
+    wall_seconds = time.time() - started
+    audio_seconds = sum(video['audio_seconds'] for video in report['processed'])
+    report.update({
+        'wall_seconds': wall_seconds,
+        'audio_seconds': audio_seconds,
+        'videos_per_hour': len(report['processed']) / wall_seconds * 3600 if wall_seconds else 0.0,
+        'audio_seconds_per_wall_second': audio_seconds / wall_seconds if wall_seconds else 0.0
+    })
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Summarize YouTube videos in batch")
+    parser.add_argument("sources", nargs="+",
+                        help="video URLs, playlist URLs or files with one URL per line")
+    parser.add_argument("-o", "--output-dir", default=DEFAULT_OUTPUT_DIR,
+                        help="where per-video summary JSON files are written")
+    parser.add_argument("--model-size", default=os.getenv("WHISPER_MODEL_SIZE", "small"))
+    parser.add_argument("--captions", choices=CAPTION_POLICIES, default=os.getenv("CAPTION_POLICY", "any"),
+                        help="use YouTube captions instead of Whisper when available")
+    for stage in STAGES:
+        parser.add_argument(f"--{stage}-workers", type=int, default=None,
+                            help=f"{stage} worker processes (default JOB_{stage.upper()}_WORKERS or 1)")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE_PATH, help="job queue database")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--report", help="also write the throughput report to this JSON file")
+    args = parser.parse_args(argv)
+
+    urls = read_sources(args.sources)
+    if not urls:
+        print("No videos to process")
+        return 1
+
+    concurrency = {
+        stage: getattr(args, f"{stage}_workers")
+        for stage in STAGES if getattr(args, f"{stage}_workers") is not None
+    }
+    report = run_batch(
+        urls,
+        output_dir=args.output_dir,
+        model_size=args.model_size,
+        caption_policy=args.captions,
+        concurrency=concurrency,
+        queue_path=args.queue,
+        cache_root=args.cache_dir,
+        cache_max_bytes=int(os.getenv("PIPELINE_CACHE_MAX_BYTES", str(DEFAULT_MAX_BYTES)))
+    )
+
+    print(f"\nProcessed {len(report['processed'])}, cached {len(report['cached'])}, "
+          f"failed {len(report['failed'])} in {report['wall_seconds']:.1f}s")
+    print(f"Throughput: {report['videos_per_hour']:.1f} videos/hour, "
+          f"{report['audio_seconds_per_wall_second']:.2f} audio-seconds per wall-second")
+    for failure in report['failed']:
+        print(f"  {failure['video_id']}: {failure['error']}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 1 if report['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+import re
+from html import unescape
+from typing import Dict, List, Optional
+from xml.etree import ElementTree
+
+# "any": creator captions, else auto-generated ones; "manual": creator
+# captions only; "off": always run Whisper
+CAPTION_POLICIES = ("any", "manual", "off")
+MERGE_SECONDS = 8.0
+
+# Sound annotations such as [Music] or (applause) carry no speech
+ANNOTATION_PATTERN = re.compile(r"\[[^\]]*\]|\([^)]*\)|♪+")
+SRT_TIME = re.compile(r"(\d+):(\d+):(\d+)[,.](\d+)\s*-->\s*(\d+):(\d+):(\d+)[,.](\d+)")
+
+
+def _clean(text: str) -> str:
+    return " ".join(ANNOTATION_PATTERN.sub(" ", unescape(text or "")).split())
+
+
+def _with_words(text: str, start: float, end: float, word_times: Optional[List[float]] = None) -> Dict:
+    """Caption line as a segment; words get their own start times when known, else evenly spread"""
+    words = text.split()
+    if word_times is None or len(word_times) != len(words):
+        step = (end - start) / max(len(words), 1)
+        word_times = [start + i * step for i in range(len(words))]
+    ends = word_times[1:] + [end]
+    return {
+        "text": text,
+        "start": start,
+        "end": end,
+        "words": [
+            {"word": word, "start": round(w_start, 3), "end": round(max(w_end, w_start), 3)}
+            for word, w_start, w_end in zip(words, word_times, ends)
+        ]
+    }
+
+
+def parse_caption_xml(xml: str) -> List[Dict]:
+    """
+    Caption lines from YouTube timed text, either the classic format
+    (<text start= dur=> in seconds) or srv3 (<p t= d=> in milliseconds, with
+    per-word <s t=> offsets on auto-generated tracks).
+    """
+    root = ElementTree.fromstring(xml)
+    lines = []
+    for element in root.iter():
+        if element.tag == "text":
+            start = float(element.attrib.get("start", 0))
+            end = start + float(element.attrib.get("dur", 0))
+            text = _clean("".join(element.itertext()))
+            if text:
+                lines.append(_with_words(text, start, end))
+        elif element.tag == "p":
+            start = float(element.attrib.get("t", 0)) / 1000
+            end = start + float(element.attrib.get("d", 0)) / 1000
+            runs = [s for s in element if s.tag == "s"]
+            if runs:
+                words, times = [], []
+                for run in runs:
+                    for word in _clean(run.text).split():
+                        words.append(word)
+                        times.append(start + float(run.attrib.get("t", 0)) / 1000)
+                if words:
+                    lines.append(_with_words(" ".join(words), start, end, times))
+            else:
+                text = _clean("".join(element.itertext()))
+                if text:
+                    lines.append(_with_words(text, start, end))
+    return lines
+
+
+def parse_srt(srt: str) -> List[Dict]:
+    """Caption lines from SubRip text (e.g. Caption.generate_srt_captions())"""
+    lines = []
+    for block in re.split(r"\n\s*\n", srt.strip()):
+        rows = block.strip().splitlines()
+        for i, row in enumerate(rows):
+            match = SRT_TIME.search(row)
+            if match:
+                h1, m1, s1, ms1, h2, m2, s2, ms2 = (int(g) for g in match.groups())
+                start = h1 * 3600 + m1 * 60 + s1 + ms1 / 1000
+                end = h2 * 3600 + m2 * 60 + s2 + ms2 / 1000
+                text = _clean(" ".join(rows[i + 1:]))
+                if text:
+                    lines.append(_with_words(text, start, end))
+                break
+    return lines
+
+
+def parse_caption_track(caption) -> List[Dict]:
+    """
+    Caption lines from a pytubefix Caption: its timed-text XML, or the
+    SubRip rendering when the XML is malformed or yields no lines (a format
+    parse_caption_xml does not know).
+    """
+    try:
+        lines = parse_caption_xml(caption.xml_captions)
+    except ElementTree.ParseError:
+        lines = []
+    return lines or parse_srt(caption.generate_srt_captions())
+
+
+def merge_caption_lines(lines: List[Dict], max_seconds: float = MERGE_SECONDS) -> List[Dict]:
+    """
+    Turn short, often overlapping caption lines into Whisper-sized segments:
+    overlaps are clipped and lines are joined until a sentence ends or the
+    segment reaches `max_seconds`.
+    """
+    lines = sorted(lines, key=lambda line: line["start"])
+    segments = []
+    current = None
+    for i, line in enumerate(lines):
+        end = min(line["end"], lines[i + 1]["start"]) if i + 1 < len(lines) else line["end"]
+        end = max(end, line["start"])
+        words = [{**w, "end": min(w["end"], end), "start": min(w["start"], end)} for w in line["words"]]
+        if current is None:
+            current = {"text": line["text"], "start": line["start"], "end": end, "words": words}
+        else:
+            current["text"] += " " + line["text"]
+            current["end"] = end
+            current["words"].extend(words)
+        if current["text"].endswith((".", "?", "!")) or current["end"] - current["start"] >= max_seconds:
+            segments.append(current)
+            current = None
+    if current is not None:
+        segments.append(current)
+    return segments
+
+
+def track_language(code: str) -> str:
+    """'a.en-US' -> 'en'"""
+    return code.split(".")[-1].split("-")[0].lower()
+
+
+def is_auto_generated(code: str) -> bool:
+    return code.startswith("a.")
+
+
+def choose_caption_track(codes: List[str], language: Optional[str] = None, policy: str = "any") -> Optional[str]:
+    """
+    Pick the caption track to use instead of Whisper, or None to transcribe.
+
+    The wanted language is `language` if given, otherwise the language of
+    the auto-generated track, which YouTube produces in the spoken language.
+    A creator track in that language wins; an auto-generated one is used
+    under the "any" policy. Without a known language, a lone creator track
+    is taken to be the original.
+    """
+    if policy not in CAPTION_POLICIES:
+        raise ValueError(f"Unknown caption policy: {policy}")
+    if policy == "off":
+        return None
+
+    manual = [code for code in codes if not is_auto_generated(code)]
+    auto = [code for code in codes if is_auto_generated(code)]
+    wanted = language.split("-")[0].lower() if language else (track_language(auto[0]) if auto else None)
+
+    if wanted is None:
+        return manual[0] if len(manual) == 1 else None
+    for code in manual:
+        if track_language(code) == wanted:
+            return code
+    if policy == "any":
+        for code in auto:
+            if track_language(code) == wanted:
+                return code
+    return None
+
+
+def captions_to_transcription(lines: List[Dict], code: str) -> Optional[Dict]:
+    """transcribe_audio-style result built from caption lines"""
+    segments = merge_caption_lines(lines)
+    if not segments:
+        return None
+    return {
+        "text": " ".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": track_language(code),
+        "source": f"captions:{code}"
+    }
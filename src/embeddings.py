@@ -0,0 +1,228 @@
+import atexit
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from model_registry import ModelRegistry
+
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+DEFAULT_EMBEDDING_CACHE = os.path.join("downloads", "embeddings.sqlite")
+# ~1.5 KB per MiniLM vector, so the default bounds the file at roughly 300 MB
+DEFAULT_MAX_ROWS = int(os.getenv("EMBEDDING_CACHE_MAX_ROWS", "200000"))
+
+
+def _load_encoder(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    print(f"Loading embedding model {model_name}...")
+    return SentenceTransformer(model_name)
+
+
+# One encoder per model name for the whole process
+_encoders = ModelRegistry(_load_encoder, max_models=2)
+
+
+def get_encoder(model_name: str = EMBEDDING_MODEL):
+    """Return the process-wide SentenceTransformer for `model_name`"""
+    return _encoders.get(model_name)
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Normalized text embeddings cached by text hash, in memory (LRU) and in a
+    SQLite file, so each distinct text is only ever encoded once per model.
+
+    New vectors and last-used times are written in batches (every
+    `flush_rows` rows or `flush_seconds`, and on close()), and the least
+    recently used rows are pruned once the file holds more than `max_rows`.
+    """
+
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL,
+        path: Optional[str] = DEFAULT_EMBEDDING_CACHE,
+        memory_entries: int = 10000,
+        encoder=None,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        flush_rows: int = 64,
+        flush_seconds: float = 30.0
+    ):
+        self.model_name = model_name
+        self.memory_entries = memory_entries
+        self.max_rows = max_rows
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self._encoder = encoder
+        self._dim: Optional[int] = None
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # Written on the next flush: new vectors, and keys whose last use to record
+        self._pending: Dict[str, np.ndarray] = {}
+        self._touched: Dict[str, float] = {}
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT, hash TEXT, vector BLOB, used REAL DEFAULT 0, PRIMARY KEY (model, hash))"
+            )
+            # Cache files created before pruning existed
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(embeddings)")}
+            if "used" not in columns:
+                self._db.execute("ALTER TABLE embeddings ADD COLUMN used REAL DEFAULT 0")
+            self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_used ON embeddings (used)")
+            self._db.commit()
+
+    @property
+    def encoder(self):
+        if self._encoder is None:
+            self._encoder = get_encoder(self.model_name)
+        return self._encoder
+
+    @property
+    def dim(self) -> int:
+        """Embedding dimension of the model"""
+        if self._dim is None:
+            get_dimension = getattr(self.encoder, "get_sentence_embedding_dimension", None)
+            self._dim = int(get_dimension()) if get_dimension else len(self.encode_query(""))
+        return self._dim
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        missing = []
+        with self._lock:
+            now = time.time()
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                elif key in self._pending:
+                    found[key] = self._pending[key]
+                else:
+                    missing.append(key)
+                    continue
+                if self._db is not None:
+                    self._touched[key] = now
+            if missing and self._db is not None:
+                for start in range(0, len(missing), 500):
+                    batch = missing[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT hash, vector FROM embeddings WHERE model = ? "
+                        f"AND hash IN ({','.join('?' * len(batch))})",
+                        [self.model_name, *batch]
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float32)
+                        found[key] = vector
+                        self._remember(key, vector)
+                        self._touched[key] = now
+            self._maybe_flush()
+        return found
+
+    def _store(self, vectors: Dict[str, np.ndarray]):
+        with self._lock:
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+            if self._db is not None:
+                self._pending.update(vectors)
+                self._maybe_flush()
+
+    def _maybe_flush(self):
+        waiting = len(self._pending) + len(self._touched)
+        if waiting and (waiting >= self.flush_rows or time.monotonic() - self._flushed_at >= self.flush_seconds):
+            self._flush()
+
+    def _flush(self):
+        # Caller holds self._lock; one transaction per batch instead of per query
+        now = time.time()
+        self._db.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, hash, vector, used) VALUES (?, ?, ?, ?)",
+            [(self.model_name, key, vector.tobytes(), now) for key, vector in self._pending.items()]
+        )
+        self._db.executemany(
+            "UPDATE embeddings SET used = ? WHERE model = ? AND hash = ?",
+            [(used, self.model_name, key) for key, used in self._touched.items() if key not in self._pending]
+        )
+        excess = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - self.max_rows
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY used LIMIT ?)",
+                (excess,)
+            )
+        self._db.commit()
+        self._pending.clear()
+        self._touched.clear()
+        self._flushed_at = time.monotonic()
+
+    def flush(self):
+        """Write pending vectors and last-used times to the SQLite file"""
+        with self._lock:
+            if self._db is not None and (self._pending or self._touched):
+                self._flush()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Return an (n, dim) float32 matrix, encoding only uncached texts"""
+        keys = [text_hash(t) for t in texts]
+        found = self._lookup(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            encoded = np.asarray(
+                self.encoder.encode(list(missing.values()), normalize_embeddings=True),
+                dtype=np.float32
+            )
+            new_vectors = dict(zip(missing.keys(), encoded))
+            self._store(new_vectors)
+            found.update(new_vectors)
+
+        if not texts:
+            # Still (n, dim), so it can be multiplied with a query vector
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
+
+    def encode_query(self, text: str) -> np.ndarray:
+        return self.encode([text])[0]
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(model_name: str = EMBEDDING_MODEL) -> EmbeddingCache:
+    """Process-wide EmbeddingCache for `model_name`"""
+    with _caches_lock:
+        if model_name not in _caches:
+            _caches[model_name] = EmbeddingCache(model_name)
+        return _caches[model_name]
+
+
+@atexit.register
+def _flush_caches():
+    for cache in list(_caches.values()):
+        cache.flush()
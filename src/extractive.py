@@ -0,0 +1,92 @@
+import re
+from collections import Counter
+from datetime import timedelta
+from typing import List
+import numpy as np
+from lexical_index import tokenize
+
+# Filler that carries no topic; spoken transcripts are full of it
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be because been before being but by can
+could did do does doing don't for from get got had has have he her here him his how i if
+in into is it it's its just know let's like me more most my no not now of on one or other
+our out really right say said see she so some something that that's the their them then
+there these they thing things think this those to too um uh up us very was we we're well
+were what when where which who why will with would yeah yes you you're your okay going
+gonna want
+""".split())
+
+TITLE_WORDS = 8
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentence-ish units; unpunctuated transcript runs are split every ~30 words"""
+    sentences = []
+    for sentence in re.split(r"(?<=[.!?])\s+", text.strip()):
+        words = sentence.split()
+        for i in range(0, len(words), 30):
+            sentences.append(" ".join(words[i:i + 30]))
+    return [s for s in sentences if s]
+
+
+def _content_terms(sentence: str) -> List[str]:
+    return [t for t in tokenize(sentence) if t not in STOPWORDS and len(t) > 2]
+
+
+def textrank(similarity: np.ndarray, damping: float = 0.85, iterations: int = 50) -> np.ndarray:
+    """PageRank by power iteration over a sentence similarity matrix"""
+    n = len(similarity)
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    weights = similarity.copy()
+    np.fill_diagonal(weights, 0.0)
+    out_degree = weights.sum(axis=1, keepdims=True)
+    # Sentences with no links spread their rank uniformly
+    transition = np.where(out_degree > 0, weights / np.maximum(out_degree, 1e-9), 1.0 / n)
+    ranks = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1 - damping) / n + damping * (transition.T @ ranks)
+        if np.abs(updated - ranks).sum() < 1e-6:
+            return updated
+        ranks = updated
+    return ranks
+
+
+def rank_sentences(sentences: List[str]) -> np.ndarray:
+    """TextRank scores from cosine similarity of TF-IDF sentence vectors"""
+    term_lists = [_content_terms(s) for s in sentences]
+    vocabulary = {term: i for i, term in enumerate(sorted({t for terms in term_lists for t in terms}))}
+    if not vocabulary:
+        return np.zeros(len(sentences), dtype=np.float32)
+
+    tf = np.zeros((len(sentences), len(vocabulary)), dtype=np.float32)
+    for row, terms in enumerate(term_lists):
+        for term, count in Counter(terms).items():
+            tf[row, vocabulary[term]] = count
+    idf = np.log((1 + len(sentences)) / (1 + (tf > 0).sum(axis=0))) + 1
+    vectors = tf * idf
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+    return textrank(vectors @ vectors.T)
+
+
+def keywords(text: str, count: int = 3) -> List[str]:
+    return [term for term, _ in Counter(_content_terms(text)).most_common(count)]
+
+
+def extractive_summary(text: str, start: float, max_points: int = 3) -> str:
+    """
+    Summary of one section without an LLM, in the same shape the LLM prompt
+    asks for: "[HH:MM:SS] Title" followed by up to `max_points` bullets,
+    the highest ranked sentences in their original order.
+    """
+    timestamp = str(timedelta(seconds=int(start)))
+    sentences = split_sentences(text)
+    if not sentences:
+        return f"[{timestamp}] Section"
+
+    ranks = rank_sentences(sentences)
+    best = sorted(np.argsort(-ranks, kind="stable")[:max_points])
+    terms = keywords(text)
+    title = ", ".join(t.capitalize() for t in terms) if terms else " ".join(sentences[0].split()[:TITLE_WORDS])
+    bullets = "\n".join(f"- {sentences[i]}" for i in best)
+    return f"[{timestamp}] {title}\n{bullets}"
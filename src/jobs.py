@@ -0,0 +1,466 @@
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+from pipeline_cache import PipelineCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
+from transcript_store import get_transcript, put_transcript
+from summarization import PROMPT_VERSION, YouTubeSummarizer, is_degraded
+from audio_stream import DEFAULT_DOWNLOADS_MAX_BYTES, enforce_disk_quota
+from metrics import configure_json_logging, registry, timed
+
+DEFAULT_QUEUE_PATH = os.path.join("downloads", "jobs.sqlite")
+STAGES = ("download", "transcribe", "summarize")
+# A running job's worker renews its lease while it works; a job whose lease
+# has expired belongs to a dead worker and may be claimed again
+DEFAULT_LEASE_SECONDS = 60.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    params TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    error TEXT,
+    worker TEXT,
+    lease_expires REAL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_video
+    ON jobs(video_id) WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS jobs_stage_status ON jobs(stage, status, id);
+"""
+
+
+class JobQueue:
+    """
+    SQLite-backed queue of pipeline jobs, shared by the app and the stage
+    worker processes.
+
+    A job moves through STAGES; at each stage it is 'queued' until a worker
+    for that stage claims it ('running'), then it is queued for the next
+    stage, or ends 'done' / 'failed'. At most one job per video id is active,
+    so concurrent submissions for the same video share one job.
+
+    A claim records the worker's id and a lease that the worker renews with
+    heartbeat() (report() renews it too). Only jobs whose lease has expired
+    are taken back, so several pools can share one queue file.
+    """
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # Queue files created before leases existed
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("worker", "TEXT"), ("lease_expires", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A connection per call keeps the queue usable from any thread or process
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _job(row: Optional[sqlite3.Row]) -> Optional[Dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        return job
+
+    def submit(self, video_id: str, url: str, params: Optional[Dict] = None) -> int:
+        """Queue a job for `video_id`, or return the id of its active job"""
+        now = time.time()
+        with self._connect() as conn:
+            try:
+                return conn.execute(
+                    "INSERT INTO jobs (video_id, url, params, stage, status, created, updated) "
+                    "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                    (video_id, url, json.dumps(params or {}), STAGES[0], now, now)
+                ).lastrowid
+            except sqlite3.IntegrityError:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE video_id = ? AND status IN ('queued', 'running')",
+                    (video_id,)
+                ).fetchone()
+                if row is None:  # finished between the insert and the lookup
+                    return self.submit(video_id, url, params)
+                return row['id']
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        with self._connect() as conn:
+            return self._job(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def jobs(self, status: Optional[str] = None) -> List[Dict]:
+        with self._connect() as conn:
+            if status:
+                rows = conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY id", (status,))
+            else:
+                rows = conn.execute("SELECT * FROM jobs ORDER BY id")
+            return [self._job(row) for row in rows]
+
+    def claim(self, stage: str, worker: Optional[str] = None) -> Optional[Dict]:
+        """
+        Atomically take the oldest job waiting at `stage`, or one whose
+        worker's lease at that stage has expired, on behalf of `worker`
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE stage = ? AND (status = 'queued' OR "
+                    "(status = 'running' AND (lease_expires IS NULL OR lease_expires < ?))) "
+                    "ORDER BY id LIMIT 1",
+                    (stage, now)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', progress = 0, message = '', worker = ?, "
+                    "lease_expires = ?, updated = ? WHERE id = ?",
+                    (worker or worker_id(), now + self.lease_seconds, now, row['id'])
+                )
+                job = self._job(conn.execute("SELECT * FROM jobs WHERE id = ?", (row['id'],)).fetchone())
+                conn.execute("COMMIT")
+                return job
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def report(self, job_id: int, progress: float, message: str = "", worker: Optional[str] = None):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET progress = ?, message = ?, updated = ?, lease_expires = ? "
+                "WHERE id = ? AND status = 'running' AND worker = ?",
+                (min(max(progress, 0.0), 1.0), message, now, now + self.lease_seconds, job_id, worker or worker_id())
+            )
+
+    def heartbeat(self, job_id: int, worker: str) -> bool:
+        """Renew `worker`'s lease on a running job; False if it no longer holds the job"""
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = 'running' AND worker = ?",
+                (time.time() + self.lease_seconds, job_id, worker)
+            ).rowcount == 1
+
+    def complete_stage(self, job_id: int, worker: Optional[str] = None) -> bool:
+        """
+        Queue the job for its next stage, or mark it done after the last.
+        False (and nothing changes) if `worker` no longer holds the job,
+        e.g. its lease expired and another worker reclaimed it.
+        """
+        worker = worker or worker_id()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT stage FROM jobs WHERE id = ? AND status = 'running' AND worker = ?",
+                (job_id, worker)
+            ).fetchone()
+            if row is None:
+                return False
+            index = STAGES.index(row['stage'])
+            if index + 1 < len(STAGES):
+                cursor = conn.execute(
+                    "UPDATE jobs SET stage = ?, status = 'queued', progress = 0, message = '', worker = NULL, "
+                    "lease_expires = NULL, updated = ? WHERE id = ? AND stage = ? AND status = 'running' AND worker = ?",
+                    (STAGES[index + 1], time.time(), job_id, row['stage'], worker)
+                )
+            else:
+                cursor = conn.execute(
+                    "UPDATE jobs SET status = 'done', progress = 1, lease_expires = NULL, updated = ? "
+                    "WHERE id = ? AND stage = ? AND status = 'running' AND worker = ?",
+                    (time.time(), job_id, row['stage'], worker)
+                )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: int, error: str, worker: Optional[str] = None) -> bool:
+        """Mark the job failed; False (and nothing changes) if `worker` no longer holds it"""
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, lease_expires = NULL, updated = ? "
+                "WHERE id = ? AND status = 'running' AND worker = ?",
+                (error, time.time(), job_id, worker or worker_id())
+            ).rowcount == 1
+
+    def recover(self) -> int:
+        """
+        Requeue running jobs whose lease has expired (their worker died);
+        jobs other live workers hold are left alone. Returns how many.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = 'queued', progress = 0, worker = NULL, lease_expires = NULL, "
+                "updated = ? WHERE status = 'running' AND (lease_expires IS NULL OR lease_expires < ?)",
+                (now, now)
+            ).rowcount
+
+
+def worker_id() -> str:
+    """Identifies this process (and thread) as the holder of a job lease"""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+@contextmanager
+def _lease_heartbeat(queue: JobQueue, job_id: int, worker: str):
+    """Renew the job's lease in the background for as long as the block runs"""
+    done = threading.Event()
+
+    def beat():
+        while not done.wait(queue.lease_seconds / 3):
+            if not queue.heartbeat(job_id, worker):
+                return
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def pipeline_params(model_size: str, summarizer: YouTubeSummarizer, caption_policy: str = "any") -> Dict:
+    """
+    Cache keys of a job's transcript and summary for a given Whisper model
+    size, caption policy and YouTubeSummarizer configuration.
+    """
+    transcript = {"model_size": model_size, "timestamps": "word", "captions": caption_policy}
+    return {
+        "transcript": transcript,
+        "summary": {
+            **transcript,
+            "prompt_version": PROMPT_VERSION,
+            "sectioning": summarizer.sectioning,
+            "backend": "groq" if summarizer.groq_client else "fallback"
+        }
+    }
+
+
+# Stage handlers: handler(job, cache, report) stores its output in the
+# PipelineCache and raises on failure. The download and Whisper modules are
+# imported lazily so each worker process only loads what its stage needs.
+
+def download_stage(job: Dict, cache: PipelineCache, report: Callable[[float, str], None]):
+    from youtube_fetcher import download_video_audio, fetch_captions
+
+    video_id, params = job['video_id'], job['params']['transcript']
+    if get_transcript(cache, video_id, params) is not None or cache.get_file(video_id, "audio"):
+        return
+    if params.get('captions', 'off') != 'off':
+        report(0.0, "Checking captions")
+        transcription = fetch_captions(job['url'], policy=params['captions'])
+        if transcription:
+            # The transcribe stage finds this and skips Whisper
+            put_transcript(cache, video_id, params, transcription)
+            return
+    report(0.0, "Downloading audio")
+    downloaded = download_video_audio(job['url'])
+    if not downloaded:
+        raise RuntimeError("Failed to download audio")
+    cache.put_file(job['video_id'], "audio", None, downloaded)
+
+
+def transcribe_stage(job: Dict, cache: PipelineCache, report: Callable[[float, str], None]):
+    from transcription import transcribe_audio_stream
+
+    video_id, params = job['video_id'], job['params']['transcript']
+    if get_transcript(cache, video_id, params) is not None:
+        return
+    audio_path = cache.get_file(video_id, "audio")
+    if not audio_path:
+        raise RuntimeError("Audio missing from cache")
+
+    length = job['params'].get('length') or 0
+    segments = []
+    info = {}
+    for segment in transcribe_audio_stream(
+        audio_path,
+        model_size=params['model_size'],
+        timestamp_resolution=params['timestamps'],
+        workers=int(os.getenv('WHISPER_WORKERS', '1')),
+        info=info
+    ):
+        segments.append(segment)
+        report(segment['end'] / length if length else 0.0, f"Transcribed {int(segment['end'])}s")
+    if not segments:
+        raise RuntimeError("Transcription produced no segments")
+    put_transcript(cache, video_id, params, {
+        "text": " ".join(seg["text"] for seg in segments),
+        "segments": segments,
+        "language": info.get("language", "en")
+    })
+
+
+def summarize_stage(job: Dict, cache: PipelineCache, report: Callable[[float, str], None]):
+    video_id, params = job['video_id'], job['params']['summary']
+    cached = cache.get(video_id, "summary", params)
+    if cached and not is_degraded(cached):
+        return
+    transcription = get_transcript(cache, video_id, job['params']['transcript'])
+    if not transcription:
+        raise RuntimeError("Transcript missing from cache")
+
+    summarizer = YouTubeSummarizer(sectioning=params.get('sectioning'))
+    end = transcription['segments'][-1]['end'] or 1.0
+    section_summaries = []
+    for section_summary in summarizer.generate_summary_stream(transcription['segments']):
+        section_summaries.append(section_summary)
+        report(0.9 * section_summary['end'] / end, f"Summarized {len(section_summaries)} sections")
+
+    report(0.9, "Merging chapters")
+    summary = summarizer.build_summary(section_summaries, transcription['language'])
+    summary['metadata']['video_id'] = video_id
+    summary = summarizer.generate_hierarchical_summary(summary, cache=cache)
+    cache.put(video_id, "summary", params, summary)
+    # Unkeyed copy is what VideoAssistant.load_summary(video_id=...) reads
+    cache.put(video_id, "summary", None, summary)
+    enforce_disk_quota(cache, max_bytes=int(os.getenv('DOWNLOADS_MAX_BYTES', str(DEFAULT_DOWNLOADS_MAX_BYTES))))
+
+
+STAGE_HANDLERS = {
+    "download": download_stage,
+    "transcribe": transcribe_stage,
+    "summarize": summarize_stage,
+}
+
+
+def _stage_worker(
+    queue_path: str,
+    cache_root: str,
+    cache_max_bytes: int,
+    stage: str,
+    handler: Callable,
+    stop: multiprocessing.Event,
+    poll_interval: float,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    metrics_queue: Optional[multiprocessing.Queue] = None
+):
+    if os.getenv('METRICS_JSON_LOGS', '0') == '1':
+        configure_json_logging()
+    # Forked workers inherit the parent's metrics; only send back their own
+    registry.reset()
+    queue = JobQueue(queue_path, lease_seconds)
+    cache = PipelineCache(cache_root, cache_max_bytes)
+    worker = worker_id()
+    while not stop.is_set():
+        job = queue.claim(stage, worker)
+        if job is None:
+            stop.wait(poll_interval)
+            continue
+        try:
+            with timed(f"job_{stage}") as fields, _lease_heartbeat(queue, job['id'], worker):
+                fields['video_id'] = job['video_id']
+                handler(job, cache, lambda progress, message="": queue.report(job['id'], progress, message, worker))
+            finished = queue.complete_stage(job['id'], worker)
+        except Exception as e:
+            traceback.print_exc()
+            finished = queue.fail(job['id'], f"{stage} failed: {e}", worker)
+        if not finished:
+            # Lost the lease (e.g. the heartbeat stalled); the job belongs to
+            # whichever worker reclaimed it, so leave its state alone
+            registry.inc("job_leases_lost_total", help="Stage runs whose result was dropped after losing the lease",
+                         stage=stage)
+        if metrics_queue is not None:
+            metrics_queue.put(registry.drain())
+
+
+def _default_concurrency() -> Dict[str, int]:
+    return {stage: int(os.getenv(f'JOB_{stage.upper()}_WORKERS', '1')) for stage in STAGES}
+
+
+class WorkerPool:
+    """
+    Worker processes for the pipeline stages, `concurrency[stage]` per stage
+    (JOB_DOWNLOAD_WORKERS, JOB_TRANSCRIBE_WORKERS, JOB_SUMMARIZE_WORKERS,
+    default 1 each). Jobs whose workers died (their lease expired) are
+    requeued on start; jobs other live pools on the same queue are running
+    are not touched. Metrics the workers record (stage timings, Whisper
+    inference, LLM requests and tokens) are sent back after every job and
+    merged into this process's registry, which serves /metrics.
+    """
+
+    def __init__(
+        self,
+        queue_path: str = DEFAULT_QUEUE_PATH,
+        cache_root: str = DEFAULT_CACHE_DIR,
+        cache_max_bytes: int = DEFAULT_MAX_BYTES,
+        concurrency: Optional[Dict[str, int]] = None,
+        handlers: Optional[Dict[str, Callable]] = None,
+        poll_interval: float = 0.5,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS
+    ):
+        self.queue = JobQueue(queue_path, lease_seconds)
+        self.cache_root = cache_root
+        self.cache_max_bytes = cache_max_bytes
+        self.concurrency = {**_default_concurrency(), **(concurrency or {})}
+        self.handlers = {**STAGE_HANDLERS, **(handlers or {})}
+        self.poll_interval = poll_interval
+        self._stop = multiprocessing.Event()
+        self._processes: List[multiprocessing.Process] = []
+        self._metrics_queue = multiprocessing.Queue()
+        self._metrics_thread: Optional[threading.Thread] = None
+
+    def _collect_metrics(self):
+        while True:
+            snapshot = self._metrics_queue.get()
+            if snapshot is None:
+                return
+            registry.merge(snapshot)
+
+    def start(self):
+        self.queue.recover()
+        self._metrics_thread = threading.Thread(target=self._collect_metrics, daemon=True)
+        self._metrics_thread.start()
+        for stage in STAGES:
+            for _ in range(self.concurrency[stage]):
+                process = multiprocessing.Process(
+                    target=_stage_worker,
+                    args=(self.queue.path, self.cache_root, self.cache_max_bytes, stage, self.handlers[stage],
+                          self._stop, self.poll_interval, self.queue.lease_seconds, self._metrics_queue),
+                    daemon=True
+                )
+                process.start()
+                self._processes.append(process)
+        return self
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        if self._metrics_thread is not None:
+            self._metrics_queue.put(None)
+            self._metrics_thread.join(timeout)
+            self._metrics_thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
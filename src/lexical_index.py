@@ -0,0 +1,108 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from vector_index import top_k_indices
+
+# Words, numbers and dotted/dashed identifiers such as np.argpartition, gpt-4, 3.14
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+(?:[.\-][a-z0-9_]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase tokens; compound identifiers also contribute their parts"""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        if "." in token or "-" in token:
+            tokens.extend(part for part in re.split(r"[.\-]", token) if part)
+    return tokens
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index (term -> [(doc_id, term frequency)]).
+    Documents are added incrementally and get consecutive ids from 0.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+        self.total_length = 0
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, text: str) -> int:
+        doc_id = len(self.doc_lengths)
+        tokens = tokenize(text)
+        for term, tf in Counter(tokens).items():
+            self.postings[term].append((doc_id, tf))
+            self._arrays.pop(term, None)
+        self.doc_lengths.append(len(tokens))
+        self.total_length += len(tokens)
+        return doc_id
+
+    def _term_arrays(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        # Postings are converted to arrays once and reused until the term changes
+        if term not in self._arrays:
+            postings = self.postings[term]
+            self._arrays[term] = (
+                np.fromiter((d for d, _ in postings), dtype=np.int64, count=len(postings)),
+                np.fromiter((tf for _, tf in postings), dtype=np.float32, count=len(postings))
+            )
+        return self._arrays[term]
+
+    def scores(self, query: str) -> np.ndarray:
+        n_docs = len(self.doc_lengths)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        if n_docs == 0:
+            return scores
+        avg_length = self.total_length / n_docs or 1.0
+        doc_lengths = np.asarray(self.doc_lengths, dtype=np.float32)
+
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            doc_ids, tfs = self._term_arrays(term)
+            idf = math.log(1 + (n_docs - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * doc_lengths[doc_ids] / avg_length)
+            scores[doc_ids] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+        return scores
+
+    def search(self, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (doc_ids, scores) of the k best matching documents with a positive score"""
+        scores = self.scores(query)
+        indices = top_k_indices(scores, k)
+        indices = indices[scores[indices] > 0]
+        return indices, scores[indices]
+
+    def to_dict(self) -> Dict:
+        return {
+            'k1': self.k1,
+            'b': self.b,
+            'postings': self.postings,
+            'doc_lengths': self.doc_lengths
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "BM25Index":
+        index = cls(data['k1'], data['b'])
+        index.postings.update(
+            (term, [tuple(p) for p in postings]) for term, postings in data['postings'].items()
+        )
+        index.doc_lengths = list(data['doc_lengths'])
+        index.total_length = sum(index.doc_lengths)
+        return index
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = 60) -> List[int]:
+    """Fuse several best-first rankings of ids: score(id) = sum 1 / (k + rank)"""
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[int(doc_id)] += 1.0 / (k + rank + 1)
+    return sorted(fused, key=fused.get, reverse=True)
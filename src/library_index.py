@@ -0,0 +1,297 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from vector_index import top_k_indices
+
+DEFAULT_LIBRARY_DIR = os.path.join("downloads", "library")
+
+
+def create_youtube_timestamp_link(video_id: str, seconds: float) -> str:
+    """Create YouTube link with timestamp"""
+    return f"https://youtu.be/{video_id}?t={int(seconds)}"
+
+
+def _atomic_save(path: str, array: np.ndarray):
+    tmp_path = path + ".tmp.npy"
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+class LibraryIndex:
+    """
+    Cross-video semantic index stored on disk under `root`.
+
+    Vectors (normalized float32) are appended to a raw `vectors.f32` file and
+    their records (video_id, start, end, text, kind) to `records.jsonl`, with a
+    byte-offset table so any record is one seek away. `build()` trains an IVF
+    (inverted file) index: k-means centroids plus the vectors regrouped by
+    nearest centroid, so a query only scans the `nprobe` closest lists.
+    Vectors added after the last build are searched exhaustively until the
+    next build. Everything is memory-mapped; nothing is loaded up front.
+
+    Single writer per library directory; any number of readers. A
+    long-lived instance picks up what other processes added whenever
+    meta.json changes on disk. Builds train on a snapshot outside the
+    writer lock, so add() stays cheap while one runs (in the background
+    with maybe_build(background=True)).
+    """
+
+    def __init__(self, root: str = DEFAULT_LIBRARY_DIR, dim: Optional[int] = None):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()  # one build at a time
+        self._build_thread: Optional[threading.Thread] = None
+        self._meta_version = None
+        self.meta = self._read_meta() or {
+            'dim': dim, 'count': 0, 'records_bytes': 0,
+            'indexed_count': 0, 'n_lists': 0, 'videos': []
+        }
+        self._ivf = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _stat_meta(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self._path("meta.json"))
+        except FileNotFoundError:
+            return None
+        # meta.json is replaced atomically, so a new write is a new inode
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _read_meta(self) -> Optional[Dict]:
+        if not os.path.exists(self._path("meta.json")):
+            return None
+        self._meta_version = self._stat_meta()
+        with open(self._path("meta.json"), "r") as f:
+            return json.load(f)
+
+    def _write_meta(self):
+        tmp_path = self._path("meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self._path("meta.json"))
+        self._meta_version = self._stat_meta()
+
+    def refresh(self):
+        """Reload meta.json (and drop the loaded IVF lists) if another process changed it"""
+        version = self._stat_meta()
+        if version is not None and version != self._meta_version:
+            self.meta = self._read_meta()
+            self._ivf = None
+
+    @property
+    def videos(self) -> List[str]:
+        self.refresh()
+        return list(self.meta['videos'])
+
+    def __len__(self) -> int:
+        self.refresh()
+        return self.meta['count']
+
+    def __contains__(self, video_id: str) -> bool:
+        self.refresh()
+        return video_id in self.meta['videos']
+
+    # Writing
+
+    def add(self, video_id: str, vectors: np.ndarray, records: List[Dict]) -> bool:
+        """
+        Append a video's vectors and their records ({'start', 'end', 'text',
+        'kind'}). Returns False if the video is already in the library.
+        """
+        if len(vectors) != len(records):
+            raise ValueError("Need one record per vector")
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+        with self._lock:
+            self.refresh()
+            if video_id in self.meta['videos']:
+                return False
+            if self.meta['dim'] is None:
+                self.meta['dim'] = vectors.shape[1]
+            if vectors.shape[1] != self.meta['dim']:
+                raise ValueError(f"Expected {self.meta['dim']}-dim vectors, got {vectors.shape[1]}")
+
+            # Drop bytes left behind by an add that crashed before updating meta
+            self._truncate("records.jsonl", self.meta['records_bytes'])
+            self._truncate("records.idx", self.meta['count'] * 8)
+            self._truncate("vectors.f32", self.meta['count'] * self.meta['dim'] * 4)
+
+            offsets = []
+            with open(self._path("records.jsonl"), "ab") as f:
+                for record in records:
+                    offsets.append(f.tell())
+                    f.write((json.dumps({**record, 'video_id': video_id}) + "\n").encode("utf-8"))
+                records_bytes = f.tell()
+            with open(self._path("records.idx"), "ab") as f:
+                f.write(np.asarray(offsets, dtype=np.uint64).tobytes())
+            with open(self._path("vectors.f32"), "ab") as f:
+                f.write(vectors.tobytes())
+
+            # meta.json is written last: a crash before this leaves the
+            # appended bytes unreferenced, and the next add truncates them
+            self.meta['count'] += len(vectors)
+            self.meta['records_bytes'] = records_bytes
+            self.meta['videos'].append(video_id)
+            self._write_meta()
+            return True
+
+    def _truncate(self, name: str, size: int):
+        path = self._path(name)
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            os.truncate(path, size)
+
+    def _vectors(self) -> np.ndarray:
+        if self.meta['count'] == 0:
+            return np.zeros((0, self.meta['dim'] or 0), dtype=np.float32)
+        return np.memmap(
+            self._path("vectors.f32"), dtype=np.float32, mode="r",
+            shape=(self.meta['count'], self.meta['dim'])
+        )
+
+    def build(
+        self,
+        n_lists: Optional[int] = None,
+        iterations: int = 10,
+        sample_size: int = 100000,
+        block_rows: int = 16384,
+        seed: int = 0
+    ):
+        """Train IVF centroids (spherical k-means) and regroup all vectors by list"""
+        with self._build_lock:
+            # Snapshot under the writer lock, then train without it: the
+            # files are append-only, so the first `count` vectors cannot change
+            with self._lock:
+                self.refresh()
+                count, dim = self.meta['count'], self.meta['dim']
+                vectors = self._vectors()
+            if count == 0:
+                return
+            n_lists = n_lists or max(1, int(np.sqrt(count)))
+
+            rng = np.random.default_rng(seed)
+            sample_ids = np.sort(rng.choice(count, size=min(count, sample_size), replace=False))
+            sample = np.asarray(vectors[sample_ids])
+            centroids = sample[rng.choice(len(sample), size=min(n_lists, len(sample)), replace=False)].copy()
+            for _ in range(iterations):
+                assignment = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assignment, sample)
+                norms = np.linalg.norm(sums, axis=1, keepdims=True)
+                empty = norms[:, 0] == 0
+                centroids[~empty] = sums[~empty] / norms[~empty]
+
+            assignment = np.empty(count, dtype=np.int32)
+            for start in range(0, count, block_rows):
+                block = np.asarray(vectors[start:start + block_rows])
+                assignment[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+
+            order = np.argsort(assignment, kind="stable")
+            offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(assignment, minlength=len(centroids)), out=offsets[1:])
+
+            grouped = np.lib.format.open_memmap(
+                self._path("ivf_vectors.npy.tmp.npy"), mode="w+",
+                dtype=np.float32, shape=(count, dim)
+            )
+            for start in range(0, count, block_rows):
+                grouped[start:start + block_rows] = vectors[order[start:start + block_rows]]
+            grouped.flush()
+            del grouped
+
+            with self._lock:
+                os.replace(self._path("ivf_vectors.npy.tmp.npy"), self._path("ivf_vectors.npy"))
+                _atomic_save(self._path("ivf_ids.npy"), order.astype(np.int64))
+                _atomic_save(self._path("ivf_offsets.npy"), offsets)
+                _atomic_save(self._path("ivf_centroids.npy"), centroids.astype(np.float32))
+                # Videos added during the build stay in the exhaustive tail
+                self.refresh()
+                self.meta['indexed_count'] = count
+                self.meta['n_lists'] = len(centroids)
+                self._write_meta()
+                self._ivf = None
+
+    def maybe_build(self, min_unindexed: int = 1000, growth: float = 0.2, background: bool = False) -> bool:
+        """
+        Rebuild once enough vectors have been added since the last build.
+        With `background`, the build runs on a daemon thread (at most one
+        at a time) and this returns right away.
+        """
+        self.refresh()
+        unindexed = self.meta['count'] - self.meta['indexed_count']
+        if unindexed < max(min_unindexed, growth * self.meta['indexed_count']):
+            return False
+        if not background:
+            self.build()
+            return True
+        with self._lock:
+            if self._build_thread is not None and self._build_thread.is_alive():
+                return False
+            self._build_thread = threading.Thread(target=self.build, name="library-build", daemon=True)
+            self._build_thread.start()
+        return True
+
+    # Reading
+
+    def _load_ivf(self) -> Optional[Dict]:
+        if self._ivf is None and self.meta['indexed_count']:
+            self._ivf = {
+                name: np.load(self._path(f"ivf_{name}.npy"), mmap_mode="r")
+                for name in ("vectors", "ids", "offsets", "centroids")
+            }
+            self._ivf['offsets'] = np.asarray(self._ivf['offsets'])
+            self._ivf['centroids'] = np.asarray(self._ivf['centroids'])
+        return self._ivf
+
+    def _record(self, row: int, offsets: np.ndarray, f) -> Dict:
+        f.seek(int(offsets[row]))
+        return json.loads(f.readline())
+
+    def search(self, query: np.ndarray, k: int = 10, nprobe: int = 8) -> List[Dict]:
+        """
+        Return the k closest records as dicts with 'video_id', 'start', 'end',
+        'text', 'kind', 'score' and a 'link' to that moment on YouTube.
+        """
+        self.refresh()
+        if self.meta['count'] == 0:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        candidate_ids = []
+        candidate_scores = []
+
+        ivf = self._load_ivf()
+        if ivf is not None:
+            lists = top_k_indices(ivf['centroids'] @ query, nprobe)
+            for lst in lists:
+                lo, hi = ivf['offsets'][lst], ivf['offsets'][lst + 1]
+                if lo == hi:
+                    continue
+                candidate_scores.append(ivf['vectors'][lo:hi] @ query)
+                candidate_ids.append(ivf['ids'][lo:hi])
+
+        # Vectors added since the last build are scanned exhaustively
+        indexed = self.meta['indexed_count']
+        if indexed < self.meta['count']:
+            tail = self._vectors()[indexed:]
+            candidate_scores.append(tail @ query)
+            candidate_ids.append(np.arange(indexed, self.meta['count']))
+
+        if not candidate_ids:
+            return []
+        scores = np.concatenate(candidate_scores)
+        ids = np.concatenate(candidate_ids)
+        best = top_k_indices(scores, k)
+
+        offsets = np.memmap(self._path("records.idx"), dtype=np.uint64, mode="r", shape=(self.meta['count'],))
+        hits = []
+        with open(self._path("records.jsonl"), "rb") as f:
+            for i in best:
+                record = self._record(ids[i], offsets, f)
+                record['score'] = float(scores[i])
+                record['link'] = create_youtube_timestamp_link(record['video_id'], record['start'])
+                hits.append(record)
+        return hits
@@ -0,0 +1,132 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Optional, TypeVar
+from dotenv import load_dotenv
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+load_dotenv()
+GROQ_API_KEY = os.getenv('GROQ_API_KEY')
+GROQ_BASE_URL = os.getenv('GROQ_BASE_URL', "https://api.groq.com/openai/v1")
+
+T = TypeVar("T")
+
+
+def create_groq_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> Optional["OpenAI"]:
+    """
+    Build an OpenAI-compatible client for Groq (or GROQ_BASE_URL, e.g. a local
+    fake server). Retries are left to call_with_retry so they share the rate limiter.
+    """
+    api_key = api_key or GROQ_API_KEY
+    if not api_key:
+        return None
+    # Imported here: the openai package takes about a second to import
+    from openai import OpenAI
+    return OpenAI(api_key=api_key, base_url=base_url or GROQ_BASE_URL, max_retries=0)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English)"""
+    return max(1, len(text) // 4)
+
+
+class RateLimiter:
+    """
+    Sliding one-minute window limiter for requests and tokens per minute.
+    A limit of None or 0 disables that dimension.
+    """
+
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None):
+        self.requests_per_minute = requests_per_minute or None
+        self.tokens_per_minute = tokens_per_minute or None
+        self.window = 60.0
+        self._requests = deque()  # timestamps of admitted requests
+        self._tokens = deque()  # (timestamp, tokens), one entry per acquire or record_tokens
+        self._tokens_in_window = 0
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float):
+        while self._requests and now - self._requests[0] >= self.window:
+            self._requests.popleft()
+        while self._tokens and now - self._tokens[0][0] >= self.window:
+            _, tokens = self._tokens.popleft()
+            self._tokens_in_window -= tokens
+
+    def _wait_time(self, now: float, tokens: int) -> float:
+        waits = [0.0]
+        if self.requests_per_minute and len(self._requests) >= self.requests_per_minute:
+            waits.append(self._requests[0] + self.window - now)
+        if self.tokens_per_minute and self._tokens and \
+                self._tokens_in_window + tokens > self.tokens_per_minute:
+            # Wait until enough old usage leaves the window to fit this one
+            freed = self._tokens_in_window
+            for ts, event_tokens in self._tokens:
+                freed -= event_tokens
+                if freed + tokens <= self.tokens_per_minute:
+                    waits.append(ts + self.window - now)
+                    break
+        return max(waits)
+
+    def acquire(self, tokens: int = 0):
+        """Block until a request of `tokens` fits in the budget, then record it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._prune(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    self._requests.append(now)
+                    if tokens > 0:
+                        self._tokens.append((now, tokens))
+                        self._tokens_in_window += tokens
+                    return
+            time.sleep(wait)
+
+    def record_tokens(self, tokens: int):
+        """Account for tokens only known after the response (e.g. completion tokens); not a request"""
+        if tokens <= 0:
+            return
+        with self._lock:
+            self._tokens.append((time.monotonic(), tokens))
+            self._tokens_in_window += tokens
+
+
+def _is_retryable(error: Exception) -> bool:
+    from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+    if isinstance(error, (RateLimitError, APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    max_retries: int = 4,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0
+) -> T:
+    """Call `fn`, retrying 429/5xx/connection errors with jittered exponential backoff"""
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == max_retries or not _is_retryable(e):
+                raise
+            delay = _retry_after(e)
+            if delay is None:
+                delay = min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+            print(f"LLM request failed ({e.__class__.__name__}), retrying in {delay:.1f}s...")
+            time.sleep(delay)
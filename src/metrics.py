@@ -0,0 +1,254 @@
+import bisect
+import cProfile
+import functools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Optional, Tuple
+
+# Seconds; spans sub-millisecond retrieval up to hour-long transcriptions
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+
+logger = logging.getLogger("pipeline.metrics")
+
+
+def _label_text(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and histograms keyed by name and labels, rendered in
+    the Prometheus text exposition format. Each process has its own
+    registry: worker processes drain() theirs and send the snapshot to the
+    parent, which merge()s it, so the parent's /metrics covers them too.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[Tuple[str, tuple], float] = {}
+        self._histograms: Dict[Tuple[str, tuple], Dict] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: Dict) -> Tuple[str, tuple]:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def _describe(self, name: str, kind: str, help: str):
+        if help or name not in self._help:
+            self._help[name] = (kind, help)
+
+    def inc(self, name: str, value: float = 1.0, help: str = "", **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._describe(name, "counter", help)
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, help: str = "", **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._describe(name, "histogram", help)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {
+                    'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0
+                }
+            histogram['counts'][bisect.bisect_left(self.buckets, value)] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def counter_value(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(self._key(name, labels), 0.0)
+
+    def histogram_count(self, name: str, **labels) -> int:
+        with self._lock:
+            histogram = self._histograms.get(self._key(name, labels))
+            return histogram['count'] if histogram else 0
+
+    def histogram_sum(self, name: str, **labels) -> float:
+        with self._lock:
+            histogram = self._histograms.get(self._key(name, labels))
+            return histogram['sum'] if histogram else 0.0
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for name, (kind, help) in sorted(self._help.items()):
+                lines.append(f"# HELP {name} {help or name}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "counter":
+                    for (metric, labels), value in sorted(self._counters.items()):
+                        if metric == name:
+                            lines.append(f"{name}{_label_text(labels)} {value:g}")
+                    continue
+                for (metric, labels), histogram in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(self.buckets + (float("inf"),), histogram['counts']):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{name}_bucket{_label_text(labels, 'le=' + json.dumps(le))} {cumulative}")
+                    lines.append(f"{name}_sum{_label_text(labels)} {histogram['sum']:g}")
+                    lines.append(f"{name}_count{_label_text(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def drain(self) -> Dict:
+        """Picklable snapshot of everything recorded so far, clearing the registry"""
+        with self._lock:
+            snapshot = {
+                'help': dict(self._help),
+                'counters': list(self._counters.items()),
+                'histograms': [(key, dict(h, counts=list(h['counts']))) for key, h in self._histograms.items()]
+            }
+            self._help.clear()
+            self._counters.clear()
+            self._histograms.clear()
+        return snapshot
+
+    def merge(self, snapshot: Dict):
+        """Add a snapshot drained from another process's registry"""
+        with self._lock:
+            for name, (kind, help) in snapshot['help'].items():
+                self._describe(name, kind, help)
+            for key, value in snapshot['counters']:
+                self._counters[key] = self._counters.get(key, 0.0) + value
+            for key, other in snapshot['histograms']:
+                histogram = self._histograms.setdefault(
+                    key, {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+                )
+                histogram['counts'] = [a + b for a, b in zip(histogram['counts'], other['counts'])]
+                histogram['sum'] += other['sum']
+                histogram['count'] += other['count']
+
+    def reset(self):
+        with self._lock:
+            self._help.clear()
+            self._counters.clear()
+            self._histograms.clear()
+
+
+registry = MetricsRegistry()
+
+
+def log_event(event: str, **fields):
+    """One structured log record; JSON when configure_json_logging is active"""
+    logger.info(event, extra={'fields': fields})
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({
+            'ts': round(record.created, 3),
+            'level': record.levelname.lower(),
+            'event': record.getMessage(),
+            **getattr(record, 'fields', {})
+        }, default=str)
+
+
+def configure_json_logging(level: int = logging.INFO):
+    """Send metric events to stderr as one JSON object per line (idempotent)"""
+    if any(isinstance(h.formatter, JsonFormatter) for h in logger.handlers):
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+@contextmanager
+def timed(stage: str, **labels) -> Iterator[Dict]:
+    """
+    Time a block into the `stage_seconds` histogram (label stage=...) and log
+    it. The yielded dict can be filled with extra log fields; failures are
+    also counted in `stage_errors_total`.
+    """
+    fields: Dict = {}
+    started = time.perf_counter()
+    try:
+        with profiled(stage):
+            yield fields
+    except BaseException as e:
+        registry.inc("stage_errors_total", help="Failed pipeline stage runs", stage=stage, **labels)
+        fields['error'] = repr(e)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        registry.observe("stage_seconds", elapsed, help="Pipeline stage latency", stage=stage, **labels)
+        log_event("stage", stage=stage, seconds=round(elapsed, 4), **labels, **fields)
+
+
+def timed_function(stage: str, **labels):
+    """Decorator form of timed() for functions whose whole call is one stage"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(stage, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Sampled profiling: PROFILE_SAMPLE_RATE of timed() stages run under cProfile
+# and dump a .prof file (pstats/snakeviz) into PROFILE_DIR. For whole-process
+# sampling without code changes, attach py-spy instead:
+#   py-spy record -o profile.svg -- streamlit run src/app.py
+_profile_lock = threading.Lock()
+
+
+@contextmanager
+def profiled(name: str, sample_rate: Optional[float] = None, directory: Optional[str] = None):
+    rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0")) if sample_rate is None else sample_rate
+    # Only one profiler can be active per process: nested or concurrent
+    # stages are skipped while another one is being profiled
+    if rate <= 0 or random.random() >= rate or not _profile_lock.acquire(blocking=False):
+        yield
+        return
+
+    try:
+        directory = directory or os.getenv("PROFILE_DIR", os.path.join("downloads", "profiles"))
+        os.makedirs(directory, exist_ok=True)
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            path = os.path.join(directory, f"{name}-{int(time.time() * 1000)}-{os.getpid()}.prof")
+            profile.dump_stats(path)
+            log_event("profile", stage=name, path=path)
+    finally:
+        _profile_lock.release()
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve GET /metrics from a daemon thread"""
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
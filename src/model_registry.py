@@ -0,0 +1,76 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List
+
+
+class ModelRegistry:
+    """
+    Process-wide, thread-safe cache of loaded models with LRU eviction.
+
+    Models are loaded once per key by `loader(key)` and shared by every caller
+    in the process (Streamlit sessions, worker threads). Concurrent requests
+    for the same key wait on a single load instead of loading it twice.
+    """
+
+    def __init__(self, loader: Callable[[Hashable], Any], max_models: int = 2):
+        if max_models < 1:
+            raise ValueError("max_models must be at least 1")
+        self.loader = loader
+        self.max_models = max_models
+        self._models: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+
+    def get(self, key: Hashable) -> Any:
+        """Return the model for `key`, loading it on first use"""
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another thread may have finished loading while we waited
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key]
+
+            model = self.loader(key)
+
+            with self._lock:
+                self._models[key] = model
+                self._models.move_to_end(key)
+                while len(self._models) > self.max_models:
+                    evicted, _ = self._models.popitem(last=False)
+                    print(f"Evicted model {evicted} from cache")
+                self._key_locks.pop(key, None)
+            return model
+
+    def warm_up(self, keys: Iterable[Hashable]) -> List[Hashable]:
+        """Load the given models ahead of the first request"""
+        loaded = []
+        for key in keys:
+            self.get(key)
+            loaded.append(key)
+        return loaded
+
+    def evict(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._models.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def keys(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._models.keys())
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._models
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._models)
@@ -0,0 +1,263 @@
+from typing import Dict, List, Mapping, Optional, Tuple
+import numpy as np
+from lexical_index import TOKEN_PATTERN
+from extractive import STOPWORDS
+from transcript_store import CompactTranscript
+
+# A run of question words marks an exact citation only when it is specific:
+# this many non-stopwords, or one word spoken at most RARE_TERM_COUNT times
+MIN_CONTENT_TOKENS = 2
+RARE_TERM_COUNT = 3
+# Longest run of question words tried, bounding locate() for long questions
+MAX_RUN_TOKENS = 8
+
+
+def phrase_tokens(text: str) -> List[str]:
+    """Lowercase word tokens in order (compound identifiers such as gpt-4 kept whole)"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _timed_tokens(segment: Mapping) -> List[Tuple[str, float, float]]:
+    """(token, start, end) for a segment, from its words or spread evenly over its text"""
+    words = segment.get("words") or []
+    if words:
+        return [(token, word["start"], word["end"]) for word in words for token in phrase_tokens(word["word"])]
+    return _interpolated_tokens(segment)
+
+
+def _interpolated_tokens(segment: Mapping) -> List[Tuple[str, float, float]]:
+    tokens = phrase_tokens(segment["text"])
+    step = (segment["end"] - segment["start"]) / max(len(tokens), 1)
+    return [
+        (token, segment["start"] + k * step, segment["start"] + (k + 1) * step)
+        for k, token in enumerate(tokens)
+    ]
+
+
+def _postings(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """CSR postings: (sorted distinct keys, offsets, positions grouped by key in ascending order)"""
+    order = np.argsort(keys, kind="stable").astype(np.int32)
+    distinct, starts = np.unique(keys[order], return_index=True)
+    offsets = np.append(starts, len(keys)).astype(np.int64)
+    return distinct, offsets, order
+
+
+class PhraseIndex:
+    """
+    Positional inverted index over a transcript's word timestamps.
+
+    Every token has a position, a start/end time and its segment. Postings
+    for single terms and for adjacent term pairs (bigrams) are stored as
+    sorted position arrays, so a phrase is found by taking its rarest bigram
+    and checking only those positions: lookups cost O(log n + candidates),
+    never a scan of the transcript. Segments without word timestamps have
+    their tokens spread evenly over the segment.
+    """
+
+    def __init__(self, terms: Dict[str, int], token_ids: np.ndarray, token_start: np.ndarray,
+                 token_end: np.ndarray, token_segment: np.ndarray):
+        self.terms = terms
+        self.token_ids = token_ids
+        self.token_start = token_start
+        self.token_end = token_end
+        self.token_segment = token_segment
+        # Times used to map a time range to positions; made non-decreasing in
+        # case word timestamps overlap slightly
+        self._range_times = np.maximum.accumulate(token_start) if len(token_start) else token_start
+        # Term ids are dense, so term postings are indexed by id directly
+        self._term_positions = np.argsort(token_ids, kind="stable").astype(np.int32)
+        self._term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(token_ids, minlength=len(terms)), out=self._term_offsets[1:])
+        self._vocabulary = max(len(terms), 1)
+        bigrams = token_ids[:-1].astype(np.int64) * self._vocabulary + token_ids[1:]
+        self._bigram_keys, self._bigram_offsets, self._bigram_positions = _postings(bigrams)
+
+    @classmethod
+    def from_transcription(cls, transcription: Mapping) -> "PhraseIndex":
+        if isinstance(transcription, CompactTranscript) and transcription.meta.get("has_words"):
+            return cls._from_compact(transcription)
+        terms: Dict[str, int] = {}
+        ids, starts, ends, segment_ids = [], [], [], []
+        for i, segment in enumerate(transcription["segments"]):
+            for token, start, end in _timed_tokens(segment):
+                ids.append(terms.setdefault(token, len(terms)))
+                starts.append(start)
+                ends.append(end)
+                segment_ids.append(i)
+        return cls(
+            terms,
+            np.asarray(ids, dtype=np.int32),
+            np.asarray(starts, dtype=np.float32),
+            np.asarray(ends, dtype=np.float32),
+            np.asarray(segment_ids, dtype=np.int32)
+        )
+
+    @classmethod
+    def _from_compact(cls, transcript: CompactTranscript) -> "PhraseIndex":
+        """
+        Build straight from the columnar word arrays: each distinct word
+        string is decoded and tokenized once, and no per-word dict is made
+        """
+        arrays = transcript.arrays()
+        word_ids = np.asarray(arrays["word_ids"], dtype=np.int64)
+        word_offsets = np.asarray(arrays["segment_word_offsets"], dtype=np.int64)
+        terms: Dict[str, int] = {}
+
+        # Term ids of every distinct word string, flattened with per-string offsets
+        string_count = len(arrays["string_offsets"]) - 1
+        token_counts = np.zeros(string_count, dtype=np.int64)
+        token_first = np.zeros(string_count, dtype=np.int64)
+        flat: List[int] = []
+        for string_id in np.unique(word_ids):
+            tokens = phrase_tokens(transcript.string(int(string_id)))
+            token_first[string_id], token_counts[string_id] = len(flat), len(tokens)
+            flat.extend(terms.setdefault(token, len(terms)) for token in tokens)
+
+        # Expand words into tokens (a word may hold zero or several)
+        counts = token_counts[word_ids]
+        word_of_token = np.repeat(np.arange(len(word_ids)), counts)
+        within_word = np.arange(len(word_of_token)) - np.repeat(np.cumsum(counts) - counts, counts)
+        ids = np.asarray(flat, dtype=np.int32)[token_first[word_ids][word_of_token] + within_word]
+        starts = np.asarray(arrays["word_start"])[word_of_token]
+        ends = np.asarray(arrays["word_end"])[word_of_token]
+        segment_of_word = np.repeat(np.arange(len(word_offsets) - 1), np.diff(word_offsets))
+        segment_ids = segment_of_word[word_of_token]
+
+        # Segments without words have their text spread over the segment
+        extra = [
+            (terms.setdefault(token, len(terms)), start, end, int(i))
+            for i in np.flatnonzero(np.diff(word_offsets) == 0)
+            for token, start, end in _interpolated_tokens(transcript["segments"][int(i)])
+        ]
+        if extra:
+            extra_ids, extra_starts, extra_ends, extra_segments = zip(*extra)
+            ids = np.concatenate([ids, np.asarray(extra_ids, dtype=np.int32)])
+            starts = np.concatenate([starts, np.asarray(extra_starts, dtype=np.float32)])
+            ends = np.concatenate([ends, np.asarray(extra_ends, dtype=np.float32)])
+            segment_ids = np.concatenate([segment_ids, np.asarray(extra_segments)])
+            order = np.argsort(segment_ids, kind="stable")
+            ids, starts, ends, segment_ids = ids[order], starts[order], ends[order], segment_ids[order]
+
+        return cls(
+            terms,
+            ids.astype(np.int32),
+            starts.astype(np.float32),
+            ends.astype(np.float32),
+            segment_ids.astype(np.int32)
+        )
+
+    def __len__(self) -> int:
+        return len(self.token_ids)
+
+    def _position_range(self, start_time: Optional[float], end_time: Optional[float]):
+        low = 0 if start_time is None else int(np.searchsorted(self._range_times, start_time, side="left"))
+        high = len(self) if end_time is None else int(np.searchsorted(self._range_times, end_time, side="right"))
+        return low, high
+
+    def _candidates(self, query_ids: List[int]) -> Tuple[np.ndarray, int]:
+        """Positions of the query's rarest term or bigram, and that term's offset in the query"""
+        if len(query_ids) == 1:
+            term = query_ids[0]
+            return self._term_positions[self._term_offsets[term]:self._term_offsets[term + 1]], 0
+        best = None
+        for j in range(len(query_ids) - 1):
+            key = query_ids[j] * self._vocabulary + query_ids[j + 1]
+            index = int(np.searchsorted(self._bigram_keys, key))
+            if index == len(self._bigram_keys) or self._bigram_keys[index] != key:
+                return np.zeros(0, dtype=np.int32), 0
+            count = self._bigram_offsets[index + 1] - self._bigram_offsets[index]
+            if best is None or count < best[0]:
+                best = (count, index, j)
+        _, index, j = best
+        return self._bigram_positions[self._bigram_offsets[index]:self._bigram_offsets[index + 1]], j
+
+    def _match_starts(self, query_ids: List[int], low: int, high: int) -> np.ndarray:
+        """Positions in [low, high) where the term ids `query_ids` occur in sequence"""
+        positions, offset = self._candidates(query_ids)
+        # Postings are sorted, so the position range is a slice of them
+        positions = positions[np.searchsorted(positions, low + offset):np.searchsorted(positions, high + offset)]
+        starts = positions.astype(np.int64) - offset
+        starts = starts[(starts >= 0) & (starts + len(query_ids) <= len(self))]
+        if len(query_ids) > 2 and len(starts):
+            window = self.token_ids[starts[:, None] + np.arange(len(query_ids))]
+            starts = starts[(window == np.asarray(query_ids)).all(axis=1)]
+        return starts
+
+    def search(
+        self,
+        phrase: str,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Occurrences of `phrase` (matched token by token, ignoring case and
+        punctuation), in order, optionally only those starting within
+        [start_time, end_time]. Each match has the exact 'start' of its first
+        word, the 'end' of its last word and its 'segment' index.
+        """
+        tokens = phrase_tokens(phrase)
+        if not tokens or any(token not in self.terms for token in tokens):
+            return []
+        query_ids = [self.terms[token] for token in tokens]
+        starts = self._match_starts(query_ids, *self._position_range(start_time, end_time))
+        if limit is not None:
+            starts = starts[:limit]
+
+        last = len(query_ids) - 1
+        return [
+            {
+                'start': round(float(self.token_start[s]), 3),
+                'end': round(float(self.token_end[s + last]), 3),
+                'segment': int(self.token_segment[s])
+            }
+            for s in starts
+        ]
+
+    def _has_bigram(self, first: str, second: str) -> bool:
+        key = self.terms[first] * self._vocabulary + self.terms[second]
+        index = int(np.searchsorted(self._bigram_keys, key))
+        return index < len(self._bigram_keys) and self._bigram_keys[index] == key
+
+    def term_count(self, token: str) -> int:
+        """Occurrences of `token` in the whole transcript"""
+        term = self.terms.get(token)
+        return 0 if term is None else int(self._term_offsets[term + 1] - self._term_offsets[term])
+
+    def _is_specific(self, run: List[str]) -> bool:
+        """Enough for a precise citation: two content words, or one rare content word"""
+        content = [token for token in run if token not in STOPWORDS]
+        return len(content) >= MIN_CONTENT_TOKENS or \
+            any(self.term_count(token) <= RARE_TERM_COUNT for token in content)
+
+    def locate(self, text: str, start_time: Optional[float] = None, end_time: Optional[float] = None) -> Optional[float]:
+        """
+        Start time of the longest run of `text`'s words (e.g. a question)
+        spoken within the time range, or None. Only specific runs count: at
+        least MIN_CONTENT_TOKENS non-stopwords, or a word that is rare in
+        the transcript, so one common word ("model") is not mistaken for the
+        moment a question is about. Runs longer than MAX_RUN_TOKENS are not
+        tried, which bounds the work for long questions.
+        """
+        low, high = self._position_range(start_time, end_time)
+        # Only runs of words the transcript contains, each pair of which is
+        # spoken somewhere in that order, can match
+        spans, current = [], []
+        for token in phrase_tokens(text) + [None]:
+            if current and (token not in self.terms or not self._has_bigram(current[-1], token)):
+                spans.append(current)
+                current = []
+            if token in self.terms:
+                current.append(token)
+
+        longest = min(max((len(span) for span in spans), default=0), MAX_RUN_TOKENS)
+        for length in range(longest, 0, -1):
+            for span in spans:
+                for first in range(len(span) - length + 1):
+                    run = span[first:first + length]
+                    if not self._is_specific(run):
+                        continue
+                    starts = self._match_starts([self.terms[token] for token in run], low, high)
+                    if len(starts):
+                        return round(float(self.token_start[starts[0]]), 3)
+        return None
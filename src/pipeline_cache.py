@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join("downloads", "cache")
+DEFAULT_MAX_BYTES = 5 * 1024 ** 3  # 5 GB
+
+
+class PipelineCache:
+    """
+    On-disk cache for pipeline stage outputs (metadata, audio, transcripts,
+    summaries, embeddings), stored per video id.
+
+    Entries are content-addressed by (video_id, stage, params) so changing the
+    model size or prompt version misses the cache instead of serving stale
+    results. Writes are atomic (temp file + rename) so a crash mid-write never
+    leaves a truncated entry, and the least recently used files are evicted
+    once the cache grows beyond `max_bytes`. A hit only touches the access
+    time, so the modification time stays the write time that `max_age`
+    checks against.
+    """
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _entry_path(self, video_id: str, stage: str, params: Optional[Dict], ext: str) -> str:
+        key = json.dumps(params or {}, sort_keys=True, default=str)
+        digest = hashlib.sha256(f"{video_id}\0{stage}\0{key}".encode()).hexdigest()[:16]
+        return os.path.join(self.root, video_id, f"{stage}-{digest}{ext}")
+
+    def _hit(self, path: str, max_age: Optional[float] = None) -> bool:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        now = time.time()
+        if max_age is not None and now - stat.st_mtime > max_age:
+            return False
+        os.utime(path, (now, stat.st_mtime))  # mark as recently used for eviction
+        return True
+
+    def _atomic_write(self, path: str, write: Callable[[Any], None], mode: str = "wb"):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, mode) as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict(keep=path)
+
+    # JSON values (metadata, transcripts, summaries)
+
+    def get(
+        self,
+        video_id: str,
+        stage: str,
+        params: Optional[Dict] = None,
+        max_age: Optional[float] = None
+    ) -> Optional[Any]:
+        """Cached value, or None if missing or written more than max_age seconds ago"""
+        path = self._entry_path(video_id, stage, params, ".json")
+        if not self._hit(path, max_age):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def put(self, video_id: str, stage: str, params: Optional[Dict], value: Any):
+        path = self._entry_path(video_id, stage, params, ".json")
+        self._atomic_write(
+            path,
+            lambda f: json.dump(value, f, ensure_ascii=False, default=str),
+            mode="w"
+        )
+
+    def get_or_compute(
+        self,
+        video_id: str,
+        stage: str,
+        params: Optional[Dict],
+        compute: Callable[[], Any],
+        max_age: Optional[float] = None
+    ) -> Any:
+        """Return the cached value or compute and store it. Falsy results are not cached."""
+        value = self.get(video_id, stage, params, max_age)
+        if value is not None:
+            return value
+        value = compute()
+        if value:
+            self.put(video_id, stage, params, value)
+        return value
+
+    # Files (downloaded audio)
+
+    def get_file(self, video_id: str, stage: str, params: Optional[Dict] = None) -> Optional[str]:
+        directory = os.path.join(self.root, video_id)
+        prefix = os.path.basename(self._entry_path(video_id, stage, params, ""))
+        if not os.path.isdir(directory):
+            return None
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and not name.endswith(".tmp"):
+                path = os.path.join(directory, name)
+                self._hit(path)
+                return path
+        return None
+
+    def put_file(self, video_id: str, stage: str, params: Optional[Dict], src_path: str, move: bool = True) -> str:
+        """Store a file (keeping its extension) and return its cached path"""
+        ext = os.path.splitext(src_path)[1]
+        path = self._entry_path(video_id, stage, params, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        os.close(fd)
+        try:
+            if move:
+                shutil.move(src_path, tmp_path)
+            else:
+                shutil.copyfile(src_path, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict(keep=path)
+        return path
+
+    # Arrays (embeddings)
+
+    def get_array(
+        self,
+        video_id: str,
+        stage: str,
+        params: Optional[Dict] = None,
+        mmap_mode: Optional[str] = None
+    ) -> Optional[np.ndarray]:
+        path = self._entry_path(video_id, stage, params, ".npy")
+        if not self._hit(path):
+            return None
+        return np.load(path, mmap_mode=mmap_mode)
+
+    def put_array(self, video_id: str, stage: str, params: Optional[Dict], array: np.ndarray):
+        path = self._entry_path(video_id, stage, params, ".npy")
+        self._atomic_write(path, lambda f: np.save(f, array))
+
+    # Eviction
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, path))
+        return entries
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, keep: Optional[str] = None, max_bytes: Optional[int] = None) -> int:
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= limit:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+            return removed
@@ -0,0 +1,92 @@
+import re
+from typing import Dict, List, Optional
+from llm_client import estimate_tokens
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[:max(0, max_tokens * 4 - 3)].rstrip() + "..."
+
+
+def compact_turns(turns: List[Dict], tokens_per_turn: int = 40) -> str:
+    """
+    Cheap extractive digest of old conversation turns: the first sentence of
+    each turn, truncated, so the gist survives without the full text.
+    """
+    lines = []
+    for turn in turns:
+        first_sentence = re.split(r"(?<=[.!?])\s", turn["content"].strip(), maxsplit=1)[0]
+        lines.append(f"{turn['role']}: {truncate_to_tokens(first_sentence, tokens_per_turn)}")
+    return "\n".join(lines)
+
+
+class PromptBuilder:
+    """
+    Packs a chat prompt into a token budget: the most relevant context items
+    (in the order given) and the most recent history turns that fit, plus a
+    compact digest of older turns.
+    """
+
+    def __init__(
+        self,
+        max_context_tokens: int = 1800,
+        max_history_tokens: int = 800,
+        max_summary_tokens: int = 200
+    ):
+        self.max_context_tokens = max_context_tokens
+        self.max_history_tokens = max_history_tokens
+        self.max_summary_tokens = max_summary_tokens
+
+    def pack_context(self, items: List[str]) -> str:
+        """Keep items (best first) while they fit; truncate the first if it alone is too big"""
+        packed = []
+        used = 0
+        for item in items:
+            tokens = estimate_tokens(item)
+            if used + tokens > self.max_context_tokens:
+                if not packed:
+                    packed.append(truncate_to_tokens(item, self.max_context_tokens))
+                    break
+                continue
+            packed.append(item)
+            used += tokens
+        return "\n\n".join(packed)
+
+    def pack_history(self, history: List[Dict]) -> List[Dict]:
+        """Most recent whole turns that fit in the history budget, oldest first"""
+        packed = []
+        used = 0
+        for turn in reversed(history):
+            tokens = estimate_tokens(turn["content"])
+            if used + tokens > self.max_history_tokens:
+                break
+            packed.append(turn)
+            used += tokens
+        return packed[::-1]
+
+    def merge_summary(self, summary: str, turns: List[Dict]) -> str:
+        """Fold dropped turns into the running digest, keeping its newest part"""
+        merged = "\n".join(part for part in (summary, compact_turns(turns)) if part)
+        while estimate_tokens(merged) > self.max_summary_tokens and "\n" in merged:
+            merged = merged.split("\n", 1)[1]
+        return truncate_to_tokens(merged, self.max_summary_tokens)
+
+    def build(
+        self,
+        system_prompt: str,
+        history: List[Dict],
+        context_items: List[str],
+        query: str,
+        history_summary: Optional[str] = None
+    ) -> List[Dict]:
+        system = system_prompt
+        if history_summary:
+            system += f"\n\nEarlier in this conversation:\n{history_summary}"
+        messages = [{"role": "system", "content": system}]
+        messages.extend(self.pack_history(history))
+        messages.append({
+            "role": "user",
+            "content": f"Video Context:\n{self.pack_context(context_items)}\n\nAnswer based on the context: {query}"
+        })
+        return messages
@@ -0,0 +1,160 @@
+from collections.abc import Sequence
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+import numpy as np
+
+MIN_SECTION_SECONDS = 60.0
+MAX_SECTION_SECONDS = 420.0
+# A gap is a topic boundary when its similarity dips this many (MAD-scaled)
+# standard deviations below the median similarity seen so far; shallower
+# dips are the noise of ordinary speech
+BOUNDARY_STRICTNESS = 2.5
+
+
+def _section(segments: List[Dict]) -> Dict:
+    return {
+        'start': segments[0]['start'],
+        'end': segments[-1]['end'],
+        'segments': segments
+    }
+
+
+class _Sectioner:
+    """
+    Incremental TextTiling-style splitter. Gap g sits before segment g; its
+    similarity compares the mean embedding of the `window` segments before
+    it with the `window` after it, so it is final once segment g + window - 1
+    has arrived. A gap is a boundary when it is the lowest point of its dip
+    (no lower similarity within `window` gaps either side) and it falls more
+    than `strictness` robust standard deviations below the running median;
+    median and MAD are not dragged down by the dips themselves. Every
+    decision only looks 2 * window segments ahead, so a section is emitted as
+    soon as that much of the next one has arrived.
+    """
+
+    def __init__(self, min_seconds: float, max_seconds: float, window: int, strictness: float):
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.window = window
+        self.strictness = strictness
+        self.segments: List[Dict] = []
+        self.cumsum: List[np.ndarray] = []
+        self.similarity: List[float] = [0.0]  # indexed by gap; gap 0 does not exist
+        self.decided = 0  # gaps 1..decided are settled
+        self.start = 0  # first segment of the open section
+        self.best: Optional[int] = None  # lowest eligible gap in the open section
+
+    def push(self, segment: Dict, vector: np.ndarray) -> List[Dict]:
+        vector = np.asarray(vector, dtype=np.float64)
+        self.cumsum.append(vector if not self.cumsum else self.cumsum[-1] + vector)
+        self.segments.append(segment)
+        return self._advance(final=False)
+
+    def finish(self) -> List[Dict]:
+        if not self.segments:
+            return []
+        done = self._advance(final=True)
+        done.append(_section(self.segments[self.start:]))
+        return done
+
+    def _prefix(self, i: int):
+        return self.cumsum[i - 1] if i > 0 else 0.0
+
+    def _gap_similarity(self, gap: int) -> float:
+        n = len(self.segments)
+        left = self._prefix(gap) - self._prefix(max(0, gap - self.window))
+        right = self._prefix(min(n, gap + self.window)) - self._prefix(gap)
+        norms = np.linalg.norm(left) * np.linalg.norm(right)
+        return float(np.dot(left, right) / max(norms, 1e-9))
+
+    def _advance(self, final: bool) -> List[Dict]:
+        gaps = len(self.segments) - 1
+        computable = gaps if final else len(self.segments) - self.window
+        for gap in range(len(self.similarity), computable + 1):
+            self.similarity.append(self._gap_similarity(gap))
+        # Deciding a gap needs the similarities `window` gaps past it
+        decidable = gaps if final else computable - self.window
+        sections = []
+        while self.decided < decidable:
+            self.decided += 1
+            sections.extend(self._decide(self.decided, gaps))
+        return sections
+
+    def _is_boundary(self, gap: int, gaps: int) -> bool:
+        # Gaps whose windows run off either end of the transcript are too noisy
+        if gap < self.window or gap + self.window > gaps + 1:
+            return False
+        value = self.similarity[gap]
+        neighbours = self.similarity[max(1, gap - self.window):min(gaps, gap + self.window) + 1]
+        if value > min(neighbours):
+            return False
+        seen = np.asarray(self.similarity[1:])
+        median = float(np.median(seen))
+        spread = 1.4826 * float(np.median(np.abs(seen - median)))
+        return value < median - self.strictness * spread
+
+    def _decide(self, gap: int, gaps: int) -> List[Dict]:
+        segments, similarity = self.segments, self.similarity
+        sections = []
+        if segments[gap - 1]['end'] - segments[self.start]['start'] >= self.min_seconds:
+            if self.best is None or similarity[gap] < similarity[self.best]:
+                self.best = gap
+            if self._is_boundary(gap, gaps):
+                sections.append(_section(segments[self.start:gap]))
+                self.start, self.best = gap, None
+                return sections
+        if segments[gap]['end'] - segments[self.start]['start'] > self.max_seconds:
+            cut = self.best or gap
+            sections.append(_section(segments[self.start:cut]))
+            self.start, self.best = cut, None
+            # Gaps between the cut and this one may already qualify for the next section
+            for j in range(cut + 1, gap + 1):
+                if segments[j - 1]['end'] - segments[self.start]['start'] >= self.min_seconds:
+                    if self.best is None or similarity[j] < similarity[self.best]:
+                        self.best = j
+        return sections
+
+
+def semantic_sections(
+    segments: List[Dict],
+    embeddings: np.ndarray,
+    min_seconds: float = MIN_SECTION_SECONDS,
+    max_seconds: float = MAX_SECTION_SECONDS,
+    window: int = 5,
+    strictness: float = BOUNDARY_STRICTNESS
+) -> List[Dict]:
+    """
+    Split segments at topic shifts: at clear similarity dips, once a section
+    is at least `min_seconds` long; a section reaching `max_seconds` is cut
+    at its lowest eligible gap. Single pass over the gaps.
+    """
+    sectioner = _Sectioner(min_seconds, max_seconds, window, strictness)
+    sections = []
+    for segment, vector in zip(segments, np.asarray(embeddings, dtype=np.float32)):
+        sections.extend(sectioner.push(segment, vector))
+    sections.extend(sectioner.finish())
+    return sections
+
+
+def iter_semantic_sections(
+    segments: Iterable[Dict],
+    embed: Callable[[List[str]], np.ndarray],
+    min_seconds: float = MIN_SECTION_SECONDS,
+    max_seconds: float = MAX_SECTION_SECONDS,
+    window: int = 5,
+    strictness: float = BOUNDARY_STRICTNESS
+) -> Iterator[Dict]:
+    """
+    Streaming semantic_sections: each section is yielded as soon as its
+    closing boundary is settled, 2 * window segments later, rather than in
+    bursts. Every segment is embedded exactly once; a complete sequence is
+    embedded in one batch, a live stream one segment at a time.
+    """
+    sectioner = _Sectioner(min_seconds, max_seconds, window, strictness)
+    if isinstance(segments, Sequence):
+        vectors = embed([seg['text'] for seg in segments]) if len(segments) else []
+        pairs = zip(segments, vectors)
+    else:
+        pairs = ((seg, embed([seg['text']])[0]) for seg in segments)
+    for segment, vector in pairs:
+        yield from sectioner.push(segment, vector)
+    yield from sectioner.finish()
@@ -1,25 +1,62 @@
 import os
 import json
-from typing import Dict, List, Optional
-from openai import OpenAI
+import hashlib
+import importlib.util
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 from datetime import timedelta
 from dotenv import load_dotenv
+from llm_client import RateLimiter, call_with_retry, create_groq_client, estimate_tokens
+from sectioning import iter_semantic_sections
+from extractive import extractive_summary
+from metrics import registry, timed
 
 load_dotenv()
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
+# Bump whenever the prompts change so cached summaries are regenerated
+PROMPT_VERSION = "1"
+
+
+def default_sectioning() -> str:
+    """Semantic sectioning when the embedding model can be loaded, else fixed windows"""
+    return "semantic" if importlib.util.find_spec("sentence_transformers") else "fixed"
+
+
+def is_degraded(summary: Dict) -> bool:
+    """True if an LLM section call failed and its extractive fallback was used"""
+    return bool(summary.get('metadata', {}).get('fallback_sections'))
+
 
 class YouTubeSummarizer:
-    def __init__(self):
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        sectioning: Optional[str] = None
+    ):
         self.groq_client = None
         if GROQ_API_KEY:
             try:
-                self.groq_client = OpenAI(
-                    api_key=GROQ_API_KEY,
-                    base_url="https://api.groq.com/openai/v1"
-                )
+                self.groq_client = create_groq_client(GROQ_API_KEY)
             except Exception as e:
                 print(f"Failed to initialize Groq client: {str(e)}")
 
+        self._merge_cache: Dict[str, str] = {}
+        self.max_concurrency = max_concurrency or int(os.getenv('LLM_MAX_CONCURRENCY', '4'))
+        self.rate_limiter = RateLimiter(
+            requests_per_minute or int(os.getenv('LLM_REQUESTS_PER_MINUTE', '30')),
+            tokens_per_minute or int(os.getenv('LLM_TOKENS_PER_MINUTE', '0'))
+        )
+        # "fixed": SECTION_SECONDS windows; "semantic": split at topic shifts
+        self.sectioning = sectioning or os.getenv('SUMMARY_SECTIONING') or default_sectioning()
+        if self.sectioning not in ("fixed", "semantic"):
+            raise ValueError(f"Unknown sectioning mode: {self.sectioning}")
+        self._embed = None
+
     def _generate_groq_summary(self, text: str) -> Optional[str]:
         if not self.groq_client:
             return None
@@ -38,26 +75,148 @@ class YouTubeSummarizer:
         - Key point 1
         - Key point 2"""
 
+        return self._chat(system_prompt, user_prompt, max_tokens=4000, purpose="section")
+
+    def _chat(self, system_prompt: str, user_prompt: str, max_tokens: int, purpose: str = "section") -> Optional[str]:
+        """Rate-limited, retried chat completion; None on failure"""
+        def request():
+            # Limiter waits and retry backoff are timed apart from the API call
+            with timed("llm_rate_limit_wait", purpose=purpose):
+                self.rate_limiter.acquire(estimate_tokens(system_prompt + user_prompt))
+            with timed("llm_request", purpose=purpose) as fields:
+                response = self.groq_client.chat.completions.create(
+                    model="llama3-70b-8192",
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=max_tokens
+                )
+                if response.usage:
+                    fields.update(
+                        prompt_tokens=response.usage.prompt_tokens,
+                        completion_tokens=response.usage.completion_tokens
+                    )
+            return response
+
         try:
-            response = self.groq_client.chat.completions.create(
-                model="llama3-70b-8192",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,
-                max_tokens=4000
-            )
+            response = call_with_retry(request)
+            if response.usage:
+                self.rate_limiter.record_tokens(response.usage.completion_tokens)
+                for kind in ("prompt", "completion"):
+                    registry.inc("llm_tokens_total", getattr(response.usage, f"{kind}_tokens"),
+                                 help="LLM tokens used", purpose=purpose, kind=kind)
             return response.choices[0].message.content
         except Exception as e:
             print(f"Groq API error: {str(e)}")
             return None
 
-    def _create_sections(self, segments: List[Dict]) -> List[Dict]:
-        if not segments:
-            return []
+    def _generate_groq_merge(self, children: List[Dict]) -> Optional[str]:
+        if not self.groq_client:
+            return None
+
+        system_prompt = """You are an expert technical content summarizer. You receive summaries
+        of consecutive parts of one video. Merge them into a single higher-level summary with:
+        - Original timestamps preserved for the main topics
+        - A clear title for the whole span
+        - Bullet points for the most important concepts only"""
+
+        parts = "\n\n".join(child['summary'] for child in children)
+        user_prompt = f"""Merge these consecutive summaries:
+
+        {parts}
+
+        Format:
+        [HH:MM:SS] Specific Title
+        - Key point 1
+        - Key point 2"""
+
+        return self._chat(system_prompt, user_prompt, max_tokens=1500, purpose="merge")
+
+    def _merge_nodes(self, children: List[Dict], cache=None, video_id: Optional[str] = None) -> Dict:
+        """
+        Merge consecutive summary nodes into their parent. Parents are cached by
+        a hash of their children, so unchanged subtrees are never re-merged.
+        """
+        key = hashlib.sha256(
+            "\0".join([PROMPT_VERSION] + [child['summary'] for child in children]).encode("utf-8")
+        ).hexdigest()
+        merged = self._merge_cache.get(key)
+        if merged is None and cache is not None and video_id:
+            merged = cache.get(video_id, "merge", {'key': key})
+        if merged is None:
+            merged = self._generate_groq_merge(children)
+            if merged and cache is not None and video_id:
+                cache.put(video_id, "merge", {'key': key}, merged)
+        if merged is None:
+            # No LLM: keep the first line (title) of each child
+            timestamp = self.format_timestamp(children[0]['start'])
+            merged = f"[{timestamp}] " + "\n".join(
+                "- " + child['summary'].strip().split("\n")[0] for child in children
+            )
+        else:
+            self._merge_cache[key] = merged
+        return {
+            'start': children[0]['start'],
+            'end': children[-1]['end'],
+            'summary': merged
+        }
+
+    def generate_hierarchical_summary(
+        self,
+        summary: Dict,
+        fan_in: int = 5,
+        cache=None
+    ) -> Dict:
+        """
+        Map-reduce whole-video summary on top of generate_summary's sections.
+
+        Consecutive section summaries are merged `fan_in` at a time into
+        chapters, chapters into higher levels, until one video-level overview
+        is left, so no single prompt ever sees more than `fan_in` summaries.
+        Merges within a level run in parallel. Each merged node is cached by
+        its children's content (in memory, and in the PipelineCache `cache`
+        when given), so appending a section only recomputes its ancestors.
+
+        Adds 'levels' (lists of nodes, chapters first), 'chapters' and
+        'overview' to the summary and returns it.
+        """
+        if fan_in < 2:
+            raise ValueError("fan_in must be at least 2")
+        video_id = summary.get('metadata', {}).get('video_id')
+        
+        nodes = summary['sections']
+        levels = []
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            while len(nodes) > 1:
+                groups = [nodes[i:i + fan_in] for i in range(0, len(nodes), fan_in)]
+                nodes = list(pool.map(
+                    # A trailing group of one is promoted as is, not re-summarized
+                    lambda group: group[0] if len(group) == 1 else self._merge_nodes(group, cache, video_id),
+                    groups
+                ))
+                levels.append(nodes)
         
-        sections = []
+        summary['levels'] = levels
+        summary['chapters'] = levels[0] if len(levels) > 1 else []
+        summary['overview'] = nodes[0] if nodes else None
+        return summary
+
+    SECTION_SECONDS = 180  # 3 minute sections
+
+    def _embed_texts(self, texts: List[str]):
+        if self._embed is None:
+            from embeddings import get_embedding_cache
+            self._embed = get_embedding_cache().encode
+        return self._embed(texts)
+
+    def _iter_sections(self, segments: Iterable[Dict]) -> Iterator[Dict]:
+        """Group segments into sections, yielding each one as soon as it closes"""
+        if self.sectioning == "semantic":
+            yield from iter_semantic_sections(segments, self._embed_texts)
+            return
+
         current_section = []
         
         for seg in segments:
@@ -65,57 +224,128 @@ class YouTubeSummarizer:
                 current_section.append(seg)
             else:
                 section_duration = seg['end'] - current_section[0]['start']
-                if section_duration < 180:  # 3 minute sections
+                if section_duration < self.SECTION_SECONDS:
                     current_section.append(seg)
                 else:
-                    sections.append({
+                    yield {
                         'start': current_section[0]['start'],
                         'end': current_section[-1]['end'],
                         'segments': current_section
-                    })
+                    }
                     current_section = [seg]
         
         if current_section:
-            sections.append({
+            yield {
                 'start': current_section[0]['start'],
                 'end': current_section[-1]['end'],
                 'segments': current_section
-            })
-        
-        return sections
+            }
 
-    def generate_summary(self, transcription: Dict) -> Dict:
-        sections = self._create_sections(transcription['segments'])
-        section_summaries = []
+    def _create_sections(self, segments: List[Dict]) -> List[Dict]:
+        if not segments:
+            return []
+        return list(self._iter_sections(segments))
+
+    def _summarize_section(self, section: Dict) -> Dict:
+        full_text = " ".join(seg['text'] for seg in section['segments'])
+        timestamp = self.format_timestamp(section['start'])
         
-        for section in sections:
-            full_text = " ".join(seg['text'] for seg in section['segments'])
-            timestamp = self.format_timestamp(section['start'])
-            
-            if self.groq_client:
-                groq_summary = self._generate_groq_summary(f"[{timestamp}] {full_text}")
-                if groq_summary:
-                    section_summaries.append({
-                        'start': section['start'],
-                        'end': section['end'],
-                        'summary': groq_summary
-                    })
-                    continue
-            
-            section_summaries.append({
-                'start': section['start'],
-                'end': section['end'],
-                'summary': f"[{timestamp}] {full_text[:200]}{'...' if len(full_text) > 200 else ''}"
-            })
+        if self.groq_client:
+            groq_summary = self._generate_groq_summary(f"[{timestamp}] {full_text}")
+            if groq_summary:
+                return {
+                    'start': section['start'],
+                    'end': section['end'],
+                    'summary': groq_summary
+                }
+            # The LLM was expected but failed: flag the extractive stand-in so
+            # the summary is redone rather than served from cache for good
+            return {**self._draft_section(section), 'fallback': True}
         
+        return self._draft_section(section)
+
+    def _draft_section(self, section: Dict) -> Dict:
+        """Local extractive summary: the offline fallback and the quick first draft"""
+        return {
+            'start': section['start'],
+            'end': section['end'],
+            'summary': extractive_summary(" ".join(seg['text'] for seg in section['segments']), section['start'])
+        }
+
+    def build_summary(self, section_summaries: List[Dict], language: str = 'en') -> Dict:
+        """Assemble section summaries into the summary document"""
         return {
             'metadata': {
-                'language': transcription.get('language', 'en'),
-                'duration': transcription['segments'][-1]['end'],
-                'section_count': len(section_summaries)
+                'language': language,
+                'duration': section_summaries[-1]['end'] if section_summaries else 0,
+                'section_count': len(section_summaries),
+                'fallback_sections': sum(1 for s in section_summaries if s.get('fallback'))
             },
             'sections': section_summaries
         }
 
+    def generate_summary(self, transcription: Dict) -> Dict:
+        with timed("summarize") as fields:
+            sections = self._create_sections(transcription['segments'])
+            fields['sections'] = len(sections)
+            # Sections are summarized concurrently; map keeps them in order
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+                section_summaries = list(pool.map(self._summarize_section, sections))
+        return self.build_summary(section_summaries, transcription.get('language', 'en'))
+
+    def generate_summary_stream(
+        self,
+        segments: Iterable[Dict],
+        on_draft: Optional[Callable[[Dict], None]] = None
+    ) -> Iterator[Dict]:
+        """
+        Summarize a stream of transcript segments (e.g. from
+        transcription.transcribe_audio_stream), yielding each section summary
+        as soon as its section closes instead of waiting for the full
+        transcript. Collect the results and pass them to build_summary.
+
+        `on_draft`, when given, receives an extractive draft of each section
+        the moment it closes, while its LLM summary is still pending.
+        """
+        # Sections are cut on a reader thread, so a finished section summary
+        # is handed back the moment it completes, even while the segment
+        # source is blocked waiting for more audio
+        events = queue.Queue()
+        stop = threading.Event()
+
+        def read_sections():
+            try:
+                for section in self._iter_sections(segments):
+                    if stop.is_set():
+                        return
+                    events.put(("section", section))
+            except BaseException as e:
+                events.put(("error", e))
+            finally:
+                events.put(("end", None))
+
+        threading.Thread(target=read_sections, daemon=True).start()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            pending = deque()
+            reading = True
+            try:
+                while reading or pending:
+                    kind, value = events.get()
+                    if kind == "section":
+                        if on_draft and self.groq_client:
+                            on_draft(self._draft_section(value))
+                        future = pool.submit(self._summarize_section, value)
+                        future.add_done_callback(lambda _: events.put(("done", None)))
+                        pending.append(future)
+                    elif kind == "error":
+                        raise value
+                    elif kind == "end":
+                        reading = False
+                    # Hand back finished sections in order without waiting on later ones
+                    while pending and pending[0].done():
+                        yield pending.popleft().result()
+            finally:
+                stop.set()
+
     def format_timestamp(self, seconds: float) -> str:
         return str(timedelta(seconds=int(seconds))).split(".")[0]
\ No newline at end of file
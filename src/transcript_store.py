@@ -0,0 +1,215 @@
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+from pipeline_cache import PipelineCache
+
+COLUMNS = (
+    "string_offsets", "string_bytes",
+    "word_ids", "word_start", "word_end",
+    "segment_text_ids", "segment_start", "segment_end", "segment_word_offsets"
+)
+# Times are stored as float32 (millisecond resolution up to ~4.6 hours) and
+# rounded to milliseconds when read back
+TIME_DECIMALS = 3
+
+
+def _time(value) -> float:
+    return round(float(value), TIME_DECIMALS)
+
+
+class CompactTranscript(Mapping):
+    """
+    Columnar transcript: a UTF-8 string table (segment texts and distinct
+    words, stored once each), float32 start/end arrays for words and
+    segments, and per-segment offsets into the word arrays.
+
+    It reads like a transcribe_audio result ('text', 'segments', 'language',
+    plus extra keys such as 'source'), but segments are views decoded on
+    access, so iterating them (sectioning, retrieval windows) never builds
+    the per-word dicts. Arrays may be memory-mapped.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Optional[Dict] = None):
+        missing = [name for name in COLUMNS if name not in arrays]
+        if missing:
+            raise ValueError(f"CompactTranscript is missing arrays: {', '.join(missing)}")
+        self._arrays = arrays
+        self.meta = dict(meta or {})
+
+    @classmethod
+    def from_transcription(cls, transcription: Dict) -> "CompactTranscript":
+        if isinstance(transcription, CompactTranscript):
+            return transcription
+
+        strings: Dict[str, int] = {}
+
+        def intern(text: str) -> int:
+            return strings.setdefault(text, len(strings))
+
+        segments = transcription.get("segments", [])
+        segment_text_ids, segment_start, segment_end = [], [], []
+        word_ids, word_start, word_end = [], [], []
+        word_offsets = [0]
+        for segment in segments:
+            segment_text_ids.append(intern(segment["text"]))
+            segment_start.append(segment["start"])
+            segment_end.append(segment["end"])
+            for word in segment.get("words", ()):
+                word_ids.append(intern(word["word"]))
+                word_start.append(word["start"])
+                word_end.append(word["end"])
+            word_offsets.append(len(word_ids))
+
+        encoded = [text.encode("utf-8") for text in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        arrays = {
+            "string_offsets": offsets,
+            "string_bytes": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            "word_ids": np.asarray(word_ids, dtype=np.int32),
+            "word_start": np.asarray(word_start, dtype=np.float32),
+            "word_end": np.asarray(word_end, dtype=np.float32),
+            "segment_text_ids": np.asarray(segment_text_ids, dtype=np.int32),
+            "segment_start": np.asarray(segment_start, dtype=np.float32),
+            "segment_end": np.asarray(segment_end, dtype=np.float32),
+            "segment_word_offsets": np.asarray(word_offsets, dtype=np.int64),
+        }
+        meta = {key: value for key, value in transcription.items() if key not in ("text", "segments")}
+        # A segment-resolution transcript has no words; keep its segments word-free
+        meta["has_words"] = any("words" in segment for segment in segments)
+        return cls(arrays, meta)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return dict(self._arrays)
+
+    def string(self, index: int) -> str:
+        offsets = self._arrays["string_offsets"]
+        start, end = int(offsets[index]), int(offsets[index + 1])
+        return bytes(self._arrays["string_bytes"][start:end]).decode("utf-8")
+
+    def words(self, segment_index: int) -> List[Dict]:
+        offsets = self._arrays["segment_word_offsets"]
+        start, end = int(offsets[segment_index]), int(offsets[segment_index + 1])
+        ids = self._arrays["word_ids"][start:end]
+        starts = self._arrays["word_start"][start:end]
+        ends = self._arrays["word_end"][start:end]
+        return [
+            {"word": self.string(word_id), "start": _time(w_start), "end": _time(w_end)}
+            for word_id, w_start, w_end in zip(ids, starts, ends)
+        ]
+
+    @property
+    def segments(self) -> "SegmentList":
+        return SegmentList(self)
+
+    @property
+    def word_count(self) -> int:
+        return len(self._arrays["word_ids"])
+
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self._arrays.values())
+
+    def to_dict(self) -> Dict:
+        """Plain transcribe_audio-style dict (every segment and word materialized)"""
+        meta = {key: value for key, value in self.meta.items() if key != "has_words"}
+        return {"text": self["text"], "segments": [dict(s) for s in self.segments], **meta}
+
+    # Mapping interface
+
+    def __getitem__(self, key: str):
+        if key == "segments":
+            return self.segments
+        if key == "text":
+            return " ".join(segment["text"] for segment in self.segments)
+        if key == "has_words":
+            raise KeyError(key)
+        return self.meta[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield "text"
+        yield "segments"
+        yield from (key for key in self.meta if key != "has_words")
+
+    def __len__(self) -> int:
+        return 2 + sum(1 for key in self.meta if key != "has_words")
+
+
+class SegmentList(Sequence):
+    """Lazy sequence of a CompactTranscript's segments"""
+
+    def __init__(self, transcript: CompactTranscript):
+        self._transcript = transcript
+
+    def __len__(self) -> int:
+        return len(self._transcript._arrays["segment_start"])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Segment(self._transcript, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("segment index out of range")
+        return Segment(self._transcript, index)
+
+
+class Segment(Mapping):
+    """One segment, decoded field by field; 'words' only when asked for"""
+
+    __slots__ = ("_transcript", "index")
+
+    def __init__(self, transcript: CompactTranscript, index: int):
+        self._transcript = transcript
+        self.index = index
+
+    def _keys(self):
+        return ("text", "start", "end", "words") if self._transcript.meta.get("has_words") else ("text", "start", "end")
+
+    def __getitem__(self, key: str):
+        arrays = self._transcript._arrays
+        if key == "text":
+            return self._transcript.string(int(arrays["segment_text_ids"][self.index]))
+        if key == "start":
+            return _time(arrays["segment_start"][self.index])
+        if key == "end":
+            return _time(arrays["segment_end"][self.index])
+        if key == "words" and self._transcript.meta.get("has_words"):
+            return self._transcript.words(self.index)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(self._keys())
+
+    def __repr__(self) -> str:
+        return f"Segment({self.index}, {self['start']}-{self['end']}: {self['text'][:40]!r})"
+
+
+# Pipeline cache storage: one .npy per column (memory-mappable) plus a small
+# JSON entry with the language and other metadata. Transcripts cached as a
+# single JSON document by earlier versions are still read.
+
+def put_transcript(cache: PipelineCache, video_id: str, params: Optional[Dict], transcription: Dict) -> CompactTranscript:
+    transcript = CompactTranscript.from_transcription(transcription)
+    for name, array in transcript.arrays().items():
+        cache.put_array(video_id, f"transcript_{name}", params, array)
+    # Written last: its presence means every column is in place
+    cache.put(video_id, "transcript_meta", params, transcript.meta)
+    return transcript
+
+
+def get_transcript(
+    cache: PipelineCache,
+    video_id: str,
+    params: Optional[Dict] = None,
+    mmap_mode: Optional[str] = "r"
+) -> Optional[Mapping]:
+    """Cached transcript as a CompactTranscript (or a legacy JSON dict), or None"""
+    meta = cache.get(video_id, "transcript_meta", params)
+    if meta is not None:
+        arrays = {name: cache.get_array(video_id, f"transcript_{name}", params, mmap_mode=mmap_mode) for name in COLUMNS}
+        if all(array is not None for array in arrays.values()):
+            return CompactTranscript(arrays, meta)
+    return cache.get(video_id, "transcript", params)
@@ -1,14 +1,133 @@
-import whisper
 import os
-from typing import List, Dict, Optional
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
 import json
-import torch
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from model_registry import ModelRegistry
+from audio_chunks import SAMPLE_RATE, iter_split_audio, split_audio, stitch_segments
+from metrics import registry, timed
+
+
+# whisper and torch are imported on first use: importing them takes seconds,
+# which every process that merely imports this module (the app, job
+# workers) would otherwise pay at startup
+
+
+def _default_device() -> str:
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _default_compute_type(device: str) -> str:
+    # Whisper only runs fp16 inference on GPU; on CPU it falls back to fp32 anyway
+    return "float16" if device == "cuda" else "float32"
+
+
+def _load_whisper_model(key: Tuple[str, str, str]):
+    import whisper
+    model_size, device, compute_type = key
+    print(f"Loading Whisper {model_size} model on {device} ({compute_type})...")
+    with timed("whisper_load", model=model_size):
+        model = whisper.load_model(model_size, device=device)
+        if compute_type == "float16" and device == "cuda":
+            import torch
+            # Half the weight memory and no per-call casts; Whisper computes
+            # LayerNorm in fp32, so those parameters stay fp32
+            model = model.half()
+            for module in model.modules():
+                if isinstance(module, torch.nn.LayerNorm):
+                    module.float()
+        return model
+
+
+def _timed_transcribe(model, audio, model_size: str, **transcribe_args) -> Dict:
+    """model.transcribe, timed as Whisper inference and counted in audio seconds"""
+    with timed("whisper_inference", model=model_size) as fields:
+        result = model.transcribe(audio, **transcribe_args)
+        if result.get("segments"):
+            fields['audio_seconds'] = result["segments"][-1]["end"]
+            registry.inc("audio_seconds_transcribed_total", fields['audio_seconds'],
+                         help="Seconds of audio run through Whisper", model=model_size)
+    return result
+
+
+# Shared by every session and thread in the process
+_whisper_models = ModelRegistry(
+    _load_whisper_model,
+    max_models=int(os.getenv("WHISPER_MAX_MODELS", "2"))
+)
+
+
+def get_whisper_model(
+    model_size: str = "base",
+    device: Optional[str] = None,
+    compute_type: Optional[str] = None
+):
+    """Return a cached Whisper model, loading it on first use"""
+    device = device or _default_device()
+    compute_type = compute_type or _default_compute_type(device)
+    return _whisper_models.get((model_size, device, compute_type))
+
+
+def warm_up_whisper(
+    model_sizes: List[str],
+    device: Optional[str] = None,
+    compute_type: Optional[str] = None
+) -> List[Tuple[str, str, str]]:
+    """Preload Whisper models at startup so the first request skips the load"""
+    device = device or _default_device()
+    compute_type = compute_type or _default_compute_type(device)
+    return _whisper_models.warm_up(
+        (size, device, compute_type) for size in model_sizes
+    )
+
+
+def _format_segments(segments: List[Dict], timestamp_resolution: str) -> List[Dict]:
+    """Convert raw Whisper segments to the transcript segment schema"""
+    formatted = []
+    for segment in segments:
+        segment_data = {
+            "text": segment["text"].strip(),
+            "start": segment["start"],
+            "end": segment["end"]
+        }
+        
+        if timestamp_resolution == "word" and "words" in segment:
+            segment_data["words"] = [
+                {
+                    "word": w["word"],
+                    "start": w["start"],
+                    "end": w["end"]
+                } for w in segment["words"] if not w["word"].startswith("[")
+            ]
+        
+        formatted.append(segment_data)
+    return formatted
+
+
+def _transcribe_args(
+    language: Optional[str],
+    timestamp_resolution: str,
+    compute_type: str
+) -> Dict:
+    transcribe_args = {
+        "verbose": False,
+        "task": "transcribe",
+        "word_timestamps": timestamp_resolution == "word",
+        "fp16": compute_type == "float16"
+    }
+    if language:
+        transcribe_args["language"] = language
+    return transcribe_args
+
 
 def transcribe_audio(
     audio_path: str,
     model_size: str = "base",
     language: Optional[str] = None,
-    timestamp_resolution: str = "word"  # or "segment"
+    timestamp_resolution: str = "word",  # or "segment"
+    workers: int = 1
 ) -> Dict:
     """
     Enhanced audio transcription with timestamps using OpenAI Whisper.
@@ -18,6 +137,8 @@ def transcribe_audio(
         model_size: Whisper model size (tiny, base, small, medium, large)
         language: Language code (None for auto-detection)
         timestamp_resolution: Granularity of timestamps ("word" or "segment")
+        workers: CPU processes to spread the audio over; values above 1 use
+            the chunked engine (see transcribe_audio_chunked)
 
     Returns:
         Dictionary containing:
@@ -36,53 +157,137 @@ def transcribe_audio(
             "language": detected_language
         }
     """
+    if workers > 1:
+        return transcribe_audio_chunked(
+            audio_path, model_size, language, timestamp_resolution, workers=workers
+        )
+
     try:
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
 
         print(f"Checking CUDA availability...")
-        device = "cuda" if torch.cuda.is_available() else "cpu"
+        device = _default_device()
+        compute_type = _default_compute_type(device)
         print(f"Using device: {device}")
 
-        print(f"Loading Whisper {model_size} model on {device}...")
-        model = whisper.load_model(model_size, device=device)
+        model = get_whisper_model(model_size, device, compute_type)
 
         # Configure transcription options
-        transcribe_args = {
-            "verbose": False,
-            "task": "transcribe",
-            "word_timestamps": timestamp_resolution == "word"
-        }
-        if language:
-            transcribe_args["language"] = language
+        transcribe_args = _transcribe_args(language, timestamp_resolution, compute_type)
 
         print(f"Transcribing {audio_path}...")
-        result = model.transcribe(audio_path, **transcribe_args)
+        result = _timed_transcribe(model, audio_path, model_size, **transcribe_args)
 
         # Process output for consistent format
         output = {
             "text": result["text"],
             "language": result.get("language", "en"),  # default to English
-            "segments": []
+            "segments": _format_segments(result["segments"], timestamp_resolution)
+        }
+
+        print(f"Successfully transcribed {len(output['segments'])} segments")
+        return output
+
+    except Exception as e:
+        print(f"Transcription failed: {str(e)}")
+        return {
+            "text": "",
+            "segments": [],
+            "error": str(e)
         }
 
-        for segment in result["segments"]:
-            segment_data = {
-                "text": segment["text"].strip(),
-                "start": segment["start"],
-                "end": segment["end"]
-            }
-            
-            if timestamp_resolution == "word" and "words" in segment:
-                segment_data["words"] = [
-                    {
-                        "word": w["word"],
-                        "start": w["start"],
-                        "end": w["end"]
-                    } for w in segment["words"] if not w["word"].startswith("[")
-                ]
-            
-            output["segments"].append(segment_data)
+
+def _init_chunk_worker(threads: int):
+    import torch
+    # Keep workers from oversubscribing cores with their own intra-op threads
+    torch.set_num_threads(threads)
+    # A forked worker starts with a copy of the parent's metrics; only what
+    # the worker itself records is sent back
+    registry.reset()
+
+
+# Chunk workers return (result, metrics snapshot); the parent merges the
+# snapshot so model loads and inference in workers show up in its /metrics
+
+def _detect_language_worker(audio, model_size: str) -> Tuple[str, Dict]:
+    import whisper
+    model = get_whisper_model(model_size, "cpu", "float32")
+    audio = whisper.pad_or_trim(audio)
+    mel = whisper.log_mel_spectrogram(audio, model.dims.n_mels).to(model.device)
+    _, probs = model.detect_language(mel)
+    return max(probs, key=probs.get), registry.drain()
+
+
+def _transcribe_chunk_worker(audio, model_size: str, transcribe_args: Dict) -> Tuple[List[Dict], Dict]:
+    # Each worker process keeps its own cached model across chunks
+    model = get_whisper_model(model_size, "cpu", "float32")
+    result = _timed_transcribe(model, audio, model_size, **transcribe_args)
+    return result["segments"], registry.drain()
+
+
+def _worker_result(future):
+    """A chunk worker's result, with its metrics merged into this process's registry"""
+    result, metrics = future.result()
+    registry.merge(metrics)
+    return result
+
+
+def transcribe_audio_chunked(
+    audio_path: str,
+    model_size: str = "base",
+    language: Optional[str] = None,
+    timestamp_resolution: str = "word",
+    workers: Optional[int] = None,
+    chunk_seconds: float = 300.0
+) -> Dict:
+    """
+    Transcribe long audio on CPU by splitting it at silences and running the
+    chunks across a process pool. Segment and word timestamps are moved back
+    onto the global timeline and the overlap between chunks is de-duplicated.
+
+    Returns the same dictionary as transcribe_audio.
+    """
+    try:
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+
+        workers = workers or os.cpu_count() or 1
+        threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+
+        from whisper import load_audio
+        audio = load_audio(audio_path)
+        chunks = split_audio(audio, chunk_seconds=chunk_seconds)
+        print(f"Transcribing {audio_path} in {len(chunks)} chunks "
+              f"({len(audio) / SAMPLE_RATE:.0f}s) on {workers} workers...")
+
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            initializer=_init_chunk_worker,
+            initargs=(threads_per_worker,)
+        ) as pool:
+            # Pin one language for all chunks so they don't each guess differently
+            if not language:
+                language = _worker_result(pool.submit(
+                    _detect_language_worker, chunks[0]["audio"], model_size
+                ))
+                print(f"Detected language: {language}")
+
+            transcribe_args = _transcribe_args(language, timestamp_resolution, "float32")
+            futures = [
+                pool.submit(_transcribe_chunk_worker, chunk["audio"], model_size, transcribe_args)
+                for chunk in chunks
+            ]
+            chunk_results = [
+                (chunk, _worker_result(future)) for chunk, future in zip(chunks, futures)
+            ]
+
+        segments = _format_segments(stitch_segments(chunk_results), timestamp_resolution)
+        output = {
+            "text": " ".join(seg["text"] for seg in segments),
+            "language": language,
+            "segments": segments
+        }
 
         print(f"Successfully transcribed {len(output['segments'])} segments")
         return output
@@ -94,3 +299,112 @@ def transcribe_audio(
             "segments": [],
             "error": str(e)
         }
+
+
+def transcribe_audio_stream(
+    audio_path: str,
+    model_size: str = "base",
+    language: Optional[str] = None,
+    timestamp_resolution: str = "word",
+    workers: int = 1,
+    chunk_seconds: float = 60.0,
+    info: Optional[Dict] = None
+) -> Iterator[Dict]:
+    """
+    Streaming variant of transcribe_audio that yields segments, in order, as
+    soon as the chunk containing them is transcribed.
+
+    Segments follow the transcribe_audio schema. When `info` is given it is
+    filled with the detected "language" before the first segment is yielded.
+    Errors are raised rather than returned, since a generator has no result
+    dictionary to carry them.
+    """
+    if not os.path.exists(audio_path):
+        raise FileNotFoundError(f"Audio file not found: {audio_path}")
+
+    from whisper import load_audio
+    audio = load_audio(audio_path)
+    chunks = split_audio(audio, chunk_seconds=chunk_seconds)
+    print(f"Streaming transcription of {audio_path} in {len(chunks)} chunks...")
+    yield from transcribe_chunk_stream(
+        chunks, model_size, language, timestamp_resolution, min(workers, len(chunks)), info
+    )
+
+
+def transcribe_pcm_stream(
+    blocks: Iterable[np.ndarray],
+    model_size: str = "base",
+    language: Optional[str] = None,
+    timestamp_resolution: str = "word",
+    workers: int = 1,
+    chunk_seconds: float = 60.0,
+    info: Optional[Dict] = None
+) -> Iterator[Dict]:
+    """
+    transcribe_audio_stream for audio that is still arriving, as 16 kHz
+    float32 blocks (e.g. from audio_stream.decode_audio_stream): each chunk
+    is transcribed as soon as it has been received.
+    """
+    yield from transcribe_chunk_stream(
+        iter_split_audio(blocks, chunk_seconds=chunk_seconds),
+        model_size, language, timestamp_resolution, workers, info
+    )
+
+
+def transcribe_chunk_stream(
+    chunks: Iterable[Dict],
+    model_size: str = "base",
+    language: Optional[str] = None,
+    timestamp_resolution: str = "word",
+    workers: int = 1,
+    info: Optional[Dict] = None
+) -> Iterator[Dict]:
+    """Transcribe split_audio-style chunks in order, yielding stitched segments"""
+    if info is not None and language:
+        info["language"] = language
+
+    if workers > 1:
+        threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_chunk_worker,
+            initargs=(threads_per_worker,)
+        ) as pool:
+            pending = deque()
+            transcribe_args = None
+            for chunk in chunks:
+                if transcribe_args is None:
+                    if not language:
+                        language = _worker_result(pool.submit(
+                            _detect_language_worker, chunk["audio"], model_size
+                        ))
+                    if info is not None:
+                        info["language"] = language
+                    transcribe_args = _transcribe_args(language, timestamp_resolution, "float32")
+                pending.append((chunk, pool.submit(
+                    _transcribe_chunk_worker, chunk["audio"], model_size, transcribe_args
+                )))
+                # Hand back finished chunks in order without waiting on later ones
+                while pending and pending[0][1].done():
+                    chunk_done, future = pending.popleft()
+                    yield from _format_segments(stitch_segments([(chunk_done, _worker_result(future))]), timestamp_resolution)
+            while pending:
+                chunk_done, future = pending.popleft()
+                yield from _format_segments(stitch_segments([(chunk_done, _worker_result(future))]), timestamp_resolution)
+        return
+
+    device = _default_device()
+    compute_type = _default_compute_type(device)
+    model = get_whisper_model(model_size, device, compute_type)
+
+    for chunk in chunks:
+        result = _timed_transcribe(
+            model, chunk["audio"], model_size, **_transcribe_args(language, timestamp_resolution, compute_type)
+        )
+        if not language:
+            # Later chunks reuse the first chunk's language
+            language = result.get("language", "en")
+            if info is not None:
+                info["language"] = language
+        stitched = stitch_segments([(chunk, result["segments"])])
+        yield from _format_segments(stitched, timestamp_resolution)
@@ -0,0 +1,114 @@
+from typing import Dict, List, Tuple
+import numpy as np
+
+SEGMENT_WINDOW_SECONDS = 30.0
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, in O(n + k log k)"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(scores, -k)[-k:]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+def build_segment_windows(segments: List[Dict], window_seconds: float = SEGMENT_WINDOW_SECONDS) -> List[Dict]:
+    """
+    Group consecutive transcript segments into ~`window_seconds` windows for
+    retrieval. Each window records the range of segments it covers.
+    """
+    windows = []
+    current = []
+    first_index = 0
+    for i, seg in enumerate(segments):
+        if not current:
+            first_index = i
+        current.append(seg)
+        if seg['end'] - current[0]['start'] >= window_seconds:
+            windows.append(_make_window(current, first_index))
+            current = []
+    if current:
+        windows.append(_make_window(current, first_index))
+    return windows
+
+
+def _make_window(segments: List[Dict], first_index: int) -> Dict:
+    return {
+        'text': " ".join(seg['text'] for seg in segments),
+        'start': segments[0]['start'],
+        'end': segments[-1]['end'],
+        'segment_range': [first_index, first_index + len(segments)]
+    }
+
+
+class VectorIndex:
+    """
+    Dense vector index over a contiguous float32 matrix of normalized
+    embeddings, optionally int8-quantized (per-row scale) to cut memory 4x.
+    Arrays may be memory-mapped, so a stored index opens without loading.
+    """
+
+    BLOCK_ROWS = 65536  # rows dequantized per block when searching int8
+
+    def __init__(self, vectors: np.ndarray = None, codes: np.ndarray = None, scales: np.ndarray = None):
+        if vectors is None and codes is None:
+            raise ValueError("VectorIndex needs vectors or int8 codes")
+        self.vectors = vectors
+        self.codes = codes
+        self.scales = scales
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, quantize: bool = False) -> "VectorIndex":
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if not quantize:
+            return cls(vectors=vectors)
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.round(vectors / scales[:, None]).astype(np.int8)
+        return cls(codes=codes, scales=scales.astype(np.float32))
+
+    @property
+    def quantized(self) -> bool:
+        return self.codes is not None
+
+    def __len__(self) -> int:
+        return len(self.codes if self.quantized else self.vectors)
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        query = np.asarray(query, dtype=np.float32)
+        if not self.quantized:
+            return self.vectors @ query
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        for start in range(0, len(self.codes), self.BLOCK_ROWS):
+            block = self.codes[start:start + self.BLOCK_ROWS].astype(np.float32)
+            scores[start:start + len(block)] = (block @ query) * self.scales[start:start + len(block)]
+        return scores
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (indices, scores) of the k nearest rows by cosine similarity"""
+        scores = self.scores(query)
+        indices = top_k_indices(scores, k)
+        return indices, scores[indices]
+
+    def dense(self) -> np.ndarray:
+        """Float32 vectors (dequantized if stored as int8)"""
+        if not self.quantized:
+            return np.asarray(self.vectors)
+        return np.asarray(self.codes, dtype=np.float32) * np.asarray(self.scales)[:, None]
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        if self.quantized:
+            return {'codes': self.codes, 'scales': self.scales}
+        return {'vectors': self.vectors}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "VectorIndex":
+        return cls(
+            vectors=arrays.get('vectors'),
+            codes=arrays.get('codes'),
+            scales=arrays.get('scales')
+        )
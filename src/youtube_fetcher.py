@@ -1,7 +1,10 @@
-from pytubefix import YouTube
+from pytubefix import Playlist, YouTube
 import os
+from captions import captions_to_transcription, choose_caption_track, parse_caption_track
+from metrics import timed_function
 
 
+@timed_function("download")
 def download_video_audio(youtube_url, output_path="downloads"):
     try:
         os.makedirs(output_path, exist_ok=True)
@@ -25,6 +28,49 @@ def download_video_audio(youtube_url, output_path="downloads"):
         print(f"Error downloading video audio: {e}")
         return None
 
+def open_audio_stream(youtube_url, chunk_size=256 * 1024):
+    """
+    Iterator over the bytes of the video's audio stream, for decoding while
+    it downloads. WebM/Opus is preferred since it decodes from a pipe.
+    """
+    try:
+        yt = YouTube(youtube_url)
+        audio_streams = yt.streams.filter(only_audio=True)
+        audio_stream = (
+            audio_streams.filter(mime_type="audio/webm").order_by("abr").last()
+            or audio_streams.first()
+        )
+        if not audio_stream:
+            print("No audio stream found!")
+            return None
+        return audio_stream.iter_chunks(chunk_size)
+
+    except Exception as e:
+        print(f"Error opening audio stream: {e}")
+        return None
+
+@timed_function("captions")
+def fetch_captions(youtube_url, language=None, policy="any"):
+    """
+    Transcript built from the video's caption track when the caption policy
+    accepts one (see captions.choose_caption_track), else None.
+    """
+    try:
+        yt = YouTube(youtube_url)
+        tracks = {caption.code: caption for caption in yt.captions}
+        code = choose_caption_track(list(tracks), language, policy)
+        if not code:
+            print(f"No usable captions among: {list(tracks)}")
+            return None
+
+        print(f"Using caption track: {code}")
+        return captions_to_transcription(parse_caption_track(tracks[code]), code)
+
+    except Exception as e:
+        print(f"Error fetching captions: {e}")
+        return None
+
+@timed_function("metadata")
 def get_video_metadata(youtube_url):
     try:
         print(f"Trying to fetch metadata from URL: {youtube_url}")
@@ -42,4 +88,21 @@ def get_video_metadata(youtube_url):
 
     except Exception as e:
         print(f"Error fetching video metadata: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def extract_video_id(url: str) -> str:
+    """Extract video ID from URL"""
+    if "youtu.be/" in url:
+        return url.split("youtu.be/")[1].split("?")[0]
+    elif "v=" in url:
+        return url.split("v=")[1].split("&")[0]
+    return url
+
+def get_playlist_urls(playlist_url):
+    try:
+        print(f"Trying to fetch playlist from URL: {playlist_url}")
+        return list(Playlist(playlist_url).video_urls)
+
+    except Exception as e:
+        print(f"Error fetching playlist: {e}")
+        return []
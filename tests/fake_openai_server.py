@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+
+class FakeOpenAIServer:
+    """
+    Minimal local OpenAI-compatible /chat/completions endpoint for tests.
+
+    Replies echo the last user message, optionally after `latency` seconds.
+    Streaming requests are answered word by word, `token_latency` apart.
+    `failures` is a list of HTTP status codes returned (in order) before the
+    server starts answering normally.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        failures: Optional[List[int]] = None,
+        reply: Optional[str] = None,
+        token_latency: float = 0.0
+    ):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.failures = list(failures or [])
+        self.reply = reply
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: dict, headers: Optional[dict] = None):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, request: dict, content: str):
+                """Server-sent events, one word per chunk"""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                words = content.split(" ")
+                for i, word in enumerate(words):
+                    chunk = {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": request.get("model", "fake"),
+                        "choices": [{
+                            "index": 0,
+                            "delta": {"content": word if i == 0 else " " + word},
+                            "finish_reason": None,
+                        }],
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                    time.sleep(fake.token_latency)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                with fake._lock:
+                    fake.requests.append(request)
+                    failure = fake.failures.pop(0) if fake.failures else None
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                try:
+                    time.sleep(fake.latency)
+                    if failure:
+                        self._send(failure, {"error": {"message": "fake failure"}},
+                                   {"retry-after": "0"})
+                        return
+                    content = fake.reply or request["messages"][-1]["content"]
+                    if request.get("stream"):
+                        self._stream(request, content)
+                        return
+                    self._send(200, {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": request.get("model", "fake"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": {
+                            "prompt_tokens": 10,
+                            "completion_tokens": len(content.split()),
+                            "total_tokens": 10 + len(content.split()),
+                        },
+                    })
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+
+        return Handler
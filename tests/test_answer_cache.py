@@ -0,0 +1,49 @@
+import sys
+import os
+import numpy as np
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from answer_cache import SemanticAnswerCache
+
+
+def _unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_hit_above_threshold_only():
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.store("vid", _unit(1, 0, 0), "", "answer")
+
+    assert cache.lookup("vid", _unit(1, 0.1, 0)) == "answer"
+    assert cache.lookup("vid", _unit(0, 1, 0)) is None
+    assert cache.lookup("other", _unit(1, 0, 0)) is None
+    assert cache.stats()["hit_rate"] == 1 / 3
+
+
+def test_context_key_must_match():
+    cache = SemanticAnswerCache()
+    cache.store("vid", _unit(1, 0), "", "fresh answer")
+
+    assert cache.lookup("vid", _unit(1, 0), "some-history") is None
+    assert cache.lookup("vid", _unit(1, 0), "") == "fresh answer"
+
+
+def test_ttl_and_lru_eviction():
+    cache = SemanticAnswerCache(ttl_seconds=0)
+    cache.store("vid", _unit(1, 0), "", "expired")
+    assert cache.lookup("vid", _unit(1, 0)) is None
+
+    cache = SemanticAnswerCache(max_entries_per_video=2, max_videos=1)
+    cache.store("vid", _unit(1, 0, 0), "", "a")
+    cache.store("vid", _unit(0, 1, 0), "", "b")
+    cache.lookup("vid", _unit(1, 0, 0))  # a is now more recently used than b
+    cache.store("vid", _unit(0, 0, 1), "", "c")
+    assert cache.lookup("vid", _unit(0, 1, 0)) is None
+    assert cache.lookup("vid", _unit(1, 0, 0)) == "a"
+
+    cache.store("vid2", _unit(1, 0, 0), "", "d")
+    assert cache.lookup("vid", _unit(1, 0, 0)) is None
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,225 @@
+import sys
+import os
+import pytest
+import numpy as np
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import assistant as assistant_module
+from assistant import VideoAssistant
+from embeddings import EmbeddingCache
+from fake_openai_server import FakeOpenAIServer
+from llm_client import create_groq_client
+from prompt_budget import PromptBuilder
+from answer_cache import SemanticAnswerCache
+
+
+class FakeEncoder:
+    """Deterministic bag-of-characters encoder standing in for SentenceTransformer"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, normalize_embeddings=True):
+        self.calls += 1
+        vectors = np.zeros((len(texts), 26), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for ch in text.lower():
+                if "a" <= ch <= "z":
+                    vectors[row, ord(ch) - ord("a")] += 1
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+        return vectors
+
+
+def _summary(video_id: str):
+    return {
+        "metadata": {"video_id": video_id, "duration": 360},
+        "sections": [
+            {"start": 0, "end": 180, "summary": "attention heads and queries"},
+            {"start": 180, "end": 360, "summary": "positional encoding of tokens"},
+        ],
+    }
+
+
+@pytest.fixture
+def make_assistant(monkeypatch):
+    monkeypatch.setattr(assistant_module, "_loaded_videos", assistant_module.OrderedDict())
+    encoder = FakeEncoder()
+    embeddings = EmbeddingCache(path=None, encoder=encoder)
+    answer_cache = SemanticAnswerCache(threshold=0.95)
+
+    # No LLM unless a test points groq_client at the fake server
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+
+    def factory(**kwargs):
+        options = dict(
+            top_k=1,
+            top_k_segments=1,
+            embedding_cache=embeddings,
+            prompt_builder=PromptBuilder(),
+            max_history_turns=4,
+            answer_cache=answer_cache
+        )
+        return VideoAssistant(**{**options, **kwargs})
+
+    factory.encoder = encoder
+    return factory
+
+
+def test_loaded_videos_are_shared_between_assistants(make_assistant):
+    first, second = make_assistant(), make_assistant()
+    first.load_summary(_summary("vid1"))
+    second.load_summary(video_id="vid1")
+
+    assert second.summary is first.summary
+    assert make_assistant.encoder.calls == 1
+
+
+def test_assistants_keep_separate_videos(make_assistant):
+    first, second = make_assistant(), make_assistant()
+    first.load_summary(_summary("vid1"))
+    second.load_summary(_summary("vid2"))
+
+    assert first.video_id == "vid1"
+    assert second.video_id == "vid2"
+    assert first._find_relevant_sections("positional")[0]["start"] == 180
+
+
+def test_unknown_video_id_raises(make_assistant):
+    with pytest.raises(FileNotFoundError):
+        make_assistant().load_summary(video_id="missing")
+
+
+def test_summary_without_sections_is_searchable(make_assistant):
+    bot = make_assistant()
+    bot.load_summary({"metadata": {"video_id": "empty", "duration": 0}, "sections": []})
+
+    assert bot._find_relevant_sections("attention") == []
+
+
+def test_nothing_to_load_raises_even_with_stale_summary_file(make_assistant, tmp_path, monkeypatch):
+    # A shared summary file left over from an older install is never served
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "downloads").mkdir()
+    (tmp_path / "downloads" / "latest_summary.json").write_text('{"sections": []}')
+    bot = make_assistant()
+
+    with pytest.raises(ValueError):
+        bot.load_summary()
+    with pytest.raises(ValueError):
+        bot._find_relevant_sections("attention")
+
+
+def test_segment_retrieval_finds_verbatim_detail(make_assistant, tmp_path):
+    transcription = {
+        "segments": [
+            {"text": "welcome to the video", "start": 0, "end": 30},
+            {"text": "the softmax normalizes scores", "start": 30, "end": 60},
+            {"text": "thanks for watching", "start": 60, "end": 90},
+        ]
+    }
+    bot = make_assistant(cache=assistant_module.PipelineCache(str(tmp_path)))
+    bot.load_summary(_summary("vid1"), transcription=transcription)
+
+    assert bot._find_relevant_segments("softmax")[0]["start"] == 30
+
+    # With the video dropped from memory, the index reloads from the cache without encoding
+    assistant_module._loaded_videos.clear()
+    calls = make_assistant.encoder.calls
+    other = make_assistant(cache=bot.cache)
+    other.load_summary(_summary("vid1"))
+    assert other.segment_index is not None
+    assert make_assistant.encoder.calls == calls
+
+
+def test_retranscribed_video_gets_fresh_lexical_index(make_assistant, tmp_path):
+    cache = assistant_module.PipelineCache(str(tmp_path))
+    for text in ("the softmax normalizes scores", "the tensor holds the weights"):
+        # Same window count, different words
+        assistant_module._loaded_videos.clear()
+        bot = make_assistant(cache=cache)
+        bot.load_summary(_summary("vid1"), transcription={"segments": [{"text": text, "start": 0, "end": 30}]})
+
+    ids, _ = bot.segment_index['bm25'].search("tensor", 1)
+    assert list(ids) == [0]
+
+
+def test_response_streams_tokens_and_records_stats(make_assistant):
+    bot = make_assistant()
+    bot.load_summary(_summary("vid1"))
+
+    with FakeOpenAIServer(reply="attention lets tokens look at each other", token_latency=0.01) as server:
+        bot.groq_client = create_groq_client("test-key", server.base_url)
+        chunks = list(bot.generate_response_stream("what is attention?"))
+
+    assert len(chunks) == 7
+    assert "".join(chunks) == "attention lets tokens look at each other"
+    assert bot.conversation_history[-1]["content"] == "".join(chunks)
+    stats = bot.last_response_stats
+    assert stats["tokens"] == 7
+    assert 0 < stats["time_to_first_token"] < stats["total_time"]
+    assert stats["tokens_per_second"] > 0
+
+
+def test_stats_cleared_when_response_fails(make_assistant):
+    bot = make_assistant()
+    bot.load_summary(_summary("vid1"))
+    with FakeOpenAIServer(reply="attention") as server:
+        bot.groq_client = create_groq_client("test-key", server.base_url)
+        bot.generate_response("what is attention?")
+    assert bot.last_response_stats is not None
+
+    bot.groq_client = None
+    assert bot.generate_response("and queries?") == "No Groq API Key found."
+    assert bot.last_response_stats is None
+
+
+def test_history_is_bounded_and_compacted(make_assistant):
+    bot = make_assistant()
+    bot.load_summary(_summary("vid1"))
+
+    for i in range(5):
+        bot.generate_response(f"Question number {i}. With more detail.")
+
+    # No LLM is configured, so only the questions are recorded
+    assert len(bot.conversation_history) == 4
+    assert "Question number 0." in bot.history_summary
+    assert "With more detail" not in bot.history_summary
+
+
+def test_repeated_question_skips_llm(make_assistant):
+    with FakeOpenAIServer(reply="it explains attention") as server:
+        first, second = make_assistant(), make_assistant()
+        for bot in (first, second):
+            bot.load_summary(_summary("vid1"))
+            bot.groq_client = create_groq_client("test-key", server.base_url)
+
+        assert first.generate_response("What is this video about?") == "it explains attention"
+        assert second.generate_response("what is this video about") == "it explains attention"
+        assert len(server.requests) == 1
+        assert second.last_response_stats["cached"]
+
+        # A follow-up in an ongoing conversation is not answered from the cache
+        second.generate_response("What is this video about?")
+        assert len(server.requests) == 2
+
+
+def test_citations_and_moments_use_word_timestamps(make_assistant):
+    words = [("welcome", 0.0), ("back", 0.6), ("the", 31.0), ("softmax", 37.4), ("normalizes", 38.1), ("scores", 39.0)]
+    transcription = {"segments": [
+        {"text": "welcome back", "start": 0.0, "end": 30.0,
+         "words": [{"word": " " + w, "start": t, "end": t + 0.5} for w, t in words[:2]]},
+        {"text": "the softmax normalizes scores", "start": 31.0, "end": 60.0,
+         "words": [{"word": " " + w, "start": t, "end": t + 0.5} for w, t in words[2:]]},
+    ]}
+    bot = make_assistant()
+    bot.load_summary(_summary("vid1"), transcription=transcription)
+
+    items = bot._context_items("how does softmax normalize?")
+
+    assert any("spoken at 0:00:37" in item for item in items)
+    assert {"start": 37.4, "end": 60.0, "exact": True} in bot.last_citations
+    moments = bot.find_moments("Softmax normalizes")
+    assert [(m["start"], m["end"], m["link"]) for m in moments] == [(37.4, 38.6, "https://youtu.be/vid1?t=37")]
+    assert moments[0]["text"] == "the softmax normalizes scores"
@@ -0,0 +1,85 @@
+import sys
+import os
+import numpy as np
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from audio_chunks import SAMPLE_RATE, find_split_points, iter_split_audio, split_audio, stitch_segments
+
+
+def _speech_with_pauses(seconds: int, pause_every: int) -> np.ndarray:
+    """Noise 'speech' with a one second silence every `pause_every` seconds"""
+    rng = np.random.default_rng(0)
+    audio = rng.uniform(-0.5, 0.5, seconds * SAMPLE_RATE).astype(np.float32)
+    for t in range(pause_every, seconds, pause_every):
+        audio[t * SAMPLE_RATE:(t + 1) * SAMPLE_RATE] = 0.0
+    return audio
+
+
+def test_split_points_land_in_silence():
+    audio = _speech_with_pauses(60, pause_every=12)
+    splits = find_split_points(audio, chunk_seconds=20, search_seconds=5)
+
+    assert splits
+    for split in splits:
+        assert np.all(audio[split:split + 1600] == 0.0)
+
+
+def test_split_audio_covers_everything():
+    audio = _speech_with_pauses(60, pause_every=12)
+    chunks = split_audio(audio, chunk_seconds=20, overlap_seconds=1.0)
+
+    assert chunks[0]["core_start"] == 0.0
+    assert chunks[-1]["core_end"] == len(audio) / SAMPLE_RATE
+    for prev, nxt in zip(chunks, chunks[1:]):
+        assert prev["core_end"] == nxt["core_start"]
+        assert nxt["offset"] < nxt["core_start"]  # padded into the previous chunk
+
+
+def test_streaming_split_matches_batch():
+    audio = _speech_with_pauses(200, pause_every=17)
+    expected = split_audio(audio, chunk_seconds=40, overlap_seconds=1)
+
+    for block_size in (777, SAMPLE_RATE, 10 * SAMPLE_RATE):
+        blocks = (audio[i:i + block_size] for i in range(0, len(audio), block_size))
+        chunks = list(iter_split_audio(blocks, chunk_seconds=40, overlap_seconds=1))
+
+        assert len(chunks) == len(expected)
+        for chunk, reference in zip(chunks, expected):
+            assert chunk["offset"] == reference["offset"]
+            assert (chunk["core_start"], chunk["core_end"]) == (reference["core_start"], reference["core_end"])
+            assert np.array_equal(chunk["audio"], reference["audio"])
+
+
+def test_stitch_offsets_and_dedupes_overlap():
+    first = {"offset": 0.0, "core_start": 0.0, "core_end": 10.0}
+    second = {"offset": 9.0, "core_start": 10.0, "core_end": 20.0}
+    chunk_results = [
+        (first, [
+            {"text": "a", "start": 0.0, "end": 5.0},
+            {"text": "b", "start": 5.0, "end": 9.5},
+            {"text": "c", "start": 9.5, "end": 11.0},  # midpoint past core
+        ]),
+        (second, [
+            {"text": "c", "start": 0.5, "end": 2.0,
+             "words": [{"word": "c", "start": 0.5, "end": 2.0}]},
+            {"text": "d", "start": 2.0, "end": 8.0},
+        ]),
+    ]
+
+    segments = stitch_segments(chunk_results)
+
+    assert [s["text"] for s in segments] == ["a", "b", "c", "d"]
+    assert segments[2]["start"] == 9.5
+    assert segments[2]["words"][0]["end"] == 11.0
+    assert segments[3]["end"] == 17.0
+
+
+if __name__ == "__main__":
+    test_split_points_land_in_silence()
+    test_split_audio_covers_everything()
+    test_streaming_split_matches_batch()
+    test_stitch_offsets_and_dedupes_overlap()
+    print("All audio chunk tests passed!")
+
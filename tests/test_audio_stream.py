@@ -0,0 +1,105 @@
+import sys
+import os
+import functools
+import shutil
+import threading
+import time
+import wave
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pytest
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from audio_stream import decode_audio_stream, enforce_disk_quota, iter_url_chunks, spill_file
+from pipeline_cache import PipelineCache
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+
+
+def _write_wav(path, samples: np.ndarray, sample_rate: int = 16000):
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.astype(np.int16).tobytes())
+
+
+@pytest.fixture
+def served_wav(tmp_path):
+    """A WAV file served over local HTTP, standing in for the YouTube stream"""
+    samples = (np.sin(np.arange(16000 * 5) / 20) * 8000).astype(np.int16)
+    _write_wav(tmp_path / "audio.wav", samples)
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=str(tmp_path))
+    handler.log_message = lambda *args: None
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    yield f"http://{host}:{port}/audio.wav", tmp_path / "audio.wav", samples
+    server.shutdown()
+    server.server_close()
+
+
+def test_url_chunks_stream_whole_file(served_wav):
+    url, path, _ = served_wav
+    chunks = list(iter_url_chunks(url, chunk_size=4096))
+
+    assert len(chunks) > 1
+    assert b"".join(chunks) == path.read_bytes()
+
+
+@needs_ffmpeg
+def test_decode_stream_matches_source_and_spills(served_wav, tmp_path):
+    url, path, samples = served_wav
+    spill_path = tmp_path / "spill.audio"
+
+    blocks = list(decode_audio_stream(iter_url_chunks(url, chunk_size=4096), spill_path=str(spill_path)))
+
+    assert max(len(b) for b in blocks) <= 16000
+    decoded = np.concatenate(blocks)
+    assert len(decoded) == len(samples)
+    assert np.allclose(decoded, samples / 32768.0, atol=1e-4)
+    assert spill_path.read_bytes() == path.read_bytes()
+
+
+@needs_ffmpeg
+def test_decode_stream_reports_bad_input():
+    with pytest.raises(RuntimeError, match="Failed to decode audio"):
+        list(decode_audio_stream(iter([b"not audio at all"] * 4)))
+
+
+def test_spill_file_removed_unless_moved(tmp_path):
+    with spill_file(str(tmp_path / "tmp")) as path:
+        with open(path, "wb") as f:
+            f.write(b"audio")
+    assert not os.path.exists(path)
+
+    cache = PipelineCache(str(tmp_path / "cache"))
+    with spill_file(str(tmp_path / "tmp")) as path:
+        with open(path, "wb") as f:
+            f.write(b"audio")
+        cached = cache.put_file("abc", "audio", None, path)
+    assert open(cached, "rb").read() == b"audio"
+
+
+def test_disk_quota_evicts_cache_and_stale_spills(tmp_path):
+    root = tmp_path / "downloads"
+    cache = PipelineCache(str(root / "cache"))
+    spill_dir = root / "tmp"
+    spill_dir.mkdir(parents=True)
+    stale = spill_dir / "old.audio"
+    stale.write_bytes(b"x" * 1000)
+    os.utime(stale, (time.time() - 2 * 86400,) * 2)
+    (root / "library.bin").write_bytes(b"x" * 1000)
+    for i in range(4):
+        cache.put_array(f"video{i}", "vectors", None, np.zeros(250, dtype=np.float32))
+        time.sleep(0.01)
+
+    removed = enforce_disk_quota(cache, str(root), max_bytes=3500, spill_dir=str(spill_dir))
+
+    assert not stale.exists()
+    assert (root / "library.bin").exists()
+    assert removed >= 2
+    assert cache.get_array("video3", "vectors") is not None
+    assert cache.get_array("video0", "vectors") is None
@@ -0,0 +1,93 @@
+import sys
+import os
+import json
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from batch import read_sources, run_batch
+from jobs import JobQueue
+
+
+def _fake_download(job, cache, report):
+    if job['video_id'] == "broken":
+        raise RuntimeError("video unavailable")
+
+
+def _fake_transcribe(job, cache, report):
+    cache.put(job['video_id'], "transcript", job['params']['transcript'], {
+        "segments": [{"text": "hello", "start": 0.0, "end": 120.0}],
+        "language": "en"
+    })
+
+
+def _fake_summarize(job, cache, report):
+    summary = {
+        "metadata": {"video_id": job['video_id'], "duration": 120.0, "section_count": 1},
+        "sections": [{"start": 0.0, "end": 120.0, "summary": "[0:00:00] Hello"}]
+    }
+    cache.put(job['video_id'], "summary", job['params']['summary'], summary)
+
+
+HANDLERS = {"download": _fake_download, "transcribe": _fake_transcribe, "summarize": _fake_summarize}
+
+
+def test_read_sources_expands_files_and_dedupes(tmp_path):
+    urls_file = tmp_path / "urls.txt"
+    urls_file.write_text(
+        "# backfill\n"
+        "https://www.youtube.com/watch?v=aaa\n"
+        "\n"
+        "https://youtu.be/bbb?t=10\n"
+    )
+
+    urls = read_sources([str(urls_file), "https://www.youtube.com/watch?v=aaa&t=5"])
+
+    assert urls == ["https://www.youtube.com/watch?v=aaa", "https://youtu.be/bbb?t=10"]
+
+
+def test_run_batch_writes_summaries_and_report(tmp_path):
+    kwargs = dict(
+        output_dir=str(tmp_path / "out"),
+        queue_path=str(tmp_path / "jobs.sqlite"),
+        cache_root=str(tmp_path / "cache"),
+        handlers=HANDLERS,
+        poll_interval=0.05
+    )
+    urls = ["https://youtu.be/one", "https://youtu.be/two", "https://youtu.be/broken"]
+
+    report = run_batch(urls, **kwargs)
+
+    assert sorted(v['video_id'] for v in report['processed']) == ["one", "two"]
+    assert [f['video_id'] for f in report['failed']] == ["broken"]
+    assert "video unavailable" in report['failed'][0]['error']
+    assert report['audio_seconds'] == 240.0
+    assert report['videos_per_hour'] > 0
+    with open(tmp_path / "out" / "one.json", encoding="utf-8") as f:
+        assert json.load(f)["metadata"]["video_id"] == "one"
+
+    # Second run is served from the cache
+    report = run_batch(urls[:2], **kwargs)
+    assert report['cached'] == ["one", "two"]
+    assert report['processed'] == []
+
+
+def test_run_batch_leaves_other_pools_jobs_running(tmp_path):
+    queue_path = str(tmp_path / "jobs.sqlite")
+    # A job the app's worker pool is in the middle of, on the shared queue
+    queue = JobQueue(queue_path)
+    app_job = queue.submit("app-video", "https://youtu.be/app-video")
+    queue.claim("download", "app-worker")
+
+    report = run_batch(
+        ["https://youtu.be/one"],
+        output_dir=str(tmp_path / "out"),
+        queue_path=queue_path,
+        cache_root=str(tmp_path / "cache"),
+        handlers=HANDLERS,
+        poll_interval=0.05
+    )
+
+    assert [v['video_id'] for v in report['processed']] == ["one"]
+    job = queue.get(app_job)
+    assert (job['status'], job['worker']) == ("running", "app-worker")
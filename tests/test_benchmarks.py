@@ -0,0 +1,54 @@
+import sys
+import os
+
+# Add the benchmarks folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "benchmarks")))
+
+from run_benchmarks import aggregate_runs, compare, run_suite
+from synthetic import synthetic_transcript
+
+
+def test_synthetic_transcript_is_deterministic():
+    first = synthetic_transcript(600, seed=3)
+    assert first == synthetic_transcript(600, seed=3)
+    assert first != synthetic_transcript(600, seed=4)
+    assert first["segments"][-1]["end"] == 600
+    assert all(s["words"][0]["start"] == s["start"] for s in first["segments"])
+
+
+def test_quick_suite_reports_metrics():
+    report = run_suite(["summarize", "retrieve"], [120], repeats=1, llm_latency=0.0, queries=20)
+
+    summarize = report["results"]["summarize"]["120s"]
+    retrieve = report["results"]["retrieve"]["120s"]
+    assert summarize["sections"] == 1 and summarize["llm_requests"] == 1
+    assert summarize["llm_wall_seconds"] > 0
+    assert 0 < retrieve["p50_ms"] <= retrieve["p99_ms"]
+    assert retrieve["peak_rss_mb"] > 0
+    assert report["config"]["seed"] == 0
+
+
+def test_cold_start_metrics_come_from_first_run():
+    # Runs after the first reuse the loaded model
+    runs = [
+        {"load_seconds": 4.0, "wall_seconds": 3.0},
+        {"load_seconds": 0.0, "wall_seconds": 1.0},
+        {"load_seconds": 0.0, "wall_seconds": 2.0},
+    ]
+
+    assert aggregate_runs(runs) == {"load_seconds": 4.0, "wall_seconds": 2.0}
+
+
+def test_compare_flags_regressions_only():
+    def report(wall, throughput, rss):
+        return {"results": {"embed": {"300s": {
+            "wall_seconds": wall, "texts_per_second": throughput, "peak_rss_mb": rss, "texts": 10
+        }}}}
+
+    baseline = report(2.0, 100.0, 500.0)
+
+    assert compare(baseline, report(2.1, 105.0, 502.0)) == []
+    regressions = compare(baseline, report(3.0, 50.0, 800.0))
+    assert [line.split(":")[0] for line in regressions] == [
+        "embed 300s wall_seconds", "embed 300s texts_per_second", "embed 300s peak_rss_mb"
+    ]
@@ -0,0 +1,105 @@
+import sys
+import os
+import pytest
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from captions import (
+    captions_to_transcription, choose_caption_track, merge_caption_lines, parse_caption_track,
+    parse_caption_xml, parse_srt
+)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_manual_xml_to_segments():
+    lines = parse_caption_xml(_fixture("captions_manual.xml"))
+
+    # [Music] cue dropped, entities decoded
+    assert lines[0]["text"] == "Welcome back! Today we're looking at binary search."
+    assert lines[0]["start"] == pytest.approx(3.7)
+
+    transcription = captions_to_transcription(lines, "en")
+    assert transcription["language"] == "en"
+    assert [s["text"] for s in transcription["segments"]] == [
+        "Welcome back! Today we're looking at binary search.",
+        "Binary search works on a sorted array by halving the search range each step.",
+        "That gives us logarithmic time, which is why it scales so well.",
+    ]
+    for segment in transcription["segments"]:
+        assert segment["words"][0]["start"] == pytest.approx(segment["start"])
+        assert all(w["start"] <= w["end"] for w in segment["words"])
+
+
+def test_auto_xml_keeps_word_timing():
+    lines = parse_caption_xml(_fixture("captions_auto.xml"))
+
+    assert [line["text"] for line in lines] == [
+        "so today we look at binary search",
+        "it works on sorted arrays",
+        "thanks for watching",
+    ]
+    assert [w["start"] for w in lines[0]["words"][:3]] == [1.2, 1.52, 2.0]
+
+
+def test_srt_matches_xml():
+    srt_lines = parse_srt(_fixture("captions.srt"))
+    xml_lines = parse_caption_xml(_fixture("captions_manual.xml"))
+
+    assert [(l["text"], l["start"], l["end"]) for l in srt_lines] == [
+        (l["text"], pytest.approx(l["start"]), pytest.approx(l["end"])) for l in xml_lines[:3]
+    ]
+
+
+class _FakeCaption:
+    """pytubefix Caption stand-in"""
+
+    def __init__(self, xml: str):
+        self.xml_captions = xml
+
+    def generate_srt_captions(self) -> str:
+        return _fixture("captions.srt")
+
+
+@pytest.mark.parametrize("xml", ["<timedtext format=\"4\"><body/></timedtext>", "<transcript><text"])
+def test_track_falls_back_to_srt(xml):
+    assert parse_caption_track(_FakeCaption(xml)) == parse_srt(_fixture("captions.srt"))
+
+
+def test_track_prefers_xml():
+    caption = _FakeCaption(_fixture("captions_auto.xml"))
+    assert parse_caption_track(caption) == parse_caption_xml(caption.xml_captions)
+
+
+def test_merge_clips_overlapping_lines():
+    lines = [
+        {"text": "rolling one", "start": 0.0, "end": 4.0,
+         "words": [{"word": "rolling", "start": 0.0, "end": 2.0}, {"word": "one", "start": 2.0, "end": 4.0}]},
+        {"text": "rolling two", "start": 3.0, "end": 6.0,
+         "words": [{"word": "rolling", "start": 3.0, "end": 4.5}, {"word": "two", "start": 4.5, "end": 6.0}]},
+    ]
+    segments = merge_caption_lines(lines, max_seconds=100)
+
+    assert len(segments) == 1
+    assert segments[0]["words"][1]["end"] == 3.0
+
+
+@pytest.mark.parametrize("codes, language, policy, expected", [
+    (["en", "a.en", "de"], None, "any", "en"),             # creator track in the spoken language
+    (["a.en", "de"], None, "any", "a.en"),                 # only a translation: auto wins
+    (["a.en", "de"], None, "manual", None),                # ...unless auto is not allowed
+    (["en-US", "a.en"], None, "manual", "en-US"),
+    (["en", "a.en"], "fr", "any", None),                   # language mismatch: Whisper
+    (["fr"], None, "any", "fr"),                           # lone creator track
+    (["fr", "de"], None, "any", None),                     # ambiguous: Whisper
+    (["en", "a.en"], None, "off", None),
+    ([], None, "any", None),
+])
+def test_caption_policy(codes, language, policy, expected):
+    assert choose_caption_track(codes, language, policy) == expected
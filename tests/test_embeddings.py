@@ -0,0 +1,96 @@
+import sys
+import os
+import sqlite3
+import time
+import numpy as np
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from embeddings import EmbeddingCache, text_hash
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, normalize_embeddings=True):
+        self.encoded.extend(texts)
+        vectors = np.array([[len(t), 1.0] for t in texts], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_only_new_texts_are_encoded():
+    encoder = CountingEncoder()
+    cache = EmbeddingCache(path=None, encoder=encoder)
+
+    first = cache.encode(["alpha", "beta"])
+    second = cache.encode(["beta", "gamma", "alpha", "gamma"])
+
+    assert encoder.encoded == ["alpha", "beta", "gamma"]
+    assert second.shape == (4, 2)
+    assert np.array_equal(second[0], first[1])
+    assert np.array_equal(second[1], second[3])
+
+
+def test_empty_input_keeps_embedding_dimension():
+    cache = EmbeddingCache(path=None, encoder=CountingEncoder())
+    empty = cache.encode([])
+
+    assert empty.shape == (0, 2)
+    assert np.dot(empty, cache.encode_query("what is attention?")).shape == (0,)
+
+
+def test_embeddings_persist_across_instances(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    cache = EmbeddingCache(path=path, encoder=CountingEncoder())
+    cache.encode(["what is attention?"])
+    cache.close()  # writes are batched; close() flushes them
+
+    encoder = CountingEncoder()
+    vector = EmbeddingCache(path=path, encoder=encoder).encode_query("what is attention?")
+
+    assert encoder.encoded == []
+    assert vector.dtype == np.float32
+
+
+def test_model_names_do_not_share_entries(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    cache = EmbeddingCache("model-a", path=path, encoder=CountingEncoder())
+    cache.encode(["text"])
+    cache.close()
+
+    encoder = CountingEncoder()
+    EmbeddingCache("model-b", path=path, encoder=encoder).encode(["text"])
+    assert encoder.encoded == ["text"]
+
+
+def _rows(path):
+    with sqlite3.connect(path) as conn:
+        return [h for (h,) in conn.execute("SELECT hash FROM embeddings ORDER BY hash")]
+
+
+def test_queries_are_committed_in_batches(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    cache = EmbeddingCache(path=path, encoder=CountingEncoder(), flush_rows=3)
+
+    cache.encode_query("one")
+    cache.encode_query("two")
+    assert _rows(path) == []
+    cache.encode_query("three")
+    assert len(_rows(path)) == 3
+
+
+def test_least_recently_used_rows_are_pruned(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    cache = EmbeddingCache(path=path, encoder=CountingEncoder(), max_rows=2, flush_rows=1)
+
+    cache.encode_query("old")
+    time.sleep(0.01)
+    cache.encode_query("recent")
+    time.sleep(0.01)
+    cache.encode_query("old")  # used again, so "recent" is now the oldest
+    time.sleep(0.01)
+    cache.encode_query("new")
+
+    assert _rows(path) == sorted([text_hash("old"), text_hash("new")])
@@ -0,0 +1,56 @@
+import sys
+import os
+import time
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from extractive import extractive_summary, split_sentences
+from summarization import YouTubeSummarizer
+
+TEXT = (
+    "Welcome back to the channel. "
+    "Today we look at gradient descent for training neural networks. "
+    "Gradient descent updates the weights against the gradient of the loss. "
+    "The learning rate controls how large each gradient descent step is. "
+    "By the way, remember to subscribe. "
+    "Too large a learning rate makes gradient descent diverge."
+)
+
+
+def test_summary_shape_and_content():
+    summary = extractive_summary(TEXT, 125.0, max_points=2)
+    title, *bullets = summary.split("\n")
+
+    assert title.startswith("[0:02:05] ")
+    assert "Gradient" in title
+    assert len(bullets) == 2
+    assert all(b.startswith("- ") and "gradient" in b.lower() for b in bullets)
+    # Bullets keep transcript order
+    sentences = split_sentences(TEXT)
+    positions = [sentences.index(b[2:]) for b in bullets]
+    assert positions == sorted(positions)
+
+
+def test_unpunctuated_text_is_split():
+    words = " ".join(f"word{i}" for i in range(70))
+    assert len(split_sentences(words)) == 3
+
+
+def test_hour_of_transcript_under_a_second():
+    # ~9000 words, a typical hour of speech
+    segments = [
+        {"text": f"{TEXT} Segment {i} covers topic {i % 17} in detail.",
+         "start": i * 5.0, "end": (i + 1) * 5.0}
+        for i in range(720)
+    ]
+    summarizer = YouTubeSummarizer(sectioning="fixed")
+    summarizer.groq_client = None
+
+    started = time.perf_counter()
+    summary = summarizer.generate_summary({"segments": segments, "language": "en"})
+    elapsed = time.perf_counter() - started
+
+    assert summary["metadata"]["section_count"] == 21
+    assert all(s["summary"].split("\n")[1].startswith("- ") for s in summary["sections"])
+    assert elapsed < 1.0
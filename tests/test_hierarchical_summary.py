@@ -0,0 +1,67 @@
+import sys
+import os
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from fake_openai_server import FakeOpenAIServer
+from llm_client import create_groq_client
+from pipeline_cache import PipelineCache
+from summarization import YouTubeSummarizer
+
+
+def _summary(sections: int):
+    return {
+        "metadata": {"video_id": "vid", "duration": sections * 180},
+        "sections": [
+            {"start": i * 180.0, "end": (i + 1) * 180.0, "summary": f"[{i}] Part {i}\n- point"}
+            for i in range(sections)
+        ],
+    }
+
+
+def _merge_requests(server):
+    return [r for r in server.requests if "Merge these" in r["messages"][-1]["content"]]
+
+
+def test_levels_respect_fan_in():
+    with FakeOpenAIServer(reply="[00:00:00] Merged\n- point") as server:
+        summarizer = YouTubeSummarizer(requests_per_minute=1000)
+        summarizer.groq_client = create_groq_client("test-key", server.base_url)
+        summary = summarizer.generate_hierarchical_summary(_summary(12), fan_in=3)
+
+    assert [len(level) for level in summary["levels"]] == [4, 2, 1]
+    assert summary["chapters"] == summary["levels"][0]
+    assert summary["overview"]["start"] == 0.0
+    assert summary["overview"]["end"] == 12 * 180.0
+    # Each merge prompt sees at most fan_in summaries
+    for request in _merge_requests(server):
+        assert request["messages"][-1]["content"].count("- point") <= 3
+
+
+def test_new_section_only_recomputes_ancestors(tmp_path):
+    cache = PipelineCache(str(tmp_path))
+    with FakeOpenAIServer() as server:
+        summarizer = YouTubeSummarizer(requests_per_minute=1000)
+        summarizer.groq_client = create_groq_client("test-key", server.base_url)
+        summarizer.generate_hierarchical_summary(_summary(9), fan_in=3, cache=cache)
+        first_run = len(_merge_requests(server))
+
+        # A fresh summarizer still reuses merges stored in the pipeline cache
+        summarizer = YouTubeSummarizer(requests_per_minute=1000)
+        summarizer.groq_client = create_groq_client("test-key", server.base_url)
+        summarizer.generate_hierarchical_summary(_summary(10), fan_in=3, cache=cache)
+
+    assert first_run == 4  # 3 chapters + overview
+    # The 10th section is promoted unchanged until it meets the old overview,
+    # so only the new root is merged
+    assert len(_merge_requests(server)) - first_run == 1
+
+
+def test_without_llm_uses_section_titles():
+    summarizer = YouTubeSummarizer()
+    summarizer.groq_client = None
+    summary = summarizer.generate_hierarchical_summary(_summary(3), fan_in=5)
+
+    assert summary["chapters"] == []
+    assert "- [1] Part 1" in summary["overview"]["summary"]
@@ -0,0 +1,177 @@
+import sys
+import os
+import threading
+import time
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from jobs import JobQueue, WorkerPool
+from metrics import registry
+from pipeline_cache import PipelineCache
+
+
+def test_submissions_for_same_video_are_deduplicated(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    ids = []
+
+    def submit():
+        ids.append(queue.submit("abc", "https://youtu.be/abc"))
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(ids)) == 1
+    assert queue.submit("other", "https://youtu.be/other") != ids[0]
+
+
+def test_job_moves_through_stages(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    job_id = queue.submit("abc", "url", {"length": 60})
+
+    assert queue.claim("transcribe") is None
+    job = queue.claim("download")
+    assert job["id"] == job_id and job["params"] == {"length": 60}
+    assert queue.claim("download") is None
+
+    queue.report(job_id, 0.5, "halfway")
+    assert queue.get(job_id)["progress"] == 0.5
+    queue.complete_stage(job_id)
+    assert queue.get(job_id)["stage"] == "transcribe"
+
+    queue.claim("transcribe")
+    queue.complete_stage(job_id)
+    queue.claim("summarize")
+    queue.complete_stage(job_id)
+    assert queue.get(job_id)["status"] == "done"
+
+    # A finished video can be submitted again
+    assert queue.submit("abc", "url") != job_id
+
+
+def test_failed_and_orphaned_jobs(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    failed = queue.submit("a", "url")
+    queue.claim("download")
+    queue.fail(failed, "boom")
+    assert queue.get(failed)["status"] == "failed"
+
+    orphan = queue.submit("b", "url")
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), lease_seconds=0.1)
+    queue.claim("download", "dead-worker")
+    assert queue.recover() == 0  # lease still valid
+    time.sleep(0.15)
+    assert queue.recover() == 1
+    assert queue.claim("download")["id"] == orphan
+
+
+def test_recover_leaves_live_workers_jobs_alone(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    queue = JobQueue(path, lease_seconds=0.2)
+    live, dead = queue.submit("live", "url"), queue.submit("dead", "url")
+    assert queue.claim("download", "live-worker")["id"] == live
+    assert queue.claim("download", "dead-worker")["id"] == dead
+
+    # Only the live worker renews its lease
+    for _ in range(3):
+        time.sleep(0.1)
+        assert queue.heartbeat(live, "live-worker")
+    # A second pool starting on the same queue file
+    assert JobQueue(path, lease_seconds=0.2).recover() == 1
+    assert queue.get(live)["status"] == "running"
+    assert queue.get(dead)["status"] == "queued"
+    # An expired lease can also be claimed directly by another worker
+    time.sleep(0.25)
+    assert queue.claim("download", "other-worker")["id"] == live
+    assert not queue.heartbeat(live, "live-worker")
+
+
+def test_stale_worker_cannot_finish_reclaimed_job(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), lease_seconds=0.1)
+    job_id = queue.submit("abc", "url")
+    queue.claim("download", "stalled-worker")
+    time.sleep(0.15)  # its heartbeat stalled and the lease ran out
+    assert queue.claim("download", "new-worker")["id"] == job_id
+
+    assert not queue.complete_stage(job_id, "stalled-worker")
+    assert not queue.fail(job_id, "late failure", "stalled-worker")
+    queue.report(job_id, 0.9, "late progress", "stalled-worker")
+    job = queue.get(job_id)
+    assert (job["stage"], job["status"], job["worker"], job["progress"]) == ("download", "running", "new-worker", 0)
+
+    assert queue.complete_stage(job_id, "new-worker")
+    assert queue.get(job_id)["stage"] == "transcribe"
+
+
+def _record_stage(job, cache, report):
+    report(1.0, "ok")
+    cache.put(job["video_id"], job["stage"], None, {"stage": job["stage"]})
+
+
+def _slow_stage(job, cache, report):
+    started = time.time()
+    time.sleep(0.3)
+    cache.put(job["video_id"], "timing", None, [started, time.time()])
+
+
+def _counting_stage(job, cache, report):
+    registry.inc("test_worker_jobs_total")
+
+
+def _failing_stage(job, cache, report):
+    raise RuntimeError("no audio")
+
+
+def _wait_for(queue, job_ids, timeout=20.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        jobs = [queue.get(job_id) for job_id in job_ids]
+        if all(job["status"] in ("done", "failed") for job in jobs):
+            return jobs
+        time.sleep(0.05)
+    raise TimeoutError("jobs did not finish")
+
+
+def test_worker_pool_runs_stages_in_processes(tmp_path):
+    handlers = {"download": _slow_stage, "transcribe": _record_stage, "summarize": _record_stage}
+    with WorkerPool(
+        str(tmp_path / "jobs.sqlite"), str(tmp_path / "cache"),
+        concurrency={"download": 3, "transcribe": 1, "summarize": 1},
+        handlers=handlers, poll_interval=0.05
+    ) as pool:
+        job_ids = [pool.queue.submit(f"video{i}", "url") for i in range(3)]
+        jobs = _wait_for(pool.queue, job_ids)
+
+    assert all(job["status"] == "done" for job in jobs)
+    cache = PipelineCache(str(tmp_path / "cache"))
+    assert cache.get("video2", "summarize") == {"stage": "summarize"}
+    # Three download workers: the slow downloads overlapped
+    timings = [cache.get(f"video{i}", "timing") for i in range(3)]
+    assert max(start for start, _ in timings) < min(end for _, end in timings)
+
+
+def test_worker_pool_records_failures(tmp_path):
+    with WorkerPool(
+        str(tmp_path / "jobs.sqlite"), str(tmp_path / "cache"),
+        handlers={"download": _failing_stage}, poll_interval=0.05
+    ) as pool:
+        job = _wait_for(pool.queue, [pool.queue.submit("abc", "url")])[0]
+
+    assert job["status"] == "failed"
+    assert "no audio" in job["error"]
+
+
+def test_worker_metrics_reach_the_parent_registry(tmp_path):
+    before = registry.histogram_count("stage_seconds", stage="job_download")
+    with WorkerPool(
+        str(tmp_path / "jobs.sqlite"), str(tmp_path / "cache"),
+        handlers={"download": _counting_stage, "transcribe": _record_stage, "summarize": _record_stage},
+        poll_interval=0.05
+    ) as pool:
+        _wait_for(pool.queue, [pool.queue.submit(f"video{i}", "url") for i in range(2)])
+
+    assert registry.counter_value("test_worker_jobs_total") == 2
+    assert registry.histogram_count("stage_seconds", stage="job_download") == before + 2
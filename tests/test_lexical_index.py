@@ -0,0 +1,49 @@
+import sys
+import os
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def test_tokenize_keeps_identifiers_and_numbers():
+    tokens = tokenize("Call np.argpartition on GPT-4 outputs, 3.14 times")
+    assert "np.argpartition" in tokens
+    assert "argpartition" in tokens
+    assert "gpt-4" in tokens
+    assert "3.14" in tokens
+
+
+def test_bm25_ranks_exact_term_first():
+    index = BM25Index()
+    for text in [
+        "today we talk about sorting algorithms",
+        "use np.argpartition for top k selection",
+        "sorting is everywhere in computer science sorting sorting",
+    ]:
+        index.add(text)
+
+    ids, scores = index.search("argpartition", 3)
+    assert list(ids) == [1]
+    assert scores[0] > 0
+
+    ids, _ = index.search("sorting", 3)
+    assert list(ids) == [2, 0]
+
+
+def test_incremental_add_and_roundtrip():
+    index = BM25Index()
+    index.add("first window")
+    index.search("window", 1)  # caches posting arrays
+    index.add("second window mentions transformers")
+
+    restored = BM25Index.from_dict(index.to_dict())
+    assert list(restored.search("transformers", 2)[0]) == [1]
+    assert len(restored.search("window", 5)[0]) == 2
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([[3, 1, 2], [1, 4]])
+    assert fused[0] == 1  # ranked well by both lists
+    assert set(fused) == {1, 2, 3, 4}
@@ -0,0 +1,105 @@
+import sys
+import os
+import threading
+import numpy as np
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import library_index
+from library_index import LibraryIndex
+
+
+def _clustered_vectors(n: int, dim: int = 32, clusters: int = 50, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, n)] + 0.3 * rng.normal(size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _records(n: int):
+    return [{"start": i * 30.0, "end": (i + 1) * 30.0, "text": f"chunk {i}", "kind": "segment"}
+            for i in range(n)]
+
+
+def test_add_and_exact_search_before_build(tmp_path):
+    library = LibraryIndex(str(tmp_path))
+    vectors = _clustered_vectors(40)
+    assert library.add("vidA", vectors[:20], _records(20))
+    assert library.add("vidB", vectors[20:], _records(20))
+    assert not library.add("vidA", vectors[:20], _records(20))
+
+    hit = library.search(vectors[25], k=1)[0]
+    assert (hit["video_id"], hit["start"]) == ("vidB", 150.0)
+    assert hit["link"] == "https://youtu.be/vidB?t=150"
+
+
+def test_ivf_recall_and_unindexed_tail(tmp_path):
+    library = LibraryIndex(str(tmp_path))
+    vectors = _clustered_vectors(5000)
+    library.add("bulk", vectors, _records(5000))
+    library.build(iterations=5)
+
+    found = 0
+    for i in range(0, 5000, 100):
+        hits = library.search(vectors[i], k=1, nprobe=8)
+        found += hits[0]["start"] == i * 30.0
+    assert found >= 45  # >= 90% recall@1 on 50 queries
+
+    # Videos added after the build are still searchable
+    extra = _clustered_vectors(3, seed=99)
+    library.add("late", extra, _records(3))
+    assert library.search(extra[2], k=1)[0]["video_id"] == "late"
+
+
+def test_reopens_from_disk(tmp_path):
+    vectors = _clustered_vectors(10)
+    LibraryIndex(str(tmp_path)).add("vid", vectors, _records(10))
+
+    reopened = LibraryIndex(str(tmp_path))
+    assert "vid" in reopened
+    assert len(reopened) == 10
+    assert reopened.search(vectors[3], k=1)[0]["text"] == "chunk 3"
+
+
+def test_long_lived_reader_sees_videos_added_elsewhere(tmp_path):
+    vectors = _clustered_vectors(30)
+    reader = LibraryIndex(str(tmp_path))
+    writer = LibraryIndex(str(tmp_path))
+    writer.add("first", vectors[:10], _records(10))
+    assert "first" in reader
+
+    # Another process adds and rebuilds; the reader's cached IVF lists are dropped
+    writer.add("second", vectors[10:], _records(20))
+    writer.build(iterations=2)
+    assert reader.videos == ["first", "second"]
+    assert reader.search(vectors[15], k=1)[0]["video_id"] == "second"
+
+
+def test_background_build_does_not_block_adds(tmp_path, monkeypatch):
+    library = LibraryIndex(str(tmp_path))
+    vectors = _clustered_vectors(2000)
+    library.add("bulk", vectors, _records(2000))
+
+    # Hold the build in the middle of regrouping the vectors
+    training, release = threading.Event(), threading.Event()
+    argsort = np.argsort
+
+    def slow_argsort(*args, **kwargs):
+        training.set()
+        release.wait(10)
+        return argsort(*args, **kwargs)
+
+    monkeypatch.setattr(library_index.np, "argsort", slow_argsort)
+    assert library.maybe_build(min_unindexed=1, background=True)
+    assert training.wait(10)
+
+    extra = _clustered_vectors(3, seed=99)
+    assert library.add("late", extra, _records(3))
+    assert not library.maybe_build(min_unindexed=1, background=True)  # one build at a time
+    release.set()
+    library._build_thread.join(10)
+
+    assert library.meta["indexed_count"] == 2000
+    assert library.videos == ["bulk", "late"]
+    assert library.search(extra[2], k=1)[0]["video_id"] == "late"
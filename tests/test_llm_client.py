@@ -0,0 +1,92 @@
+import sys
+import os
+import time
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from fake_openai_server import FakeOpenAIServer
+from llm_client import RateLimiter, call_with_retry, create_groq_client
+from summarization import YouTubeSummarizer, is_degraded
+
+
+def _transcription(sections: int):
+    # One 180s section per segment
+    return {
+        "language": "en",
+        "segments": [
+            {"text": f"topic {i}", "start": i * 180.0, "end": (i + 1) * 180.0}
+            for i in range(sections)
+        ],
+    }
+
+
+def test_sections_summarized_concurrently_in_order():
+    with FakeOpenAIServer(latency=0.2) as server:
+        summarizer = YouTubeSummarizer(max_concurrency=5, requests_per_minute=1000, sectioning="fixed")
+        summarizer.groq_client = create_groq_client("test-key", server.base_url)
+
+        start = time.perf_counter()
+        summary = summarizer.generate_summary(_transcription(10))
+        elapsed = time.perf_counter() - start
+
+    assert [s["start"] for s in summary["sections"]] == [i * 180.0 for i in range(10)]
+    assert all(f"topic {i}" in s["summary"] for i, s in enumerate(summary["sections"]))
+    assert server.max_in_flight == 5
+    assert elapsed < 10 * 0.2  # serial would take at least 2s
+
+
+def test_retries_rate_limit_and_server_errors():
+    with FakeOpenAIServer(failures=[429, 503]) as server:
+        client = create_groq_client("test-key", server.base_url)
+        response = call_with_retry(
+            lambda: client.chat.completions.create(
+                model="fake", messages=[{"role": "user", "content": "hello"}]
+            ),
+            base_delay=0.01
+        )
+
+    assert response.choices[0].message.content == "hello"
+    assert len(server.requests) == 3
+
+
+def test_rate_limiter_blocks_over_budget():
+    limiter = RateLimiter(requests_per_minute=2)
+    limiter.window = 0.2  # shrink the window to keep the test fast
+
+    start = time.perf_counter()
+    for _ in range(3):
+        limiter.acquire()
+    assert time.perf_counter() - start >= 0.2
+
+
+def test_recorded_tokens_do_not_count_as_requests():
+    limiter = RateLimiter(requests_per_minute=4, tokens_per_minute=10000)
+    limiter.window = 5.0  # long enough that a blocked acquire would show
+
+    start = time.perf_counter()
+    for _ in range(4):
+        limiter.acquire(tokens=10)
+        limiter.record_tokens(20)
+    assert time.perf_counter() - start < 1.0
+    assert limiter._tokens_in_window == 4 * 30
+
+
+def test_failed_llm_sections_mark_summary_degraded():
+    with FakeOpenAIServer(failures=[400]) as server:
+        summarizer = YouTubeSummarizer(max_concurrency=1, requests_per_minute=1000, sectioning="fixed")
+        summarizer.groq_client = create_groq_client("test-key", server.base_url)
+        summary = summarizer.generate_summary(_transcription(2))
+
+    assert [s.get("fallback", False) for s in summary["sections"]] == [True, False]
+    assert summary["metadata"]["fallback_sections"] == 1
+    assert is_degraded(summary)
+
+
+if __name__ == "__main__":
+    test_sections_summarized_concurrently_in_order()
+    test_retries_rate_limit_and_server_errors()
+    test_rate_limiter_blocks_over_budget()
+    test_recorded_tokens_do_not_count_as_requests()
+    test_failed_llm_sections_mark_summary_degraded()
+    print("All LLM client tests passed!")
@@ -0,0 +1,133 @@
+import sys
+import os
+import json
+import logging
+import pickle
+import pstats
+import urllib.request
+import pytest
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from metrics import JsonFormatter, MetricsRegistry, profiled, registry, start_metrics_server, timed
+from summarization import YouTubeSummarizer
+from fake_openai_server import FakeOpenAIServer
+from llm_client import create_groq_client
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+def test_prometheus_histogram_text():
+    metrics = MetricsRegistry(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        metrics.observe("stage_seconds", value, help="Stage latency", stage="download")
+    metrics.inc("llm_tokens_total", 42, kind="prompt")
+
+    text = metrics.render_prometheus()
+
+    assert "# TYPE stage_seconds histogram" in text
+    assert 'stage_seconds_bucket{stage="download",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="download",le="1"} 2' in text
+    assert 'stage_seconds_bucket{stage="download",le="+Inf"} 3' in text
+    assert 'stage_seconds_count{stage="download"} 3' in text
+    assert 'llm_tokens_total{kind="prompt"} 42' in text
+
+
+def test_drained_snapshot_merges_into_another_registry():
+    worker, parent = MetricsRegistry(), MetricsRegistry()
+    parent.inc("llm_tokens_total", 5, kind="prompt")
+    worker.inc("llm_tokens_total", 7, help="LLM tokens used", kind="prompt")
+    worker.observe("stage_seconds", 0.5, stage="whisper_inference")
+
+    # Snapshots cross process boundaries, so they must survive pickling
+    parent.merge(pickle.loads(pickle.dumps(worker.drain())))
+
+    assert parent.counter_value("llm_tokens_total", kind="prompt") == 12
+    assert parent.histogram_count("stage_seconds", stage="whisper_inference") == 1
+    assert "# HELP llm_tokens_total LLM tokens used" in parent.render_prometheus()
+    assert worker.histogram_count("stage_seconds", stage="whisper_inference") == 0
+
+
+def test_chunk_worker_metrics_merged_with_result():
+    from concurrent.futures import Future
+    from transcription import _worker_result
+
+    worker = MetricsRegistry()
+    worker.inc("audio_seconds_transcribed_total", 60.0, model="tiny")
+    future = Future()
+    future.set_result((["segments"], worker.drain()))
+
+    assert _worker_result(future) == ["segments"]
+    assert registry.counter_value("audio_seconds_transcribed_total", model="tiny") == 60.0
+
+
+def test_timed_records_errors_and_logs(caplog):
+    with caplog.at_level(logging.INFO, logger="pipeline.metrics"):
+        with timed("download") as fields:
+            fields["bytes"] = 10
+        with pytest.raises(ValueError):
+            with timed("download"):
+                raise ValueError("boom")
+
+    assert registry.histogram_count("stage_seconds", stage="download") == 2
+    assert registry.counter_value("stage_errors_total", stage="download") == 1
+    records = [json.loads(JsonFormatter().format(r)) for r in caplog.records]
+    assert records[0]["event"] == "stage" and records[0]["bytes"] == 10
+    assert "boom" in records[1]["error"]
+
+
+def test_summarizer_llm_latency_and_tokens():
+    with FakeOpenAIServer(reply="[0:00:00] Title\n- point") as server:
+        summarizer = YouTubeSummarizer(sectioning="fixed")
+        summarizer.groq_client = create_groq_client("test-key", server.base_url)
+        segments = [{"text": f"segment {i}", "start": i * 60.0, "end": (i + 1) * 60.0} for i in range(6)]
+        summarizer.generate_summary({"segments": segments, "language": "en"})
+        sections = len(list(summarizer._iter_sections(segments)))
+
+    assert registry.histogram_count("stage_seconds", stage="llm_request", purpose="section") == sections
+    assert registry.histogram_count("stage_seconds", stage="summarize") == 1
+    # The fake server reports 10 prompt tokens per request
+    assert registry.counter_value("llm_tokens_total", purpose="section", kind="prompt") == 10 * sections
+
+
+def test_llm_latency_excludes_rate_limit_wait():
+    with FakeOpenAIServer(reply="[0:00:00] Title\n- point") as server:
+        summarizer = YouTubeSummarizer(requests_per_minute=1)
+        summarizer.rate_limiter.window = 0.5  # the second request waits ~0.5s
+        summarizer.groq_client = create_groq_client("test-key", server.base_url)
+        summarizer._chat("system", "first", max_tokens=10)
+        summarizer._chat("system", "second", max_tokens=10)
+
+    assert registry.histogram_count("stage_seconds", stage="llm_rate_limit_wait", purpose="section") == 2
+    assert registry.histogram_sum("stage_seconds", stage="llm_rate_limit_wait", purpose="section") >= 0.4
+    assert registry.histogram_sum("stage_seconds", stage="llm_request", purpose="section") < 0.4
+
+
+def test_metrics_endpoint():
+    registry.inc("chat_responses_total", cached="true")
+    server = start_metrics_server(0, host="127.0.0.1")
+    try:
+        host, port = server.server_address
+        body = urllib.request.urlopen(f"http://{host}:{port}/metrics").read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert 'chat_responses_total{cached="true"} 1' in body
+
+
+def test_sampled_profile_dump(tmp_path):
+    with profiled("summarize", sample_rate=1.0, directory=str(tmp_path)):
+        sum(i * i for i in range(10000))
+    with profiled("skipped", sample_rate=0.0, directory=str(tmp_path)):
+        pass
+
+    dumps = os.listdir(tmp_path)
+    assert len(dumps) == 1 and dumps[0].startswith("summarize-")
+    pstats.Stats(str(tmp_path / dumps[0]))
@@ -0,0 +1,68 @@
+import sys
+import os
+import threading
+import time
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from model_registry import ModelRegistry
+
+
+def test_loads_once_per_key():
+    calls = []
+    registry = ModelRegistry(lambda key: calls.append(key) or object(), max_models=2)
+
+    first = registry.get(("small", "cpu", "float32"))
+    second = registry.get(("small", "cpu", "float32"))
+
+    assert first is second
+    assert calls == [("small", "cpu", "float32")]
+
+
+def test_lru_eviction():
+    registry = ModelRegistry(lambda key: object(), max_models=2)
+    registry.get("tiny")
+    registry.get("base")
+    registry.get("tiny")  # tiny becomes most recently used
+    registry.get("small")
+
+    assert registry.keys() == ["tiny", "small"]
+    assert "base" not in registry
+
+
+def test_concurrent_get_loads_once():
+    calls = []
+
+    def slow_loader(key):
+        calls.append(key)
+        time.sleep(0.05)
+        return object()
+
+    registry = ModelRegistry(slow_loader)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(registry.get("base")))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == ["base"]
+    assert all(r is results[0] for r in results)
+
+
+def test_warm_up():
+    registry = ModelRegistry(lambda key: object(), max_models=3)
+    assert registry.warm_up(["tiny", "base"]) == ["tiny", "base"]
+    assert len(registry) == 2
+
+
+if __name__ == "__main__":
+    test_loads_once_per_key()
+    test_lru_eviction()
+    test_concurrent_get_loads_once()
+    test_warm_up()
+    print("All model registry tests passed!")
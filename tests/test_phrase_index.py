@@ -0,0 +1,133 @@
+import sys
+import os
+import numpy as np
+import pytest
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from phrase_index import PhraseIndex
+from transcript_store import CompactTranscript
+
+
+def _transcription(word_count: int = 3000, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    vocabulary = ["the", "softmax", "attention", "query", "key", "value", "layer", "and"]
+    segments = []
+    for first in range(0, word_count, 10):
+        words = [
+            {"word": " " + vocabulary[j].capitalize() + ",", "start": (first + k) * 0.4, "end": (first + k) * 0.4 + 0.3}
+            for k, j in enumerate(rng.integers(len(vocabulary), size=10))
+        ]
+        segments.append({
+            "text": "".join(w["word"] for w in words).strip(),
+            "start": words[0]["start"],
+            "end": words[-1]["end"],
+            "words": words
+        })
+    return {"segments": segments, "language": "en"}
+
+
+def _brute_force(transcription: dict, phrase: str):
+    words = [(w["word"].strip(" ,").lower(), w["start"]) for s in transcription["segments"] for w in s["words"]]
+    tokens = phrase.split()
+    return [
+        pytest.approx(words[i][1], abs=1e-3)
+        for i in range(len(words) - len(tokens) + 1)
+        if [w for w, _ in words[i:i + len(tokens)]] == tokens
+    ]
+
+
+@pytest.mark.parametrize("phrase", ["softmax", "query key", "the attention layer", "key value and the"])
+def test_search_matches_brute_force(phrase):
+    transcription = _transcription()
+    index = PhraseIndex.from_transcription(transcription)
+
+    assert [m["start"] for m in index.search(phrase)] == _brute_force(transcription, phrase)
+
+
+def test_search_is_case_and_punctuation_insensitive():
+    index = PhraseIndex.from_transcription(_transcription())
+
+    assert index.search("Query, KEY!") == index.search("query key")
+    assert index.search("unknown words") == []
+    assert index.search("") == []
+
+
+def test_time_range_and_limit():
+    transcription = _transcription()
+    index = PhraseIndex.from_transcription(transcription)
+    everything = index.search("attention")
+
+    ranged = index.search("attention", 100.0, 200.0)
+    assert ranged == [m for m in everything if 100.0 <= m["start"] <= 200.0]
+    assert index.search("attention", limit=3) == everything[:3]
+    first = everything[0]
+    assert transcription["segments"][first["segment"]]["start"] <= first["start"]
+
+
+def test_segments_without_words_are_interpolated():
+    transcription = {"segments": [
+        {"text": "intro music", "start": 0.0, "end": 10.0},
+        {"text": "we define the softmax function", "start": 10.0, "end": 15.0},
+    ]}
+    index = PhraseIndex.from_transcription(transcription)
+
+    assert index.search("softmax function") == [{"start": 13.0, "end": 15.0, "segment": 1}]
+
+
+def test_locate_prefers_longest_spoken_run():
+    transcription = {"segments": [{
+        "text": "softmax then the softmax function",
+        "start": 0.0, "end": 5.0,
+        "words": [
+            {"word": " softmax", "start": 0.0, "end": 1.0},
+            {"word": " then", "start": 1.0, "end": 2.0},
+            {"word": " the", "start": 2.0, "end": 3.0},
+            {"word": " softmax", "start": 3.0, "end": 4.0},
+            {"word": " function", "start": 4.0, "end": 5.0},
+        ]
+    }]}
+    index = PhraseIndex.from_transcription(transcription)
+
+    assert index.locate("what does the softmax function do?") == 2.0
+    assert index.locate("what is softmax?", 2.5) == 3.0
+    assert index.locate("what is it?") is None
+
+
+def test_locate_ignores_single_common_words():
+    words = "the model is big the model weights are small we trained the model on text then the model".split()
+    transcription = {"segments": [{
+        "text": " ".join(words), "start": 0.0, "end": float(len(words)),
+        "words": [{"word": " " + w, "start": float(k), "end": k + 1.0} for k, w in enumerate(words)]
+    }]}
+    index = PhraseIndex.from_transcription(transcription)
+
+    # "model" alone is said too often to pin the answer to a second
+    assert index.locate("what is a model?") is None
+    assert index.locate("what are the model weights?") == 4.0
+    assert index.locate("any text?") == 14.0  # said once: specific enough
+    # Long questions are tried in bounded runs, not enumerated exhaustively
+    assert index.locate(" ".join(["model"] * 500 + ["the", "model", "on", "text"])) == 11.0
+
+
+def _token_table(index: PhraseIndex):
+    names = {term_id: token for token, term_id in index.terms.items()}
+    return [
+        (names[int(t)], round(float(start), 3), round(float(end), 3), int(segment))
+        for t, start, end, segment in zip(index.token_ids, index.token_start, index.token_end, index.token_segment)
+    ]
+
+
+def test_builds_from_compact_transcript_without_decoding_words(monkeypatch):
+    transcription = _transcription(500)
+    # A segment whose words were dropped is interpolated from its text
+    transcription["segments"][3]["words"] = []
+    compact = CompactTranscript.from_transcription(transcription)
+    expected = PhraseIndex.from_transcription(transcription)
+
+    monkeypatch.setattr(CompactTranscript, "words", lambda self, i: pytest.fail("words decoded"))
+    index = PhraseIndex.from_transcription(compact)
+
+    assert _token_table(index) == _token_table(expected)
+    assert index.search("query key") == expected.search("query key")
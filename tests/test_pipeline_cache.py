@@ -0,0 +1,93 @@
+import sys
+import os
+import time
+import numpy as np
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from pipeline_cache import PipelineCache
+
+
+def test_json_roundtrip_keyed_by_params(tmp_path):
+    cache = PipelineCache(str(tmp_path))
+    cache.put("vid1", "transcript", {"model_size": "small"}, {"segments": [1, 2]})
+
+    assert cache.get("vid1", "transcript", {"model_size": "small"}) == {"segments": [1, 2]}
+    assert cache.get("vid1", "transcript", {"model_size": "base"}) is None
+    assert cache.get("vid2", "transcript", {"model_size": "small"}) is None
+
+
+def test_get_or_compute_only_computes_once(tmp_path):
+    cache = PipelineCache(str(tmp_path))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"title": "video"}
+
+    assert cache.get_or_compute("vid", "metadata", None, compute) == {"title": "video"}
+    assert cache.get_or_compute("vid", "metadata", None, compute) == {"title": "video"}
+    assert len(calls) == 1
+
+    # Failures (None) are not cached, so the next request retries the stage
+    assert cache.get_or_compute("vid", "failed", None, lambda: None) is None
+    assert cache.get("vid", "failed") is None
+
+
+def test_max_age_expires_old_entries(tmp_path):
+    cache = PipelineCache(str(tmp_path))
+    cache.put("vid", "metadata", None, {"views": 1})
+    path = cache._entry_path("vid", "metadata", None, ".json")
+    written = time.time() - 120
+    os.utime(path, (written, written))
+
+    # Reads refresh the access time only, so the entry still ages from its write
+    assert cache.get("vid", "metadata") == {"views": 1}
+    assert os.stat(path).st_mtime == written
+    assert cache.get("vid", "metadata", max_age=60) is None
+    assert cache.get_or_compute("vid", "metadata", None, lambda: {"views": 2}, max_age=60) == {"views": 2}
+    assert cache.get("vid", "metadata", max_age=60) == {"views": 2}
+
+
+def test_files_and_arrays(tmp_path):
+    cache = PipelineCache(str(tmp_path / "cache"))
+    audio = tmp_path / "audio.m4a"
+    audio.write_bytes(b"fake audio")
+
+    cached_path = cache.put_file("vid", "audio", None, str(audio))
+    assert not audio.exists()
+    assert cache.get_file("vid", "audio") == cached_path
+    assert cached_path.endswith(".m4a")
+
+    array = np.arange(6, dtype=np.float32).reshape(2, 3)
+    cache.put_array("vid", "embeddings", {"model": "m"}, array)
+    assert np.array_equal(cache.get_array("vid", "embeddings", {"model": "m"}), array)
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = PipelineCache(str(tmp_path), max_bytes=250)
+    payload = "x" * 100
+    cache.put("a", "summary", None, payload)
+    time.sleep(0.01)
+    cache.put("b", "summary", None, payload)
+    time.sleep(0.01)
+    cache.get("a", "summary")  # a is now more recent than b
+    time.sleep(0.01)
+    cache.put("c", "summary", None, payload)
+
+    assert cache.get("a", "summary") == payload
+    assert cache.get("b", "summary") is None
+    assert cache.get("c", "summary") == payload
+    assert not [p for p in tmp_path.rglob("*.tmp")]
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    for test in (test_json_roundtrip_keyed_by_params, test_get_or_compute_only_computes_once,
+                 test_max_age_expires_old_entries,
+                 test_files_and_arrays, test_evicts_least_recently_used):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("All pipeline cache tests passed!")
@@ -0,0 +1,56 @@
+import sys
+import os
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from llm_client import estimate_tokens
+from prompt_budget import PromptBuilder, compact_turns
+
+
+def test_context_packs_best_items_within_budget():
+    builder = PromptBuilder(max_context_tokens=50)
+    items = ["a" * 120, "b" * 200, "c" * 60]  # 30, 50 and 15 tokens
+
+    packed = builder.pack_context(items)
+
+    assert "a" * 120 in packed
+    assert "b" not in packed  # would overflow; smaller later items still fit
+    assert "c" * 60 in packed
+    assert estimate_tokens(packed) <= 50
+
+
+def test_oversized_first_item_is_truncated():
+    packed = PromptBuilder(max_context_tokens=10).pack_context(["x" * 400])
+    assert estimate_tokens(packed) <= 10
+    assert packed.endswith("...")
+
+
+def test_history_keeps_most_recent_turns():
+    builder = PromptBuilder(max_history_tokens=30)
+    history = [{"role": "user", "content": str(i) * 40} for i in range(5)]  # 10 tokens each
+
+    assert [t["content"][0] for t in builder.pack_history(history)] == ["2", "3", "4"]
+
+
+def test_build_includes_digest_and_query():
+    builder = PromptBuilder()
+    messages = builder.build(
+        "system", [{"role": "user", "content": "hi"}], ["context"], "question?",
+        history_summary="user: earlier question"
+    )
+
+    assert "earlier question" in messages[0]["content"]
+    assert messages[1] == {"role": "user", "content": "hi"}
+    assert messages[-1]["content"].endswith("question?")
+
+
+def test_summary_stays_within_budget():
+    builder = PromptBuilder(max_summary_tokens=30)
+    summary = ""
+    for i in range(20):
+        summary = builder.merge_summary(summary, [{"role": "user", "content": f"Turn {i} text. More."}])
+
+    assert estimate_tokens(summary) <= 30
+    assert "Turn 19 text." in summary
+    assert "More" not in compact_turns([{"role": "user", "content": "One. More."}])
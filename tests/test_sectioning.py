@@ -0,0 +1,98 @@
+import sys
+import os
+import numpy as np
+
+# Add the src and benchmarks folders to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "benchmarks")))
+
+from sectioning import iter_semantic_sections, semantic_sections
+import summarization
+from summarization import YouTubeSummarizer
+from synthetic import HashingEncoder, synthetic_transcript
+
+
+def _topic_data(topic_lengths, seconds: float = 10.0, dim: int = 16, seed: int = 0):
+    """Segments whose embeddings cluster around one direction per topic"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(len(topic_lengths), dim))
+    segments, vectors = [], []
+    for topic, length in enumerate(topic_lengths):
+        for _ in range(length):
+            i = len(segments)
+            segments.append({"text": f"topic {topic} segment {i}", "start": i * seconds, "end": (i + 1) * seconds})
+            vectors.append(centers[topic] + 0.1 * rng.normal(size=dim))
+    return segments, np.array(vectors, dtype=np.float32)
+
+
+def _boundaries(sections):
+    return [s["segments"][0]["start"] for s in sections[1:]]
+
+
+def test_boundaries_follow_topic_shifts():
+    segments, vectors = _topic_data([12, 20, 9])
+    sections = semantic_sections(segments, vectors, min_seconds=60, max_seconds=400)
+
+    assert _boundaries(sections) == [120.0, 320.0]
+    assert [seg for s in sections for seg in s["segments"]] == segments
+
+
+def test_duration_limits_respected():
+    segments, vectors = _topic_data([3, 60, 3])
+    sections = semantic_sections(segments, vectors, min_seconds=60, max_seconds=200)
+
+    # The 30 second opening topic is too short to stand alone
+    assert sections[0]["end"] - sections[0]["start"] >= 60
+    assert all(s["end"] - s["start"] <= 200 for s in sections)
+    assert [seg for s in sections for seg in s["segments"]] == segments
+
+
+def test_noisy_transcript_gets_fewer_sections_than_fixed_windows():
+    # Half the words are topic-free filler and topics change every 240s
+    segments = synthetic_transcript(1800, seed=1)["segments"]
+    vectors = HashingEncoder().encode([seg["text"] for seg in segments])
+    fixed = YouTubeSummarizer(sectioning="fixed")._create_sections(segments)
+
+    sections = semantic_sections(segments, vectors)
+
+    assert len(sections) < len(fixed)
+    aligned = [b for b in _boundaries(sections) if abs(b - 240 * round(b / 240)) <= 15]
+    assert len(aligned) >= 0.8 * len(sections[1:])
+
+
+def test_streaming_matches_batch_and_embeds_once():
+    segments, vectors = _topic_data([15, 25, 10, 30, 12])
+    by_text = {seg["text"]: vec for seg, vec in zip(segments, vectors)}
+    embedded = []
+
+    def embed(texts):
+        embedded.extend(texts)
+        return np.array([by_text[t] for t in texts])
+
+    batch = semantic_sections(segments, vectors)
+    streamed = list(iter_semantic_sections(iter(segments), embed))
+
+    assert _boundaries(streamed) == _boundaries(batch)
+    assert sorted(embedded) == sorted(by_text)
+
+
+def test_summarizer_semantic_mode():
+    segments, vectors = _topic_data([20, 20])
+    by_text = {seg["text"]: vec for seg, vec in zip(segments, vectors)}
+    summarizer = YouTubeSummarizer(sectioning="semantic")
+    summarizer.groq_client = None
+    summarizer._embed = lambda texts: np.array([by_text[t] for t in texts])
+
+    summary = summarizer.generate_summary({"segments": segments, "language": "en"})
+
+    assert [s["start"] for s in summary["sections"]] == [0.0, 200.0]
+
+
+def test_semantic_is_default_when_embeddings_are_available(monkeypatch):
+    monkeypatch.delenv("SUMMARY_SECTIONING", raising=False)
+    monkeypatch.setattr(summarization.importlib.util, "find_spec", lambda name: object())
+    assert YouTubeSummarizer().sectioning == "semantic"
+
+    monkeypatch.setattr(summarization.importlib.util, "find_spec", lambda name: None)
+    assert YouTubeSummarizer().sectioning == "fixed"
+    assert YouTubeSummarizer(sectioning="semantic").sectioning == "semantic"
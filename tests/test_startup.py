@@ -0,0 +1,45 @@
+import sys
+import os
+import time
+import pytest
+
+# Add the benchmarks folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "benchmarks")))
+
+from run_benchmarks import APP_PATH, HEAVY_MODULES, app_imports, import_profile
+
+# Startup budget for the Streamlit app. Importing what app.py imports at the
+# top level (Streamlit aside) must not pull in torch, whisper,
+# sentence-transformers, openai or pytubefix, which take seconds between them
+IMPORT_BUDGET_SECONDS = 1.5
+FIRST_PAINT_BUDGET_SECONDS = 5.0
+
+
+def test_app_top_level_imports_stay_light():
+    modules = [m for m in app_imports() if m.split(".")[0] != "streamlit"]
+    assert "transcription" in modules and "assistant" in modules
+
+    profile = import_profile(modules)
+
+    assert profile["heavy"] == []
+    assert profile["seconds"] < IMPORT_BUDGET_SECONDS
+
+
+def test_heavy_modules_are_detected():
+    profile = import_profile(["json", "llm_client"])
+    assert profile["heavy"] == []
+    assert set(import_profile(["openai"])["heavy"]) >= {"openai"}
+    assert "openai" in HEAVY_MODULES
+
+
+def test_first_paint_budget():
+    pytest.importorskip("streamlit")
+    from streamlit.testing.v1 import AppTest
+
+    started = time.perf_counter()
+    app = AppTest.from_file(APP_PATH, default_timeout=60).run()
+    elapsed = time.perf_counter() - started
+
+    assert not app.exception
+    assert app.title[0].value.endswith("YouTube AI Assistant")
+    assert elapsed < FIRST_PAINT_BUDGET_SECONDS
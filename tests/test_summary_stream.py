@@ -0,0 +1,107 @@
+import sys
+import os
+import threading
+import time
+
+# Add the src and benchmarks folders to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "benchmarks")))
+
+from fake_openai_server import FakeOpenAIServer
+from llm_client import create_groq_client
+from summarization import YouTubeSummarizer
+from synthetic import HashingEncoder, synthetic_transcript
+
+
+def _segments(count: int, seconds: float = 20.0):
+    return [
+        {"text": f"segment {i}", "start": i * seconds, "end": (i + 1) * seconds}
+        for i in range(count)
+    ]
+
+
+def test_stream_matches_batch_sections():
+    summarizer = YouTubeSummarizer(sectioning="fixed")
+    summarizer.groq_client = None
+    segments = _segments(30)
+
+    batch = summarizer.generate_summary({"segments": segments, "language": "en"})
+    streamed = summarizer.build_summary(
+        list(summarizer.generate_summary_stream(iter(segments))), "en"
+    )
+
+    assert streamed == batch
+    assert batch["metadata"]["section_count"] == 4
+
+
+def _stalling_source(released: threading.Event):
+    # Enough segments to close the first section, then a stall (e.g. the
+    # transcriber working through the next stretch of audio)
+    yield from _segments(10)
+    released.wait(10)
+    yield from _segments(20)[10:]
+
+
+def test_first_section_before_stream_ends():
+    summarizer = YouTubeSummarizer(sectioning="fixed")
+    summarizer.groq_client = None
+    released = threading.Event()
+
+    stream = summarizer.generate_summary_stream(_stalling_source(released))
+    first = next(stream)
+
+    assert first["start"] == 0.0
+    assert not released.is_set()
+    released.set()
+    assert len(list(stream)) == 2
+
+
+def test_first_semantic_section_before_stream_ends():
+    # Semantic is the default sectioning whenever an embedding model is installed
+    summarizer = YouTubeSummarizer(sectioning="semantic")
+    summarizer.groq_client = None
+    summarizer._embed = HashingEncoder().encode
+    segments = synthetic_transcript(900, seed=1)["segments"]
+    released = threading.Event()
+
+    def source():
+        # The first topic ends at 240s; stall a minute of audio later
+        yield from (seg for seg in segments if seg["end"] <= 300)
+        released.wait(10)
+        yield from (seg for seg in segments if seg["end"] > 300)
+
+    stream = summarizer.generate_summary_stream(source())
+    first = next(stream)
+
+    assert not released.is_set()
+    assert abs(first["end"] - 240) <= 15
+    released.set()
+    assert len(list(stream)) >= 2
+
+
+def test_finished_llm_section_yielded_while_source_blocks():
+    released = threading.Event()
+
+    with FakeOpenAIServer(latency=0.1) as server:
+        summarizer = YouTubeSummarizer(requests_per_minute=1000, sectioning="fixed")
+        summarizer.groq_client = create_groq_client("test-key", server.base_url)
+        stream = summarizer.generate_summary_stream(_stalling_source(released))
+
+        started = time.perf_counter()
+        first = next(stream)
+        # Not held back until the next section closes
+        assert time.perf_counter() - started < 5
+        assert not released.is_set()
+        released.set()
+        rest = list(stream)
+
+    assert "segment 0" in first["summary"]
+    assert [s["start"] for s in [first] + rest] == [0.0, 160.0, 320.0]
+
+
+if __name__ == "__main__":
+    test_stream_matches_batch_sections()
+    test_first_section_before_stream_ends()
+    test_first_semantic_section_before_stream_ends()
+    test_finished_llm_section_yielded_while_source_blocks()
+    print("All summary stream tests passed!")
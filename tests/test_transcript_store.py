@@ -0,0 +1,104 @@
+import sys
+import os
+import json
+import numpy as np
+import pytest
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from pipeline_cache import PipelineCache
+from summarization import YouTubeSummarizer
+from transcript_store import CompactTranscript, get_transcript, put_transcript
+from vector_index import build_segment_windows
+
+PARAMS = {"model_size": "small", "timestamps": "word"}
+
+
+def _transcription(minutes: int = 10) -> dict:
+    rng = np.random.default_rng(0)
+    vocabulary = ["attention", "query", "key", "value", "the", "and", "héllo", "naïve"]
+    segments = []
+    for i in range(minutes * 12):
+        start = i * 5.0
+        words = [
+            {"word": " " + vocabulary[j], "start": round(start + k * 0.5, 3), "end": round(start + k * 0.5 + 0.4, 3)}
+            for k, j in enumerate(rng.integers(len(vocabulary), size=8))
+        ]
+        segments.append({
+            "text": "".join(w["word"] for w in words).strip(),
+            "start": start,
+            "end": start + 4.25,
+            "words": words
+        })
+    return {
+        "text": " ".join(s["text"] for s in segments),
+        "segments": segments,
+        "language": "en",
+        "source": "captions:en"
+    }
+
+
+def test_round_trip():
+    transcription = _transcription()
+    transcript = CompactTranscript.from_transcription(transcription)
+
+    assert transcript.to_dict() == transcription
+    assert transcript["language"] == "en" and transcript.get("source") == "captions:en"
+    assert transcript["segments"][-1] == transcription["segments"][-1]
+    assert transcript["segments"][3:5] == transcription["segments"][3:5]
+    # Repeated words are stored once
+    assert len(transcript.arrays()["string_offsets"]) - 1 <= len(transcription["segments"]) + 8
+
+
+def test_segment_resolution_has_no_words():
+    transcription = {"segments": [{"text": "hi", "start": 0.0, "end": 1.5}], "language": "de"}
+    transcript = CompactTranscript.from_transcription(transcription)
+
+    assert dict(transcript["segments"][0]) == {"text": "hi", "start": 0.0, "end": 1.5}
+    with pytest.raises(KeyError):
+        transcript["segments"][0]["words"]
+
+
+def test_cached_transcript_is_memory_mapped(tmp_path):
+    cache = PipelineCache(str(tmp_path))
+    transcription = _transcription()
+    put_transcript(cache, "vid", PARAMS, transcription)
+
+    loaded = get_transcript(cache, "vid", PARAMS)
+
+    assert isinstance(loaded, CompactTranscript)
+    assert all(isinstance(array, np.memmap) for array in loaded.arrays().values())
+    assert loaded.to_dict() == transcription
+    assert get_transcript(cache, "vid", {"model_size": "base"}) is None
+
+
+def test_sections_and_windows_from_lazy_view(monkeypatch):
+    transcription = _transcription(20)
+    transcript = CompactTranscript.from_transcription(transcription)
+    summarizer = YouTubeSummarizer(sectioning="fixed")
+
+    expected = summarizer._create_sections(transcription["segments"])
+    # Sectioning and retrieval windows only need text and times: no word is decoded
+    monkeypatch.setattr(CompactTranscript, "words", lambda self, i: pytest.fail("words decoded"))
+    sections = summarizer._create_sections(transcript["segments"])
+
+    assert [(s["start"], s["end"], len(s["segments"])) for s in sections] == \
+        [(s["start"], s["end"], len(s["segments"])) for s in expected]
+    assert build_segment_windows(transcript["segments"]) == build_segment_windows(transcription["segments"])
+
+
+def test_legacy_json_transcript_still_read(tmp_path):
+    cache = PipelineCache(str(tmp_path))
+    legacy = {"segments": [{"text": "old", "start": 0.0, "end": 2.0}], "language": "en"}
+    cache.put("vid", "transcript", PARAMS, legacy)
+
+    assert get_transcript(cache, "vid", PARAMS) == legacy
+
+
+def test_smaller_than_json():
+    transcription = _transcription(60)
+    transcript = CompactTranscript.from_transcription(transcription)
+
+    json_bytes = len(json.dumps(transcription, ensure_ascii=False).encode("utf-8"))
+    assert transcript.nbytes() * 3 < json_bytes
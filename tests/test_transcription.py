@@ -1,11 +1,13 @@
 import sys
 import os
 import json
+import types
 
 # Add the src folder to the system path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
 
-from src.transcription import transcribe_audio
+from src.transcription import _load_whisper_model, transcribe_audio
 
 def test_transcription():
     # Path configuration
@@ -57,5 +59,34 @@ def test_transcription():
     else:
         print("Transcription failed. Error:", result.get("error", "Unknown error"))
 
+class _LayerNorm:
+    def float(self):
+        self.dtype = "float32"
+
+
+class _FakeWhisperModel:
+    def __init__(self):
+        self.dtype = "float32"
+        self.norm = _LayerNorm()
+
+    def half(self):
+        self.dtype = self.norm.dtype = "float16"
+        return self
+
+    def modules(self):
+        return [self, self.norm]
+
+
+def test_float16_compute_type_halves_cuda_models(monkeypatch):
+    # Stand-ins for whisper and torch, which the loader imports lazily
+    monkeypatch.setitem(sys.modules, "whisper", types.SimpleNamespace(load_model=lambda size, device: _FakeWhisperModel()))
+    monkeypatch.setitem(sys.modules, "torch", types.SimpleNamespace(nn=types.SimpleNamespace(LayerNorm=_LayerNorm)))
+
+    model = _load_whisper_model(("tiny", "cuda", "float16"))
+    assert (model.dtype, model.norm.dtype) == ("float16", "float32")
+    assert _load_whisper_model(("tiny", "cuda", "float32")).dtype == "float32"
+    assert _load_whisper_model(("tiny", "cpu", "float16")).dtype == "float32"
+
+
 if __name__ == "__main__":
     test_transcription()
\ No newline at end of file
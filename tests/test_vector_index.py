@@ -0,0 +1,59 @@
+import sys
+import os
+import numpy as np
+
+# Add the src folder to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from pipeline_cache import PipelineCache
+from vector_index import VectorIndex, build_segment_windows, top_k_indices
+
+
+def _random_unit_vectors(n: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_top_k_matches_full_sort():
+    scores = np.random.default_rng(1).normal(size=1000)
+    assert list(top_k_indices(scores, 5)) == list(np.argsort(scores)[-5:][::-1])
+    assert len(top_k_indices(scores[:3], 5)) == 3
+
+
+def test_float_and_int8_search_agree():
+    vectors = _random_unit_vectors(500)
+    query = vectors[42]
+
+    exact, _ = VectorIndex.build(vectors).search(query, 5)
+    quantized, scores = VectorIndex.build(vectors, quantize=True).search(query, 5)
+
+    assert exact[0] == 42
+    assert quantized[0] == 42
+    assert abs(scores[0] - 1.0) < 0.02
+
+
+def test_index_loads_memory_mapped_from_cache(tmp_path):
+    cache = PipelineCache(str(tmp_path))
+    index = VectorIndex.build(_random_unit_vectors(100), quantize=True)
+    for name, array in index.arrays().items():
+        cache.put_array("vid", f"segment_index_{name}", None, array)
+
+    loaded = VectorIndex.from_arrays({
+        name: cache.get_array("vid", f"segment_index_{name}", mmap_mode="r")
+        for name in ("codes", "scales")
+    })
+
+    assert isinstance(loaded.codes, np.memmap)
+    assert list(loaded.search(index.codes[7] * index.scales[7], 3)[0]) == \
+        list(index.search(index.codes[7] * index.scales[7], 3)[0])
+
+
+def test_segment_windows():
+    segments = [
+        {"text": f"s{i}", "start": i * 10.0, "end": (i + 1) * 10.0} for i in range(7)
+    ]
+    windows = build_segment_windows(segments, window_seconds=30)
+
+    assert [w["segment_range"] for w in windows] == [[0, 3], [3, 6], [6, 7]]
+    assert windows[0]["text"] == "s0 s1 s2"
+    assert (windows[1]["start"], windows[1]["end"]) == (30.0, 60.0)
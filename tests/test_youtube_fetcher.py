@@ -3,6 +3,7 @@ import os
 
 # Add the src folder to the system path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
 
 from src.youtube_fetcher import download_video_audio, get_video_metadata
 